@@ -0,0 +1,120 @@
+"""Relatório do build do PyInstaller: tamanho em disco e módulos empacotados.
+
+Uso:
+    pyinstaller graca.spec
+    python analise_build.py [--dist DIR] [--build DIR] [--maiores N]
+
+Mostra o tamanho de dist/, os maiores itens da pasta e quantos módulos
+Python de cada pacote entraram no executável (lidos do PYZ-00.toc do
+build). Sai com código 1 se algum pacote de PACOTES_EXCLUIDOS aparecer
+no resultado: é a verificação de regressão do build enxuto.
+"""
+import argparse
+import ast
+import os
+import sys
+from collections import Counter
+
+NOME_APP = 'Graça_Presentes'
+
+# Pacotes que o app não usa e que o graca.spec exclui do executável.
+# pandas (e numpy, pytz e dateutil, que vêm com ele) era a maior parte
+# do dist/ sem nunca ser importado em tempo de execução.
+PACOTES_EXCLUIDOS = [
+    'pandas',
+    'numpy',
+    'pytz',
+    'dateutil',
+    'matplotlib',
+    'scipy',
+    'plotly',
+    'tkinter',
+    'IPython',
+    'PIL.ImageTk',
+    'PIL.ImageQt',
+]
+
+
+def tamanho(caminho):
+    """Tamanho em bytes de um arquivo ou pasta (recursivo)"""
+    if os.path.isfile(caminho):
+        return os.path.getsize(caminho)
+    total = 0
+    for raiz, _, arquivos in os.walk(caminho):
+        for nome in arquivos:
+            total += os.path.getsize(os.path.join(raiz, nome))
+    return total
+
+
+def em_mb(nbytes):
+    return f"{nbytes / 1024 / 1024:7.1f} MB"
+
+
+def itens_dist(pasta):
+    """(nome, bytes) de cada item de dist/ e de dist/_internal"""
+    itens = []
+    for base in (pasta, os.path.join(pasta, '_internal')):
+        if not os.path.isdir(base):
+            continue
+        for nome in os.listdir(base):
+            if nome == '_internal':
+                continue
+            itens.append((os.path.relpath(os.path.join(base, nome), pasta),
+                          tamanho(os.path.join(base, nome))))
+    return sorted(itens, key=lambda item: item[1], reverse=True)
+
+
+def modulos_empacotados(pasta_build):
+    """Nomes dos módulos Python do PYZ (lidos do PYZ-00.toc)"""
+    toc = os.path.join(pasta_build, 'PYZ-00.toc')
+    with open(toc, encoding='utf-8') as arquivo:
+        _, entradas = ast.literal_eval(arquivo.read())
+    return [nome for nome, _, tipo in entradas if tipo == 'PYMODULE']
+
+
+def excluido(nome):
+    """True se o módulo/arquivo pertence a um pacote de PACOTES_EXCLUIDOS"""
+    return any(nome == pacote or nome.startswith(pacote + '.')
+               for pacote in PACOTES_EXCLUIDOS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dist', default=os.path.join('dist', NOME_APP))
+    parser.add_argument('--build', default=os.path.join('build', 'graca'))
+    parser.add_argument('--maiores', type=int, default=15)
+    args = parser.parse_args()
+
+    problemas = []
+
+    if os.path.isdir(args.dist):
+        itens = itens_dist(args.dist)
+        print(f"{args.dist}: {em_mb(tamanho(args.dist))}")
+        for nome, nbytes in itens[:args.maiores]:
+            print(f"  {em_mb(nbytes)}  {nome}")
+        for nome, _ in itens:
+            topo = nome.replace('_internal' + os.sep, '').split(os.sep)[0]
+            if excluido(topo.split('-')[0]):  # numpy-2.3.3.dist-info -> numpy
+                problemas.append(nome)
+    else:
+        print(f"{args.dist} não encontrado (rode `pyinstaller graca.spec`)")
+
+    toc = os.path.join(args.build, 'PYZ-00.toc')
+    if os.path.isfile(toc):
+        modulos = modulos_empacotados(args.build)
+        por_pacote = Counter(nome.split('.')[0] for nome in modulos)
+        print(f"\n{len(modulos)} módulos Python empacotados ({toc})")
+        for pacote, quantidade in por_pacote.most_common(args.maiores):
+            print(f"  {quantidade:5d}  {pacote}")
+        problemas.extend(nome for nome in modulos if excluido(nome))
+    else:
+        print(f"\n{toc} não encontrado")
+
+    if problemas:
+        print(f"\nPacotes excluídos presentes no build ({len(problemas)}): "
+              f"{', '.join(sorted(problemas)[:20])}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
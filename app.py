@@ -1,23 +1,29 @@
+import perfil_inicio  # Primeiro: mede as importações abaixo (--profile-startup)
 import flet as ft
 import os
 import platform
 from datetime import datetime
 import asyncio
-import traceback
-try:
-    import pandas as pd
-except ImportError:
-    pd = None # Fallback caso pandas falhe no exe, embora esteja no spec
+import threading
+import logging
 
 from datetime import date
-from relatorio import *
 from database import *
-from relatorio import DashboardGraficos  # Importa a nova classe
-import qrcode
-from io import BytesIO
-import base64
-import webbrowser
-import urllib.parse
+from reservas import reservas
+from carrinho import Carrinho
+from tabela_carrinho import TabelaCarrinho
+from tabela_produtos import TabelaProdutos
+from seletor_produto import SeletorProduto
+from busca import PipelineBusca
+from comprovante import gerar_comprovante
+from dinheiro import centavos, formatar_reais, formatar_valor
+# relatorio, qrcode, webbrowser e afins são importados no primeiro uso:
+# nenhum deles é necessário para a primeira tela (a do caixa)
+
+perfil_inicio.marcar("importações")
+
+# Resultados exibidos na aba de busca (os mais relevantes primeiro)
+LIMITE_RESULTADOS_BUSCA = 50
 
 
 # ==============================================================
@@ -29,11 +35,13 @@ class AppState:
     """Classe para gerenciar o estado da aplicação"""
 
     def __init__(self):
-        self.carrinho = []
+        self.carrinho = Carrinho()
         self.produto_editando = None
         self.uploaded_image_path = None
-        self.dashboard = None  # Será inicializado depois
+        self.dashboard = None  # Criado ao abrir os relatórios pela primeira vez
+        self.botao_data = None
         self.ultima_venda_id = None
+        self.foto_cartao = None  # (total, itens) mostrados no modal do cartão
 
 
 def mostrar_mensagem(page, texto, cor=ft.Colors.GREEN):
@@ -92,7 +100,24 @@ def main(page: ft.Page):
 
     # Inicialização do estado da aplicação
     state = AppState()
-    state.dashboard = DashboardGraficos(page)  # Inicializa o dashboard
+    perfil_inicio.marcar("Flet pronto (main)")
+
+    # Reservas do carrinho desta sessão (liberadas ao desconectar)
+    sessao = page.session_id
+    # Leituras do scanner podem chegar em paralelo (handlers em threads)
+    trava_carrinho = threading.Lock()
+    reservas.iniciar_varredura()
+
+    def encerrar_sessao(e):
+        """Libera as reservas e registra as métricas de busca e de cache"""
+        reservas.liberar(sessao)
+        pipeline_busca.registrar_estatisticas("produtos")
+        seletor_produto.pipeline.registrar_estatisticas("seletor")
+        if state.dashboard is not None:
+            import relatorio
+            relatorio.cache.registrar_estatisticas()
+
+    page.on_disconnect = encerrar_sessao
 
     # ==============================================================
     # COMPONENTES DE INTERFACE
@@ -141,11 +166,11 @@ def main(page: ft.Page):
     def calcular_troco(e):
         """Calcula o troco para pagamentos em dinheiro"""
         try:
-            total = sum(item['subtotal'] for item in state.carrinho)
-            valor = float(valor_recebido.value)
+            total = state.carrinho.total
+            valor = centavos(valor_recebido.value)
 
             if valor >= total:
-                troco.value = f"Troco: R$ {valor - total:.2f}"
+                troco.value = f"Troco: {formatar_reais(valor - total)}"
                 troco.visible = True
             else:
                 troco.value = "Valor insuficiente!"
@@ -162,66 +187,11 @@ def main(page: ft.Page):
         page.update()
 
     def atualizar_tabela_produtos(filtro=None):
-        """Atualiza a tabela de produtos com dados do banco"""
-        produtos = buscar_produtos_db(filtro)
-
-        tabela_produtos.rows = [
-            ft.DataRow(
-                cells=[
-                    ft.DataCell(ft.Text(p[0], weight=ft.FontWeight.BOLD)),
-                    ft.DataCell(ft.Text(p[1])),
-                    ft.DataCell(
-                        ft.Text(f"R$ {p[2]:.2f}", color=ft.Colors.GREEN)),
-                    ft.DataCell(ft.Text(str(p[3]),
-                                        color=ft.Colors.RED if p[3] < 5 else ft.Colors.BLACK)),
-                    ft.DataCell(ft.Text(p[4].capitalize(),
-                                        color=ft.Colors.BLUE_700)),
-                    ft.DataCell(
-                        ft.Row([
-                            ft.IconButton(
-                                ft.Icons.REMOVE_RED_EYE,
-                                icon_color=ft.Colors.BLUE_700,
-                                tooltip="Visualizar",
-                                on_click=lambda e, cod=p[0]: mostrar_modal_produto(
-                                    cod)
-                            ),
-                            ft.IconButton(
-                                ft.Icons.DELETE,
-                                icon_color=ft.Colors.RED_700,
-                                tooltip="Excluir",
-                                on_click=lambda e, cod=p[0]: confirmar_exclusao(
-                                    cod)
-                            ),
-                        ], spacing=5)
-                    ),
-                ],
-                on_select_changed=lambda e, cod=p[0]: selecionar_produto(cod),
-                color=ft.Colors.GREY_100 if idx % 2 == 0 else None
-            ) for idx, p in enumerate(produtos)
-        ]
-
-        if not produtos:
-            tabela_produtos.rows = [
-                ft.DataRow(
-                    cells=[
-                        ft.DataCell(
-                            ft.Text("Nenhum produto cadastrado", italic=True)),
-                        *[ft.DataCell(ft.Text("")) for _ in range(5)]
-                    ]
-                )
-            ]
-        page.update()
-
-    def atualizar_seletor_produtos():
-        """Atualiza o dropdown de seleção de produtos"""
-        produtos = buscar_produtos_db()
-        seletor_produto.options = [
-            ft.dropdown.Option(
-                p[0],
-                f"{p[1]} (R$ {p[2]:.2f})"
-            ) for p in produtos
-        ]
-        page.update()
+        """Atualiza a tabela de produtos (só a página visível)"""
+        if filtro is not None:
+            tabela_produtos.filtrar(filtro)
+        else:
+            tabela_produtos.atualizar()
 
     def limpar_formulario(e=None):
         """Limpa o formulário de cadastro de produtos"""
@@ -278,7 +248,7 @@ def main(page: ft.Page):
             produto = {
                 'codigo': codigo_produto.value.strip(),
                 'nome': nome_produto.value.strip(),
-                'preco': float(preco_produto.value.replace(',', '.')),
+                'preco': centavos(preco_produto.value),
                 'quantidade': int(quantidade_produto.value),
                 'categoria': categoria_produto.value if categoria_produto.value else "outros",
                 'descricao': descricao_produto.value.strip() if descricao_produto.value else "",
@@ -288,7 +258,6 @@ def main(page: ft.Page):
             salvar_produto_db(produto)
             limpar_formulario()
             atualizar_tabela_produtos()
-            atualizar_seletor_produtos()
 
             ms2 = "✅ Produto salvo com sucesso!"
             success_salvar_text.value = ms2
@@ -313,7 +282,7 @@ def main(page: ft.Page):
         if produto:
             codigo_produto.value = produto[0]
             nome_produto.value = produto[1]
-            preco_produto.value = str(produto[2])
+            preco_produto.value = formatar_valor(produto[2])
             quantidade_produto.value = str(produto[3])
             categoria_produto.value = produto[4]
             descricao_produto.value = produto[5]
@@ -352,7 +321,7 @@ def main(page: ft.Page):
         if produto:
             modal_codigo.value = produto[0]
             modal_nome.value = produto[1]
-            modal_preco.value = f"R$ {produto[2]:.2f}"
+            modal_preco.value = formatar_reais(produto[2])
             modal_estoque.value = str(produto[3])
             modal_categoria.value = produto[4].capitalize()
             modal_descricao.value = produto[5] or "Nenhuma descrição"
@@ -384,7 +353,9 @@ def main(page: ft.Page):
             excluir_produto_db(codigo)
             mostrar_mensagem(page, "🗑️ Produto excluído com sucesso!")
             atualizar_tabela_produtos()
-            atualizar_seletor_produtos()
+            if seletor_produto.value == codigo:
+                seletor_produto.limpar()
+                page.update()
 
         confirmar_acao(
             page, "Tem certeza que deseja excluir este produto?", excluir)
@@ -393,11 +364,13 @@ def main(page: ft.Page):
     # FUNÇÕES DE BUSCA
     # ==============================================================
 
-    def buscar_produto(e=None):
-        """Realiza busca de produtos no banco de dados"""
-        filtro = campo_busca.value.strip()
-        produtos = buscar_produtos_db(filtro if filtro else None)
+    def buscar_produtos(filtro):
+        """Consulta da busca de produtos (roda na thread do pipeline)"""
+        return buscar_produtos_db(
+            filtro.strip() or None, limite=LIMITE_RESULTADOS_BUSCA)
 
+    def mostrar_resultados_busca(filtro, produtos):
+        """Desenha o resultado mais recente do pipeline de busca"""
         busca_image_preview.visible = False
 
         resultados_busca.controls = [
@@ -406,7 +379,7 @@ def main(page: ft.Page):
                                 color=ft.Colors.BLUE_700),
                 title=ft.Text(p[1], weight=ft.FontWeight.BOLD),
                 subtitle=ft.Text(
-                    f"Código: {p[0]} | Preço: R$ {p[2]:.2f} | Estoque: {p[3]}"),
+                    f"Código: {p[0]} | Preço: {formatar_reais(p[2])} | Estoque: {p[3]}"),
                 on_click=lambda e, p=p: selecionar_produto_busca(p),
             ) for p in produtos
         ]
@@ -421,6 +394,19 @@ def main(page: ft.Page):
 
         page.update()
 
+    # Debounce, cancelamento, thread de trabalho e LRU (ver busca.py)
+    pipeline_busca = PipelineBusca(
+        buscar_produtos, mostrar_resultados_busca,
+        versao=lambda: catalogo.versao)
+
+    async def buscar_produto(e=None):
+        """Busca imediata (Enter ou botão Buscar)"""
+        await pipeline_busca.buscar_agora(campo_busca.value or "")
+
+    async def buscar_produto_digitando(e):
+        """Busca enquanto se digita, após uma pausa"""
+        await pipeline_busca.digitar(campo_busca.value or "")
+
     def selecionar_produto_busca(produto):
         """Mostra imagem do produto na busca"""
         if produto[7]:  # Índice 7 é o caminho da imagem
@@ -434,137 +420,139 @@ def main(page: ft.Page):
     # FUNÇÕES DO CARRINHO
     # ==============================================================
 
+    # Avisos do carrinho: um SnackBar reaproveitado e enviado sozinho
+    # (page.open), sem o page.update() de mostrar_mensagem
+    aviso_carrinho = ft.SnackBar(
+        content=ft.Text(""), behavior=ft.SnackBarBehavior.FLOATING)
+
+    def avisar_carrinho(texto, cor=ft.Colors.GREEN):
+        aviso_carrinho.content.value = texto
+        aviso_carrinho.content.color = cor
+        aviso_carrinho.bgcolor = (ft.Colors.GREY_900 if page.theme_mode == ft.ThemeMode.DARK
+                                  else ft.Colors.WHITE)
+        page.open(aviso_carrinho)
+
     def adicionar_ao_carrinho(e):
         """Adiciona produto ao carrinho de compras"""
         codigo = seletor_produto.value
         if not codigo:
-            mostrar_mensagem(page, "Selecione um produto", ft.Colors.RED)
+            avisar_carrinho("Selecione um produto", ft.Colors.RED)
             return
 
         try:
             quantidade = int(quantidade_compra.value)
             if quantidade <= 0:
-                mostrar_mensagem(
-                    page, "Quantidade deve ser maior que zero", ft.Colors.RED)
+                avisar_carrinho("Quantidade deve ser maior que zero", ft.Colors.RED)
                 return
         except ValueError:
-            mostrar_mensagem(page, "Quantidade inválida", ft.Colors.RED)
+            avisar_carrinho("Quantidade inválida", ft.Colors.RED)
             return
 
-        produto = buscar_produto_db(codigo)
-        if not produto:
-            mostrar_mensagem(page, "Produto não encontrado", ft.Colors.RED)
+        produto, erro = incluir_no_carrinho(codigo, quantidade)
+        if erro:
+            avisar_carrinho(erro, ft.Colors.RED)
             return
 
-        if quantidade > produto[3]:
-            mostrar_mensagem(
-                page, "Quantidade indisponível em estoque", ft.Colors.RED)
-            return
-
-        item_existente = next(
-            (i for i in state.carrinho if i['codigo'] == codigo), None)
-
-        if item_existente:
-            item_existente['quantidade'] += quantidade
-            item_existente['subtotal'] = item_existente['preco'] * \
-                item_existente['quantidade']
-        else:
-            state.carrinho.append({
-                'codigo': codigo,
-                'nome': produto[1],
-                'preco': produto[2],
-                'quantidade': quantidade,
-                'subtotal': produto[2] * quantidade
-            })
-
-        atualizar_estoque_db(codigo, -quantidade)
-        atualizar_carrinho()
-        atualizar_tabela_produtos()
-        mostrar_mensagem(page, "🛒 Produto adicionado ao carrinho!")
-        quantidade_compra.value = "1"
+        atualizar_carrinho(codigo)
+        # Só o campo de quantidade e o aviso vão junto (sem page.update())
+        if quantidade_compra.value != "1":
+            quantidade_compra.value = "1"
+            quantidade_compra.update()
+        avisar_carrinho("🛒 Produto adicionado ao carrinho!")
         seletor_produto.focus()
-        page.update()
-
-    def atualizar_carrinho():
-        """Atualiza la exibição do carrinho com tabela e total alinhado"""
-
-        tabela = []
-
-        # Cabeçalho
-        tabela.append(
-            ft.Row([
-                ft.Text("Produto", weight=ft.FontWeight.BOLD,
-                        size=20, expand=2),
-                ft.Text("Qtde", weight=ft.FontWeight.BOLD, size=20, expand=1),
-                ft.Text("Preço un", weight=ft.FontWeight.BOLD,
-                        size=20, expand=1),
-                ft.Text("Subtotal", weight=ft.FontWeight.BOLD,
-                        size=20, expand=1),
-                ft.Text("", expand=1)
-            ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN)
-        )
-
-        # Linhas com produtos
-        for item in state.carrinho:
-            tabela.append(
-                ft.Row([
-                    ft.Text(item['nome'], size=20, expand=2),
-                    ft.Text(str(item['quantidade']), size=20, expand=1),
-                    ft.Text(f"R$ {item['preco']:.2f}", size=20, expand=1),
-                    ft.Text(f"R$ {item['subtotal']:.2f}",
-                            size=20, expand=1, color=ft.Colors.GREEN),
-                    ft.IconButton(
-                        icon=ft.Icons.DELETE,
-                        icon_color=ft.Colors.RED_700,
-                        tooltip="Remover",
-                        on_click=lambda e, cod=item['codigo']: remover_do_carrinho(
-                            cod)
-                    )
-                ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN)
-            )
-
-        # Calcula o total
-        total = sum(item['subtotal'] for item in state.carrinho)
 
-        # Atualiza visual do card e do total alinhado
-        itens_carrinho.controls = [
-            ft.Card(
-                content=ft.Container(
-                    content=ft.Column(tabela, spacing=15),
-                    padding=10,
-                    bgcolor=ft.Colors.GREY_100,
-                    border_radius=8
-
-                ),
-                elevation=2,
-                margin=ft.margin.symmetric(vertical=5)
-            ),
-            ft.Row(  # total alinhado com a coluna "Subtotal"
-                controls=[
-                    ft.Container(
-                        content=ft.Text(
-                            f"Total: R$ {total:.2f}", size=25, weight=ft.FontWeight.BOLD),
-                        alignment=ft.alignment.center_right,
-                        expand=True
-                    )
-                ],
-                alignment=ft.MainAxisAlignment.END
-            )
-        ]
-
-        # opcional se tiver visível fora do card
-        total_carrinho.value = f"R$ {total:.2f}"
-        page.update()
+    def incluir_no_carrinho(codigo, quantidade):
+        """Soma `quantidade` do produto ao carrinho, só em memória.
+
+        Consulta o catálogo em memória e reserva o estoque; nada é
+        gravado no banco. Retorna (produto, None) ou (None, mensagem).
+        """
+        with trava_carrinho:
+            produto = buscar_produto_db(codigo)
+            if not produto:
+                return None, "Produto não encontrado"
+
+            # O estoque só é baixado ao finalizar a venda (registrar_venda_db);
+            # até lá a quantidade fica reservada para esta sessão
+            no_carrinho = state.carrinho.quantidade_de(codigo)
+            if not reservas.reservar(sessao, codigo, quantidade + no_carrinho, produto[3]):
+                return None, "Quantidade indisponível em estoque"
+
+            state.carrinho.adicionar(codigo, produto[1], produto[2], quantidade)
+            return produto, None
+
+    def ler_codigo_scanner(e):
+        """Leitor de código de barras: cada leitura (código + Enter) soma 1"""
+        codigo = (campo_scanner.value or "").strip()
+        campo_scanner.value = ""
+        if codigo:
+            produto, erro = incluir_no_carrinho(codigo, 1)
+            if erro:
+                status_scanner.value = f"✖ {codigo}: {erro}"
+                status_scanner.color = ft.Colors.RED
+            else:
+                status_scanner.value = f"✔ {produto[1]}"
+                status_scanner.color = ft.Colors.GREEN
+        atualizar_carrinho(codigo or None)
+        # Só o campo e o aviso do scanner vão junto (sem page.update())
+        campo_scanner.update()
+        status_scanner.update()
+        # Mantém o foco para a próxima leitura
+        campo_scanner.focus()
+
+    def atualizar_carrinho(codigo=None):
+        """Atualiza a exibição do carrinho (só as linhas alteradas)"""
+        # Na mesma trava das alterações: os controles da tabela não são
+        # thread-safe, e duas leituras simultâneas de um código novo
+        # criariam a mesma linha duas vezes
+        with trava_carrinho:
+            tabela_carrinho.atualizar(codigo)
+            # opcional se tiver visível fora do card
+            total_carrinho.value = formatar_reais(state.carrinho.total)
 
     def remover_do_carrinho(codigo):
         """Remove item do carrinho"""
-        item = next((i for i in state.carrinho if i['codigo'] == codigo), None)
+        with trava_carrinho:
+            item = state.carrinho.remover(codigo)
         if item:
-            atualizar_estoque_db(codigo, item['quantidade'])
-            state.carrinho.remove(item)
-            atualizar_carrinho()
-            atualizar_tabela_produtos()
-            mostrar_mensagem(page, "❌ Item removido do carrinho")
+            reservas.liberar(sessao, codigo)
+            atualizar_carrinho(codigo)
+            avisar_carrinho("❌ Item removido do carrinho")
+
+    def foto_carrinho():
+        """Total e itens do carrinho lidos juntos, sob a trava"""
+        with trava_carrinho:
+            return state.carrinho.total, state.carrinho.itens_venda()
+
+    def gravar_venda_do_carrinho(venda, itens, dados_cartao=None):
+        """Grava a venda da foto `itens` e esvazia o carrinho, sob a trava.
+
+        Se o carrinho mudou desde a foto (leitura do scanner no meio do
+        pagamento), nada é gravado e retorna None: o total conferido com
+        o cliente já não vale. Senão, retorna o resultado de
+        registrar_venda_db (conferência de estoque sobre os mesmos itens).
+        """
+        with trava_carrinho:
+            if state.carrinho.itens_venda() != itens:
+                return None
+            resultado = registrar_venda_db(venda, itens, dados_cartao)
+            if not resultado['conflitos']:
+                # Na mesma trava: nenhuma leitura nova é apagada sem ser vendida
+                state.carrinho.limpar()
+            return resultado
+
+    def avisar_carrinho_alterado():
+        mostrar_mensagem(
+            page, "O carrinho mudou durante o pagamento: confira o total",
+            ft.Colors.RED)
+
+    def avisar_conflitos(conflitos):
+        """Informa os itens que ficaram sem estoque antes da venda ser gravada"""
+        detalhes = ", ".join(
+            f"{c['nome']} (pedido {c['solicitado']}, disponível {c['disponivel']})"
+            for c in conflitos)
+        mostrar_mensagem(
+            page, f"Estoque insuficiente: {detalhes}", ft.Colors.RED)
 
     def limpar_carrinho(e):
         """Limpa todos os itens do carrinho"""
@@ -572,11 +560,10 @@ def main(page: ft.Page):
             return
 
         def limpar():
-            for item in state.carrinho:
-                atualizar_estoque_db(item['codigo'], item['quantidade'])
-            state.carrinho.clear()
+            reservas.liberar(sessao)
+            with trava_carrinho:
+                state.carrinho.limpar()
             atualizar_carrinho()
-            atualizar_tabela_produtos()
             mostrar_mensagem(page, "🔄 Carrinho limpo")
 
         confirmar_acao(
@@ -645,8 +632,8 @@ def main(page: ft.Page):
                 page.update()
                 return
 
-            total = sum(item['subtotal'] for item in state.carrinho)
-            
+            total, itens = state.foto_cartao
+
             dados_cartao = {
                 'nome_cliente': cartao_nome_cliente.value,
                 'tipo_cartao': cartao_tipo.value,
@@ -661,17 +648,27 @@ def main(page: ft.Page):
                 'troco': 0
             }
 
-            venda_id = registrar_venda_db(venda, state.carrinho, dados_cartao)
+            resultado = gravar_venda_do_carrinho(venda, itens, dados_cartao)
+            if resultado is None or resultado['conflitos']:
+                modal_dados_cartao.open = False
+                if resultado is None:
+                    avisar_carrinho_alterado()
+                else:
+                    avisar_conflitos(resultado['conflitos'])
+                return
+
+            venda_id = resultado['venda_id']
             state.ultima_venda_id = venda_id
             abrir_modal_comprovante()
             
-            # Limpeza e Sucesso
-            state.carrinho.clear()
+            # Limpeza e Sucesso (o carrinho já foi esvaziado com a venda)
+            reservas.liberar(sessao)
             atualizar_carrinho()
             modal_dados_cartao.open = False
             modal_checkout.open = False
             atualizar_tabela_produtos()
-            state.dashboard.atualizar_tudo()
+            if state.dashboard is not None:
+                state.dashboard.agendar_atualizacao()
 
             success_vendas_text.value = f"✅ Venda Cartão 🛒{venda_id} registrada!"
             page.update()
@@ -684,7 +681,7 @@ def main(page: ft.Page):
 
         except Exception as ex:
             mostrar_mensagem(page, f"Erro: {str(ex)}", ft.Colors.RED)
-            traceback.print_exc()
+            logging.exception("ERRO ao confirmar venda no cartão")
 
     modal_dados_cartao = ft.AlertDialog(
         modal=True,
@@ -724,14 +721,14 @@ def main(page: ft.Page):
         for item in state.carrinho:
             checkout_itens.controls.append(
                 ft.Row([
-                    ft.Text(f"{item['nome']} x{item['quantidade']}"),
-                    ft.Text(f"R$ {item['subtotal']:.2f}",
+                    ft.Text(f"{item.nome} x{item.quantidade}"),
+                    ft.Text(formatar_reais(item.subtotal),
                             color=ft.Colors.GREEN)
                 ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN)
             )
 
-        total = sum(item['subtotal'] for item in state.carrinho)
-        checkout_total.value = f"R$ {total:.2f}"
+        total = state.carrinho.total
+        checkout_total.value = formatar_reais(total)
 
         valor_recebido.value = ""
         forma_pagamento.value = "dinheiro"
@@ -746,7 +743,8 @@ def main(page: ft.Page):
         """Finaliza a venda e registra no banco de dados"""
         try:
             forma_pgto = forma_pagamento.value
-            total = sum(item['subtotal'] for item in state.carrinho)
+            # Uma foto só: o total conferido e os itens gravados são os mesmos
+            total, itens = foto_carrinho()
 
             if forma_pgto == "cartao":
                 # Prepara e abre modal do cartão
@@ -757,7 +755,8 @@ def main(page: ft.Page):
                 cartao_parcelas.disabled = True
                 
                 data_hora = datetime.now().strftime('%d/%m/%Y %H:%M')
-                cartao_info_venda.value = f"Valor: R$ {total:.2f}\nData: {data_hora}"
+                cartao_info_venda.value = f"Valor: {formatar_reais(total)}\nData: {data_hora}"
+                state.foto_cartao = (total, itens)
                 
                 page.dialog = modal_dados_cartao
                 modal_dados_cartao.open = True
@@ -766,7 +765,7 @@ def main(page: ft.Page):
 
             if forma_pgto == "dinheiro":
                 try:
-                    valor_pago = float(valor_recebido.value)
+                    valor_pago = centavos(valor_recebido.value)
                     if valor_pago < total:
                         mostrar_mensagem(
                             page, "Valor insuficiente!", ft.Colors.RED)
@@ -777,7 +776,7 @@ def main(page: ft.Page):
                         page, "Digite um valor válido!", ft.Colors.RED)
                     return
             else:
-                troco_valor = 0.0
+                troco_valor = 0
                 valor_pago = total
 
             venda = {
@@ -788,20 +787,30 @@ def main(page: ft.Page):
                 'troco': troco_valor if forma_pgto == "dinheiro" else None
             }
 
-            venda_id = registrar_venda_db(venda, state.carrinho)
+            resultado = gravar_venda_do_carrinho(venda, itens)
+            if resultado is None:
+                avisar_carrinho_alterado()
+                return
+            if resultado['conflitos']:
+                avisar_conflitos(resultado['conflitos'])
+                return
+
+            venda_id = resultado['venda_id']
             state.ultima_venda_id = venda_id
             abrir_modal_comprovante()
-            state.carrinho.clear()
+            reservas.liberar(sessao)
             atualizar_carrinho()
             modal_checkout.open = False
             atualizar_tabela_produtos()
 
-            # ATUALIZA OS GRÁFICOS APÓS VENDA
-            state.dashboard.atualizar_tudo()
+            # Gráficos em segundo plano: o caixa não espera pelos relatórios
+            # (se o dashboard ainda não foi aberto, não há o que atualizar)
+            if state.dashboard is not None:
+                state.dashboard.agendar_atualizacao()
 
             msg = f"✅ Venda 🛒{venda_id} finalizada com sucesso!"
             if forma_pgto == "dinheiro":
-                msg += f" Troco: R$ {troco_valor:.2f}"
+                msg += f" Troco: {formatar_reais(troco_valor)}"
 
             success_vendas_text.value = msg
             page.update()
@@ -816,7 +825,7 @@ def main(page: ft.Page):
         except Exception as ex:
             mostrar_mensagem(
                 page, f"Erro ao finalizar venda: {str(ex)}", ft.Colors.RED)
-            traceback.print_exc()
+            logging.exception("ERRO ao finalizar venda")
 
     def fechar_modal_checkout(e=None):
         """Fecha o modal de checkout"""
@@ -830,34 +839,42 @@ def main(page: ft.Page):
     resultado_area = ft.Column(expand=True)
 
     def carregar_vendas(e):
+        import relatorio
         resultado_area.controls.clear()
         data_escolhida = e.control.value.strftime("%Y-%m-%d")
-        dados = obter_vendas_por_dia(data_escolhida)
+        dados = relatorio.obter_vendas_por_dia(data_escolhida)
         if not dados:
             resultado_area.controls.append(
                 ft.Text(f"Nenhuma venda em {data_escolhida}", color="red")
             )
         else:
-            tabela = criar_tabela_vendas(dados)
-            grafico = criar_grafico_vendas(dados)
+            tabela = relatorio.criar_tabela_vendas(dados)
+            grafico = relatorio.criar_grafico_vendas(dados)
             resultado_area.controls.append(
                 ft.Text(f"📆 Vendas de {data_escolhida}",
-                        size=20, weight="bold", color=TEXT_COLOR)
+                        size=20, weight="bold", color=relatorio.TEXT_COLOR)
             )
             resultado_area.controls.append(
                 ft.Row([tabela, grafico], expand=True))
         page.update()
 
-    seletor_data = ft.DatePicker(
-        on_change=carregar_vendas,
-        first_date=date(2025, 1, 1),
-        last_date=date.today(),
-        value=date.today()
-    )
-    page.overlay.append(seletor_data)
-    botao_data = ft.ElevatedButton(
-        "📅 Escolher data", on_click=lambda e: page.open(seletor_data), color=ft.Colors.WHITE, bgcolor=PRIMARY_COLOR
-    )
+    def preparar_relatorios():
+        """Importa relatorio e monta o dashboard na primeira visita"""
+        if state.dashboard is not None:
+            return
+        import relatorio
+        state.dashboard = relatorio.DashboardGraficos(page)
+        seletor_data = ft.DatePicker(
+            on_change=carregar_vendas,
+            first_date=date(2025, 1, 1),
+            last_date=date.today(),
+            value=date.today()
+        )
+        page.overlay.append(seletor_data)
+        state.botao_data = ft.ElevatedButton(
+            "📅 Escolher data", on_click=lambda e: page.open(seletor_data),
+            color=ft.Colors.WHITE, bgcolor=relatorio.PRIMARY_COLOR
+        )
 
     def cadastrar_produto_pagina(e):
         """Navega para a página de cadastro de produtos"""
@@ -897,17 +914,18 @@ def main(page: ft.Page):
 
     def mostrar_relatorios(e):
         """Navega para a página de relatórios"""
+        import relatorio
+        preparar_relatorios()
         page.clean()
         page.add(header)
 
-        # Atualiza os gráficos antes de mostrar
-        state.dashboard.atualizar_tudo()
-
         # ---- LAYOUT ----
+        # Os gráficos chegam em segundo plano (ver DashboardGraficos)
         page.add(ft.Container(
             content=ft.Column([
                 ft.Text("📊 Dashboard de Vendas", size=30,
-                        weight="bold", color=PRIMARY_COLOR),
+                        weight="bold", color=relatorio.PRIMARY_COLOR),
+                state.dashboard.texto_atualizado,
                 state.dashboard.cards,
                 ft.Row([state.dashboard.grafico_pizza,
                         state.dashboard.tabela_cartoes], expand=True),
@@ -915,17 +933,18 @@ def main(page: ft.Page):
                 state.dashboard.grafico_barras,
                 ft.Divider(),
 
-                state.dashboard.criar_grafico_estoque(),
+                state.dashboard.grafico_estoque,
                 ft.Divider(),
                 ft.Text("📆 Relatório por Data", size=25,
-                        weight="bold", color=TEXT_COLOR),
-                ft.Row([botao_data]),
+                        weight="bold", color=relatorio.TEXT_COLOR),
+                ft.Row([state.botao_data]),
                 resultado_area,
                 botao_voltar
             ]),
             padding=20
         ))
         page.update()
+        state.dashboard.agendar_atualizacao()
 
     # ==============================================================
     # DEFINIÇÃO DOS COMPONENTES DE INTERFACE
@@ -1088,6 +1107,7 @@ def main(page: ft.Page):
         label="Buscar Produto",
         width=300,
         suffix_icon=ft.Icons.SEARCH,
+        on_change=buscar_produto_digitando,
         on_submit=buscar_produto,
         border_color=ft.Colors.BLUE_700
     )
@@ -1095,38 +1115,36 @@ def main(page: ft.Page):
     resultados_busca = ft.Column(
         spacing=5, scroll=ft.ScrollMode.AUTO, height=150)
 
-    # Seção de carrinho
-    seletor_produto = ft.Dropdown(
-        label="Produto",
+    # Seção de carrinho (seletor com autocompletar, ver seletor_produto.py)
+    seletor_produto = SeletorProduto(page)
+    # Leitor de código de barras (teclado): código + Enter a cada leitura
+    campo_scanner = ft.TextField(
+        label="Leitor de código",
         width=300,
-        options=[],
+        autofocus=True,
         border_color=ft.Colors.BLUE_700,
-        leading_icon=ft.Icons.SHOPPING_BAG
+        prefix_icon=ft.Icons.QR_CODE_SCANNER,
+        on_submit=ler_codigo_scanner
     )
+    status_scanner = ft.Text(size=16)
     quantidade_compra = ft.TextField(
         label="Quantidade",
         value="1",
         width=300,
         border_color=ft.Colors.BLUE_700
     )
+    tabela_carrinho = TabelaCarrinho(page, state.carrinho, remover_do_carrinho)
     itens_carrinho = ft.Column(
+        tabela_carrinho.controles,
         spacing=5, scroll=ft.ScrollMode.AUTO, height=150)
     total_carrinho = ft.Text("R$ 0,00", size=40, weight=ft.FontWeight.BOLD)
 
-    # Tabela de produtos
-    tabela_produtos = ft.DataTable(
-        columns=[
-            ft.DataColumn(ft.Text("Código", weight=ft.FontWeight.BOLD)),
-            ft.DataColumn(ft.Text("Nome", weight=ft.FontWeight.BOLD)),
-            ft.DataColumn(ft.Text("Preço", weight=ft.FontWeight.BOLD)),
-            ft.DataColumn(ft.Text("Estoque", weight=ft.FontWeight.BOLD)),
-            ft.DataColumn(ft.Text("Categoria", weight=ft.FontWeight.BOLD)),
-            ft.DataColumn(ft.Text("Ações", weight=ft.FontWeight.BOLD)),
-        ],
-        rows=[],
-        width=1100,
-        heading_row_color=ft.Colors.BLUE_50,
-        column_spacing=20
+    # Tabela de produtos (paginada, ver tabela_produtos.py)
+    tabela_produtos = TabelaProdutos(
+        page,
+        ao_selecionar=selecionar_produto,
+        ao_visualizar=mostrar_modal_produto,
+        ao_excluir=confirmar_exclusao
     )
 
     # Mensagens
@@ -1138,38 +1156,9 @@ def main(page: ft.Page):
     # MODAL E FUNÇÕES DO COMPROVANTE (NOVO E MELHORADO)
     # ==============================================================
 
-    def gerar_texto_comprovante(venda_id):
-        """Gera o conteúdo de texto de um comprovante de venda."""
-        venda = obter_venda(venda_id)
-        itens = obter_itens_venda(venda_id)
-
-        if not venda:
-            return None
-
-        # Formata o texto do comprovante
-        texto = f"=== COMPROVANTE DE VENDA ===\n"
-        texto += f"Loja: Graça Presentes\n"
-        texto += f"WhatsApp: (11) 99999-9999\n" # <--- COLOQUE O NÚMERO DA LOJA AQUI
-        texto += f"Data: {venda[1]}\n"
-        texto += f"Venda ID: #{venda[0]}\n"
-        texto += "-" * 30 + "\n"
-
-        for item in itens:
-            # item: id, venda_id, prod_cod, nome, preco, qtd, subtotal
-            texto += f"{item[5]}x {item[3]}\n"
-            texto += f"   R$ {item[4]:.2f} -> R$ {item[6]:.2f}\n"
-
-        texto += "-" * 30 + "\n"
-        texto += f"TOTAL: R$ {venda[2]:.2f}\n"
-        texto += f"Forma Pagamento: {venda[3].upper()}\n"
-
-        texto += "\n   Obrigado pela preferência!   \n"
-        texto += "==============================\n"
-        return texto
-
     def copiar_comprovante(e):
         """Copia o texto do comprovante para a área de transferência."""
-        texto = gerar_texto_comprovante(state.ultima_venda_id)
+        texto = gerar_comprovante(state.ultima_venda_id)
         if texto:
             page.set_clipboard(texto)
             mostrar_mensagem(page, "✅ Texto do comprovante copiado!")
@@ -1180,7 +1169,7 @@ def main(page: ft.Page):
 
     def imprimir_comprovante_local(e):
         """Salva o comprovante como .txt e abre localmente."""
-        texto = gerar_texto_comprovante(state.ultima_venda_id)
+        texto = gerar_comprovante(state.ultima_venda_id)
         if not texto:
             mostrar_mensagem(page, "Erro ao gerar comprovante.", ft.Colors.RED)
             return
@@ -1204,37 +1193,57 @@ def main(page: ft.Page):
         page.update()
 
     def mostrar_qr_code(e):
-        """Gera e exibe um QR Code com o texto do comprovante."""
-        texto = gerar_texto_comprovante(state.ultima_venda_id)
+        """Exibe um QR Code com o comprovante resumido da venda."""
+        texto = gerar_comprovante(state.ultima_venda_id, 'qr')
         if not texto:
             mostrar_mensagem(page, "Erro ao gerar comprovante.", ft.Colors.RED)
             return
 
-        qr = qrcode.QRCode(version=None, box_size=10, border=4)
-        qr.add_data(texto)
-        qr.make(fit=True)
-        img = qr.make_image(fill_color="black", back_color="white")
+        import qr_comprovante
 
-        buffer = BytesIO()
-        img.save(buffer, format="PNG")
-        img_str = base64.b64encode(buffer.getvalue()).decode("utf-8")
+        def imagem_qr(img_str):
+            return ft.Image(src_base64=img_str, width=300, height=300, fit=ft.ImageFit.CONTAIN)
+
+        # QR já gerado (ex.: "Voltar" e abrir de novo) aparece na hora;
+        # senão, um indicador de progresso enquanto a thread de trabalho gera
+        img_str = qr_comprovante.em_cache(texto)
+        area_qr = ft.Container(
+            content=imagem_qr(img_str) if img_str else ft.ProgressRing(),
+            width=300, height=300, alignment=ft.alignment.center)
 
         # Atualiza o conteúdo do modal existente para mostrar o QR Code
         modal_comprovante.title = ft.Text("Escaneie o QR Code")
-        modal_comprovante.content = ft.Column([
-            ft.Image(src_base64=img_str, width=300, height=300, fit=ft.ImageFit.CONTAIN),
+        conteudo_qr = ft.Column([
+            area_qr,
             ft.Text("Aponte a câmera para ler o comprovante", text_align=ft.TextAlign.CENTER)
         ], tight=True, horizontal_alignment=ft.CrossAxisAlignment.CENTER, width=300)
-        
+        modal_comprovante.content = conteudo_qr
+
         modal_comprovante.actions = [
             ft.TextButton("Voltar", on_click=lambda e: abrir_modal_comprovante()),
             ft.TextButton("Fechar", on_click=lambda e: fechar_dialogo(modal_comprovante))
         ]
         modal_comprovante.update()
+        if img_str:
+            return
+
+        async def exibir_qr():
+            try:
+                img_str = await qr_comprovante.gerar_em_segundo_plano(texto)
+            except Exception:
+                logging.exception("Erro ao gerar QR Code do comprovante")
+                area_qr.content = ft.Text("Erro ao gerar QR Code.", color=ft.Colors.RED)
+            else:
+                area_qr.content = imagem_qr(img_str)
+            # Se o caixa voltou ou fechou enquanto gerava, a imagem fica
+            # só no cache para a próxima vez
+            if modal_comprovante.open and modal_comprovante.content is conteudo_qr:
+                modal_comprovante.update()
+        page.run_task(exibir_qr)
 
     def enviar_whatsapp(e):
         """Abre o WhatsApp com o comprovante pronto para ser enviado."""
-        texto = gerar_texto_comprovante(state.ultima_venda_id)
+        texto = gerar_comprovante(state.ultima_venda_id)
         if not texto:
             mostrar_mensagem(page, "Erro ao gerar comprovante.", ft.Colors.RED)
             return
@@ -1248,6 +1257,9 @@ def main(page: ft.Page):
         whatsapp_numero_field.error_text = ""
         whatsapp_numero_field.update()
 
+        import urllib.parse
+        import webbrowser
+
         texto_url = urllib.parse.quote(texto)
         url = f"https://wa.me/55{numero_cliente}?text={texto_url}"
 
@@ -1530,8 +1542,9 @@ def main(page: ft.Page):
                     padding=10
                 ),
                 ft.Divider(),
+                ft.Row([campo_scanner, status_scanner], spacing=10),
                 ft.Row([
-                    seletor_produto,
+                    seletor_produto.controle,
                     quantidade_compra,
                     ft.ElevatedButton(
                         "Adicionar",
@@ -1594,7 +1607,7 @@ def main(page: ft.Page):
                 ),
                 ft.Divider(),
                 ft.Container(
-                    content=tabela_produtos,
+                    content=tabela_produtos.controle,
                     border=ft.border.all(1, ft.Colors.GREY_300),
                     border_radius=5,
                     padding=10,
@@ -1665,11 +1678,14 @@ def main(page: ft.Page):
     # Inicialização
 
     atualizar_tabela_produtos()
-    atualizar_seletor_produtos()
     page.update()
+    perfil_inicio.marcar("primeira tela")
+    perfil_inicio.relatorio()
 
 
 if __name__ == "__main__":
     criar_banco()
+    perfil_inicio.marcar("criar_banco")
 
     ft.app(target=main)
+    gerenciador.fechar_todas()
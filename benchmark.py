@@ -0,0 +1,1447 @@
+"""Benchmarks do sistema (banco de dados, interface e inicialização).
+
+Uso:
+    python benchmark.py conexoes [--chamadas N]
+    python benchmark.py perfis [--vendas N]
+    python benchmark.py datas [--vendas N]
+    python benchmark.py lote [--vendas N] [--itens N]
+    python benchmark.py busca [--produtos N] [--limite N]
+    python benchmark.py catalogo [--produtos N]
+    python benchmark.py tabela [--vendas N] [--itens N]
+    python benchmark.py carrinho [--linhas N]
+    python benchmark.py scanner [--produtos N] [--leituras N]
+    python benchmark.py sugestoes [--produtos N] [--limite N]
+    python benchmark.py pipeline [--produtos N] [--intervalo MS]
+    python benchmark.py planos
+    python benchmark.py centavos [--vendas N]
+    python benchmark.py resumos [--vendas N]
+    python benchmark.py relatorios [--vendas N]
+    python benchmark.py dashboard [--vendas N] [--historico N] [--intervalo S]
+    python benchmark.py logs [--mensagens N] [--atraso MS]
+    python benchmark.py comprovante [--vendas N] [--itens N]
+    python benchmark.py qrcode [--vendas N] [--itens N]
+    python benchmark.py inicio [--executavel CAMINHO | --fonte] [--execucoes N] [--limite MS]
+
+`planos` é uma verificação de regressão: sai com código 1 se alguma
+consulta de relatório passar a varrer uma tabela inteira. `centavos`
+também: grava as vendas pelo caminho do app (preço em texto, centavos(),
+Carrinho, registrar_vendas_lote) e sai com código 1 se SUM(total) das
+vendas, a soma dos itens ou o resumo divergirem da soma exata.
+`carrinho` sai com código 1 se os totais incrementais divergirem da soma
+ou se total, quantidade_itens, quantidade_de, remover, limpar ou
+itens_venda divergirem de um modelo recalculado a cada operação.
+`resumos` sai com código 1 se os relatórios lidos dos resumos diários
+divergirem das mesmas contas feitas direto nas vendas. `relatorios`
+sai com código 1 se o cache de relatórios devolver um resultado velho.
+`comprovante` sai com código 1 se o texto diferir do formato antigo.
+`qrcode` sai com código 1 se o cache devolver outra imagem ou se o QR
+resumido ficar maior que o do texto completo.
+`inicio --limite MS` sai com código 1 se a abertura a quente do
+executável passar de MS milissegundos.
+
+Cada benchmark roda sobre um banco temporário, sem tocar em
+database/graca_presentes.db (exceto `inicio`, que abre o app de verdade).
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import random
+from datetime import date, datetime, timedelta
+
+import database
+import migracoes
+from conexao import GerenciadorConexoes, PERFIS
+
+
+# ==============================================================
+# UTILITÁRIOS
+# ==============================================================
+
+
+def usar_banco_temporario(diretorio, perfil=None):
+    """Aponta o módulo database para um banco novo em `diretorio`"""
+    db_path = os.path.join(diretorio, "benchmark.db")
+    database.gerenciador.fechar_todas()
+    database.DB_PATH = db_path
+    database.gerenciador = GerenciadorConexoes(db_path, perfil=perfil)
+    database.catalogo.invalidar()
+    database.criar_banco()
+    return db_path
+
+
+def popular_produtos(quantidade):
+    """Cadastra `quantidade` produtos sintéticos"""
+    for i in range(quantidade):
+        database.salvar_produto_db({
+            'codigo': f"P{i:06d}",
+            'nome': f"Produto {i}",
+            'preco': 1000 + i % 50 * 100,
+            'quantidade': 1000,
+            'categoria': "outros",
+            'descricao': "",
+        })
+
+
+def venda_sintetica(i, itens_por_venda=3):
+    """Monta (venda, itens) no formato usado por registrar_venda_db"""
+    itens = []
+    for j in range(itens_por_venda):
+        preco = 1000 + (i + j) % 50 * 100
+        itens.append({
+            'codigo': f"P{(i + j) % 100:06d}",
+            'nome': f"Produto {(i + j) % 100}",
+            'preco': preco,
+            'quantidade': 1,
+            'subtotal': preco,
+        })
+    venda = {
+        'total': sum(item['subtotal'] for item in itens),
+        'forma_pagamento': ("dinheiro", "cartao", "pix")[i % 3],
+    }
+    return venda, itens
+
+
+def popular_historico(vendas, dias=3 * 365, itens_por_venda=2):
+    """Insere `vendas` vendas sintéticas espalhadas em `dias` dias.
+
+    Grava direto com executemany (sem registrar_venda_db) para montar
+    bancos grandes rapidamente; os resumos diários são recalculados no fim.
+    """
+    rnd = random.Random(42)
+    inicio = datetime(2023, 1, 1)
+    segundos = dias * 86400
+    datas = sorted(
+        (inicio + timedelta(seconds=rnd.randrange(segundos)))
+        .strftime("%Y-%m-%d %H:%M:%S")
+        for _ in range(vendas))
+
+    with database.transacao() as conn:
+        base = conn.execute("SELECT COALESCE(MAX(id), 0) FROM vendas").fetchone()[0]
+        conn.executemany('''
+            INSERT INTO vendas (id, data_venda, total, forma_pagamento)
+            VALUES (?, ?, ?, ?)
+        ''', ((base + i + 1, data, 2000 * itens_por_venda,
+               ("dinheiro", "cartao", "pix")[i % 3])
+              for i, data in enumerate(datas)))
+        conn.executemany('''
+            INSERT INTO itens_vendidos
+            (venda_id, produto_codigo, nome, preco_unitario, quantidade, subtotal)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', ((base + i + 1, f"P{(i + j) % 100:06d}", f"Produto {(i + j) % 100}",
+               2000, 1, 2000)
+              for i in range(vendas) for j in range(itens_por_venda)))
+        migracoes.reconstruir_resumos(conn)
+    return datas
+
+
+def cronometrar(funcao, repeticoes):
+    """Executa `funcao` `repeticoes` vezes; retorna µs por chamada"""
+    inicio = time.perf_counter()
+    for i in range(repeticoes):
+        funcao(i)
+    return (time.perf_counter() - inicio) / repeticoes * 1e6
+
+
+# ==============================================================
+# BENCHMARKS
+# ==============================================================
+
+
+def bench_conexoes(args):
+    """Latência por chamada: conexão por chamada x conexão reaproveitada"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = usar_banco_temporario(tmp)
+        popular_produtos(100)
+
+        def antes(i):
+            # Padrão antigo: abre, consulta e fecha a cada chamada
+            conn = sqlite3.connect(db_path)
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM produtos WHERE codigo = ?',
+                           (f"P{i % 100:06d}",))
+            cursor.fetchone()
+            conn.close()
+
+        def depois(i):
+            database.buscar_produto_db(f"P{i % 100:06d}")
+
+        us_antes = cronometrar(antes, args.chamadas)
+        us_depois = cronometrar(depois, args.chamadas)
+        database.gerenciador.fechar_todas()
+
+    print(f"buscar_produto_db ({args.chamadas} chamadas)")
+    print(f"  conexão por chamada : {us_antes:8.1f} µs/chamada")
+    print(f"  conexão reaproveitada: {us_depois:8.1f} µs/chamada")
+    print(f"  ganho               : {us_antes / us_depois:8.1f}x")
+
+
+def bench_perfis(args):
+    """Vendas por segundo em cada perfil de PRAGMAs (seguro x rápido)"""
+    print(f"registrar_venda_db ({args.vendas} vendas de 3 itens)")
+    for perfil in PERFIS:
+        with tempfile.TemporaryDirectory() as tmp:
+            usar_banco_temporario(tmp, perfil)
+            popular_produtos(100)
+
+            inicio = time.perf_counter()
+            for i in range(args.vendas):
+                database.registrar_venda_db(*venda_sintetica(i))
+            segundos = time.perf_counter() - inicio
+            database.gerenciador.fechar_todas()
+
+        print(f"  {perfil:<7}: {args.vendas / segundos:8.0f} vendas/s")
+
+
+def bench_datas(args):
+    """Relatório por data: DATE(data_venda) = ? x intervalo semiaberto x resumo diário"""
+    import relatorio
+
+    with tempfile.TemporaryDirectory() as tmp:
+        usar_banco_temporario(tmp)
+        popular_produtos(100)
+        inicio = time.perf_counter()
+        datas = popular_historico(args.vendas)
+        print(f"{args.vendas} vendas geradas em {time.perf_counter() - inicio:.1f} s")
+
+        dias = sorted({data[:10] for data in datas})
+        amostra = [dias[i * len(dias) // 20] for i in range(20)]
+        conn = database.gerenciador.obter()
+
+        def por_date(i):
+            conn.execute('''
+                SELECT iv.nome, SUM(iv.quantidade)
+                FROM itens_vendidos iv
+                JOIN vendas v ON iv.venda_id = v.id
+                WHERE DATE(v.data_venda) = ?
+                GROUP BY iv.produto_codigo, iv.nome
+                ORDER BY SUM(iv.quantidade) DESC
+            ''', (amostra[i % len(amostra)],)).fetchall()
+
+        def por_intervalo(i):
+            dia = date.fromisoformat(amostra[i % len(amostra)])
+            conn.execute('''
+                SELECT iv.nome, SUM(iv.quantidade)
+                FROM itens_vendidos iv
+                JOIN vendas v ON iv.venda_id = v.id
+                WHERE v.data_venda >= ? AND v.data_venda < ?
+                GROUP BY iv.produto_codigo, iv.nome
+                ORDER BY SUM(iv.quantidade) DESC
+            ''', (dia.isoformat(), (dia + timedelta(days=1)).isoformat())).fetchall()
+
+        def por_resumo(i):
+            # sem_cache: mede a leitura da tabela de resumo, não o cache
+            relatorio.obter_vendas_por_dia.sem_cache(amostra[i % len(amostra)])
+
+        ms_date = cronometrar(por_date, len(amostra)) / 1000
+        ms_intervalo = cronometrar(por_intervalo, len(amostra)) / 1000
+        ms_resumo = cronometrar(por_resumo, len(amostra)) / 1000
+        database.gerenciador.fechar_todas()
+
+    print("Produtos vendidos no dia (média de 20 datas)")
+    print(f"  DATE(data_venda) = ?        : {ms_date:9.2f} ms")
+    print(f"  intervalo semiaberto        : {ms_intervalo:9.2f} ms")
+    print(f"  produto_vendas_diarias      : {ms_resumo:9.2f} ms")
+
+
+def bench_lote(args):
+    """Itens/s: INSERT por item x executemany x registrar_vendas_lote"""
+    vendas = [venda_sintetica(i, args.itens) for i in range(args.vendas)]
+    total_itens = args.vendas * args.itens
+
+    def por_item(registros):
+        # Padrão antigo: um cursor.execute por item do carrinho
+        for venda, itens in registros:
+            with database.transacao(imediata=True) as conn:
+                cursor = conn.cursor()
+                data_venda = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                cursor.execute('''
+                    INSERT INTO vendas (data_venda, total, forma_pagamento)
+                    VALUES (?, ?, ?)
+                ''', (data_venda, venda['total'], venda['forma_pagamento']))
+                venda_id = cursor.lastrowid
+                for item in itens:
+                    cursor.execute('''
+                        INSERT INTO itens_vendidos
+                        (venda_id, produto_codigo, nome, preco_unitario,
+                         quantidade, subtotal)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    ''', (venda_id, item['codigo'], item['nome'],
+                          item['preco'], item['quantidade'], item['subtotal']))
+                # Os resumos diários também, como em gravar_venda: a
+                # comparação fica só entre execute e executemany
+                database.acumular_resumos(cursor, data_venda[:10], venda, itens)
+
+    def por_venda(registros):
+        for venda, itens in registros:
+            with database.transacao(imediata=True) as conn:
+                database.gravar_venda(conn.cursor(), venda, itens,
+                                      baixar_estoque=False)
+
+    def em_lote(registros):
+        database.registrar_vendas_lote(registros, baixar_estoque=False)
+
+    print(f"{args.vendas} vendas de {args.itens} itens (sem baixa de estoque)")
+    for rotulo, funcao in [("execute por item     ", por_item),
+                           ("executemany por venda", por_venda),
+                           ("registrar_vendas_lote", em_lote)]:
+        with tempfile.TemporaryDirectory() as tmp:
+            usar_banco_temporario(tmp)
+            inicio = time.perf_counter()
+            funcao(vendas)
+            segundos = time.perf_counter() - inicio
+            database.gerenciador.fechar_todas()
+        print(f"  {rotulo}: {total_itens / segundos:10.0f} itens/s")
+
+
+NOMES_PRODUTO = ["Caneca", "Almofada", "Vela Aromática", "Luminária",
+                 "Porta-retrato", "Pelúcia", "Chaveiro", "Caderno",
+                 "Quadro Decorativo", "Toalha Bordada"]
+CORES_PRODUTO = ["Azul", "Rosa", "Branca", "Dourada", "Verde", "Lilás"]
+BUSCAS = ["caneca", "luminaria azul", "vela arom", "porta-ret",
+          "pelucia lilas", "P0123", "quadro dec dourada", "inexistente"]
+
+
+def popular_catalogo(quantidade):
+    """Cadastra `quantidade` produtos com nomes variados (para buscas)"""
+    inicio = time.perf_counter()
+    with database.transacao() as conn:
+        conn.executemany('''
+            INSERT INTO produtos (codigo, nome, preco, quantidade,
+                                  categoria, descricao, data_cadastro)
+            VALUES (?, ?, ?, 10, ?, '', '2024-01-01 00:00:00')
+        ''', ((f"P{i:06d}",
+               f"{NOMES_PRODUTO[i % 10]} {CORES_PRODUTO[i // 10 % 6]} {i}",
+               1000 + i % 50 * 100, ("decoracao", "papelaria")[i % 2])
+              for i in range(quantidade)))
+    database.catalogo.invalidar()
+    print(f"{quantidade} produtos cadastrados em "
+          f"{time.perf_counter() - inicio:.1f} s")
+
+
+def percentis(amostras_ms):
+    """Texto com p50/p95/máximo de uma lista de tempos em ms"""
+    ordenadas = sorted(amostras_ms)
+    p50 = ordenadas[len(ordenadas) // 2]
+    p95 = ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * 0.95))]
+    return f"p50 {p50:6.2f} ms  p95 {p95:6.2f} ms  máx {ordenadas[-1]:6.2f} ms"
+
+
+def bench_busca(args):
+    """Busca de produtos: LIKE '%x%' x índice FTS5 por prefixo (com limite)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        usar_banco_temporario(tmp)
+        popular_catalogo(args.produtos)
+        conn = database.gerenciador.obter()
+
+        def antes(i):
+            filtro = BUSCAS[i % len(BUSCAS)]
+            return conn.execute('''
+                SELECT * FROM produtos
+                WHERE codigo LIKE ? OR nome LIKE ?
+                ORDER BY nome
+            ''', (f'%{filtro}%', f'%{filtro}%')).fetchall()
+
+        def depois(i):
+            return database.buscar_produtos_db(
+                BUSCAS[i % len(BUSCAS)], limite=args.limite)
+
+        print(f"{'busca':<20} {'LIKE':>14} {'FTS5':>14}")
+        for i, filtro in enumerate(BUSCAS):
+            resultados = (len(antes(i)), len(depois(i)))
+            ms = (cronometrar(lambda _: antes(i), 5) / 1000,
+                  cronometrar(lambda _: depois(i), 5) / 1000)
+            print(f"{filtro:<20} {ms[0]:7.1f} ms {resultados[0]:>4} "
+                  f"{ms[1]:7.1f} ms {resultados[1]:>4}")
+        database.gerenciador.fechar_todas()
+
+
+def bench_sugestoes(args):
+    """Seletor de produto: latência por tecla de sugerir_produtos_db"""
+    with tempfile.TemporaryDirectory() as tmp:
+        usar_banco_temporario(tmp)
+        popular_catalogo(args.produtos)
+        database.catalogo.listar()  # Carga do cache fora da medição
+
+        # Cada busca é digitada letra a letra; cada prefixo é uma consulta
+        amostras = []
+        for busca in BUSCAS:
+            for fim in range(1, len(busca) + 1):
+                inicio = time.perf_counter()
+                database.sugerir_produtos_db(busca[:fim], args.limite)
+                amostras.append((time.perf_counter() - inicio) * 1000)
+        print(f"{len(amostras)} consultas (top {args.limite})")
+        print(f"  {percentis(amostras)}")
+        database.gerenciador.fechar_todas()
+
+
+def bench_pipeline(args):
+    """Pipeline de busca: digitação simulada com debounce, LRU e percentis"""
+    import asyncio
+    from busca import PipelineBusca
+
+    with tempfile.TemporaryDirectory() as tmp:
+        usar_banco_temporario(tmp)
+        popular_catalogo(args.produtos)
+        database.catalogo.listar()
+
+        entregues = []
+        pipeline = PipelineBusca(
+            lambda texto: database.buscar_produtos_db(texto, limite=50),
+            lambda texto, resultados: entregues.append(texto),
+            versao=lambda: database.catalogo.versao)
+
+        async def digitar_tudo():
+            teclas = 0
+            # Duas passadas: a segunda é servida pelo LRU
+            for _ in range(2):
+                for busca in BUSCAS:
+                    for fim in range(1, len(busca) + 1):
+                        await pipeline.digitar(busca[:fim])
+                        teclas += 1
+                        await asyncio.sleep(args.intervalo / 1000)
+                    await asyncio.sleep(pipeline.espera + 0.3)
+            return teclas
+
+        teclas = asyncio.run(digitar_tudo())
+        e = pipeline.estatisticas()
+        print(f"{teclas} teclas a cada {args.intervalo} ms "
+              f"(debounce {pipeline.espera * 1000:.0f} ms)")
+        print(f"  buscas entregues: {e['buscas']} ({e['acertos_cache']} do LRU), "
+              f"canceladas: {e['canceladas']}")
+        print(f"  latência: p50 {e['p50_ms']:.2f} ms  p95 {e['p95_ms']:.2f} ms  "
+              f"p99 {e['p99_ms']:.2f} ms")
+        database.gerenciador.fechar_todas()
+
+
+def bench_scanner(args):
+    """Leitura no scanner: catálogo + reserva em memória x consulta + UPDATE"""
+    from reservas import ReservasEstoque
+
+    with tempfile.TemporaryDirectory() as tmp:
+        usar_banco_temporario(tmp)
+        popular_catalogo(args.produtos)
+        database.catalogo.listar()
+        rnd = random.Random(15)
+        # Poucos códigos repetidos, como numa venda real de balcão
+        codigos = [f"P{rnd.randrange(args.produtos):06d}" for _ in range(20)]
+        livro = ReservasEstoque()
+        carrinho = {}
+
+        def antes(i):
+            # Padrão antigo: SELECT do produto + UPDATE do estoque a cada item
+            codigo = codigos[i % len(codigos)]
+            with database.transacao() as conn:
+                conn.execute('SELECT * FROM produtos WHERE codigo = ?',
+                             (codigo,)).fetchone()
+                conn.execute('UPDATE produtos SET quantidade = quantidade - 1 '
+                             'WHERE codigo = ?', (codigo,))
+
+        def depois(i):
+            codigo = codigos[i % len(codigos)]
+            produto = database.buscar_produto_db(codigo)
+            quantidade = carrinho.get(codigo, 0) + 1
+            if livro.reservar("caixa", codigo, quantidade, produto[3]):
+                carrinho[codigo] = quantidade
+
+        print(f"{args.leituras} leituras de {len(codigos)} códigos")
+        print(f"  SELECT + UPDATE   : {cronometrar(antes, args.leituras):8.2f} µs")
+        print(f"  catálogo + reserva: {cronometrar(depois, args.leituras):8.2f} µs")
+        database.gerenciador.fechar_todas()
+
+
+def conferir_carrinho(operacoes, preco):
+    """Confere o Carrinho contra um modelo simples (dict recalculado).
+
+    Depois de cada operação compara total, quantidade_itens, len,
+    quantidade_de, o item devolvido por remover e itens_venda; no meio
+    da sequência limpa o carrinho e recomeça. Retorna a lista de erros.
+    """
+    from carrinho import Carrinho
+
+    carrinho = Carrinho()
+    modelo = {}     # codigo -> quantidade, na ordem de inclusão
+    erros = []
+
+    def conferir(passo, codigo):
+        esperado_total = sum(preco(c) * q for c, q in modelo.items())
+        esperadas = [{'codigo': c, 'nome': c, 'preco': preco(c), 'quantidade': q,
+                      'subtotal': preco(c) * q} for c, q in modelo.items()]
+        verificacoes = [
+            ("total", carrinho.total, esperado_total),
+            ("quantidade_itens", carrinho.quantidade_itens, sum(modelo.values())),
+            ("len", len(carrinho), len(modelo)),
+            ("bool", bool(carrinho), bool(modelo)),
+            (f"quantidade_de({codigo})", carrinho.quantidade_de(codigo),
+             modelo.get(codigo, 0)),
+            (f"{codigo} in carrinho", codigo in carrinho, codigo in modelo),
+        ]
+        # itens_venda monta a lista inteira: confere de tempos em tempos
+        if passo % 50 == 0 or not modelo:
+            verificacoes.append(("itens_venda", carrinho.itens_venda(), esperadas))
+        for nome, obtido, esperado in verificacoes:
+            if obtido != esperado:
+                erros.append(f"passo {passo}: {nome} = {obtido!r}, esperado {esperado!r}")
+
+    metade = len(operacoes) // 2
+    for passo, (op, codigo, quantidade) in enumerate(operacoes):
+        if passo == metade:
+            carrinho.limpar()
+            modelo.clear()
+            conferir(passo, codigo)
+        if op == "+":
+            item = carrinho.adicionar(codigo, codigo, preco(codigo), quantidade)
+            modelo[codigo] = modelo.get(codigo, 0) + quantidade
+            if item.quantidade != modelo[codigo]:
+                erros.append(f"passo {passo}: adicionar({codigo}) devolveu "
+                             f"quantidade {item.quantidade}")
+        else:
+            item = carrinho.remover(codigo)
+            removida = modelo.pop(codigo, None)
+            obtida = item.quantidade if item is not None else None
+            if obtida != removida:
+                erros.append(f"passo {passo}: remover({codigo}) devolveu "
+                             f"quantidade {obtida!r}, esperado {removida!r}")
+        conferir(passo, codigo)
+
+    # Remover o que não existe não mexe em nada
+    total = carrinho.total
+    if carrinho.remover("INEXISTENTE") is not None or carrinho.total != total:
+        erros.append("remover de código ausente alterou o carrinho")
+    return erros
+
+
+def bench_carrinho(args):
+    """Carrinho grande: lista de dicts + sum() x Carrinho com total incremental"""
+    from carrinho import Carrinho
+
+    rnd = random.Random(16)
+    # Atacado: `linhas` produtos distintos, cada um lido várias vezes,
+    # e depois metade das linhas removidas
+    operacoes = [("+", f"P{rnd.randrange(args.linhas):06d}", rnd.randrange(1, 5))
+                 for _ in range(args.linhas * 4)]
+    operacoes += [("-", f"P{i:06d}", 0) for i in range(0, args.linhas, 2)]
+    # Para a conferência: remoções no meio das inclusões (inclusive de
+    # códigos ausentes) e reinclusão de códigos já removidos
+    misturadas = [(rnd.choice("++-"), f"P{rnd.randrange(args.linhas // 10 + 1):06d}",
+                   rnd.randrange(1, 5)) for _ in range(args.linhas * 2)]
+
+    def preco(codigo):
+        return 1000 + int(codigo[1:]) % 50 * 100
+
+    def com_lista():
+        carrinho, totais = [], []
+        for op, codigo, quantidade in operacoes:
+            item = next((i for i in carrinho if i['codigo'] == codigo), None)
+            if op == "+":
+                if item:
+                    item['quantidade'] += quantidade
+                    item['subtotal'] = item['preco'] * item['quantidade']
+                else:
+                    carrinho.append({'codigo': codigo, 'preco': preco(codigo),
+                                     'quantidade': quantidade,
+                                     'subtotal': preco(codigo) * quantidade})
+            elif item:
+                carrinho.remove(item)
+            # Cada atualização da tela recalculava o total
+            totais.append(sum(i['subtotal'] for i in carrinho))
+        return totais
+
+    def com_carrinho():
+        carrinho, totais = Carrinho(), []
+        for op, codigo, quantidade in operacoes:
+            if op == "+":
+                carrinho.adicionar(codigo, codigo, preco(codigo), quantidade)
+            else:
+                carrinho.remover(codigo)
+            totais.append(carrinho.total)
+        return totais
+
+    resultados = []
+    print(f"{len(operacoes)} operações, até {args.linhas} linhas")
+    for rotulo, funcao in [("lista + sum()", com_lista),
+                           ("Carrinho     ", com_carrinho)]:
+        inicio = time.perf_counter()
+        resultados.append(funcao())
+        segundos = time.perf_counter() - inicio
+        print(f"  {rotulo}: {segundos * 1e6 / len(operacoes):8.2f} µs/operação")
+
+    erros = conferir_carrinho(operacoes + misturadas, preco)
+    if resultados[0] != resultados[1]:
+        erros.insert(0, "Totais divergentes entre as duas implementações")
+    if erros:
+        print(f"Carrinho inconsistente ({len(erros)} erros):")
+        for erro in erros[:10]:
+            print(f"  {erro}")
+        sys.exit(1)
+    print("Conferência do Carrinho: total, quantidades, remover, limpar e itens_venda ok")
+
+
+def bench_catalogo(args):
+    """Leituras de produtos: SELECT no banco x cache do catálogo"""
+    with tempfile.TemporaryDirectory() as tmp:
+        usar_banco_temporario(tmp)
+        with database.transacao():
+            popular_produtos(args.produtos)
+        database.catalogo.invalidar()
+        conn = database.gerenciador.obter()
+        codigos = [f"P{i:06d}" for i in range(0, args.produtos, 7)]
+
+        def produto_banco(i):
+            conn.execute('SELECT * FROM produtos WHERE codigo = ?',
+                         (codigos[i % len(codigos)],)).fetchone()
+
+        def produto_cache(i):
+            database.buscar_produto_db(codigos[i % len(codigos)])
+
+        def lista_banco(i):
+            conn.execute('SELECT * FROM produtos ORDER BY nome').fetchall()
+
+        def lista_cache(i):
+            database.buscar_produtos_db()
+
+        print(f"{args.produtos} produtos")
+        print(f"  buscar_produto_db  banco: {cronometrar(produto_banco, 20000):9.2f} µs"
+              f"   cache: {cronometrar(produto_cache, 20000):9.2f} µs")
+        print(f"  listagem completa  banco: {cronometrar(lista_banco, 20) / 1000:9.2f} ms"
+              f"   cache: {cronometrar(lista_cache, 20) / 1000:9.2f} ms")
+        print(f"  {database.catalogo.estatisticas()}")
+        database.gerenciador.fechar_todas()
+
+
+def conexao_flet_medida():
+    """Conexão do Flet sem socket que conta o que seria enviado ao cliente.
+
+    Processa os comandos como FletSocketServer.send_commands e, no lugar
+    de enviar, soma as mensagens e os bytes do JSON que iria pelo socket.
+    """
+    import json
+    from flet.core.local_connection import LocalConnection
+    from flet.core.protocol import (ClientActions, ClientMessage, CommandEncoder,
+                                    PageCommandsBatchResponsePayload)
+
+    class ConexaoMedida(LocalConnection):
+        def __init__(self):
+            super().__init__()
+            self.mensagens = 0
+            self.bytes = 0
+
+        def send_commands(self, session_id, commands):
+            resultados = []
+            mensagens = []
+            for comando in commands:
+                resultado, mensagem = self._process_command(comando)
+                if comando.name in ["add", "get"]:
+                    resultados.append(resultado)
+                if mensagem:
+                    mensagens.append(mensagem)
+            if mensagens:
+                self.mensagens += 1
+                self.bytes += len(json.dumps(
+                    ClientMessage(ClientActions.PAGE_CONTROLS_BATCH, mensagens),
+                    cls=CommandEncoder, separators=(",", ":")).encode("utf-8"))
+            return PageCommandsBatchResponsePayload(results=resultados, error="")
+
+    return ConexaoMedida()
+
+
+def bench_tabela(args):
+    """Bytes por venda enviados à tela: tabela inteira x só as células alteradas"""
+    import flet as ft
+    from tabela_produtos import TabelaProdutos
+
+    with tempfile.TemporaryDirectory() as tmp:
+        usar_banco_temporario(tmp)
+        with database.transacao():
+            popular_produtos(1000)
+        database.catalogo.invalidar()
+
+        conexao = conexao_flet_medida()
+        loop = asyncio.new_event_loop()
+        page = ft.Page(conexao, "benchmark", loop=loop)
+        tabela = TabelaProdutos(page, ao_selecionar=lambda cod: None,
+                                ao_visualizar=lambda cod: None,
+                                ao_excluir=lambda cod: None)
+        page.add(tabela.controle)
+        tabela.atualizar(forcar=True)
+        visiveis = list(tabela.linhas)
+
+        def vender(i):
+            """Uma venda de `args.itens` produtos da página exibida"""
+            itens = []
+            for j in range(args.itens):
+                produto = database.buscar_produto_db(
+                    visiveis[(i * args.itens + j) % len(visiveis)])
+                itens.append({'codigo': produto[0], 'nome': produto[1],
+                              'preco': produto[2], 'quantidade': 1,
+                              'subtotal': produto[2]})
+            database.registrar_venda_db(
+                {'total': sum(item['subtotal'] for item in itens),
+                 'forma_pagamento': "dinheiro"}, itens)
+
+        def medir(forcar):
+            conexao.mensagens = conexao.bytes = 0
+            for i in range(args.vendas):
+                vender(i)
+                tabela.atualizar(forcar=forcar)
+            return conexao.bytes / args.vendas, conexao.mensagens / args.vendas
+
+        # forcar=True é o caminho antigo: linhas recriadas + page.update()
+        bytes_tabela, mensagens_tabela = medir(forcar=True)
+        bytes_linhas, mensagens_linhas = medir(forcar=False)
+        loop.close()
+        database.gerenciador.fechar_todas()
+
+    print(f"Tabela de produtos: {tabela.por_pagina} linhas por página, "
+          f"vendas de {args.itens} itens ({args.vendas} vendas)")
+    print(f"  tabela inteira (page.update) : {bytes_tabela:9.0f} bytes/venda "
+          f"em {mensagens_tabela:.1f} mensagens")
+    print(f"  só células alteradas         : {bytes_linhas:9.0f} bytes/venda "
+          f"em {mensagens_linhas:.1f} mensagens")
+
+
+# Tabelas que cada consulta pode ler por inteiro (agregados sobre todo o
+# histórico); qualquer outro "SCAN <tabela>" sem índice é regressão
+CONSULTAS_PLANO = [
+    ("obter_venda", lambda r: database.obter_venda(1), ()),
+    ("obter_itens_venda", lambda r: database.obter_itens_venda(1), ()),
+    ("carregar_catalogo", lambda r: database.carregar_catalogo(), ("produtos",)),
+    ("buscar_produtos_db",
+     lambda r: database.buscar_produtos_db("produto 1", limite=50), ("f",)),
+    ("pagina_produtos (nome)",
+     lambda r: database.buscar_produtos_db(
+         limite=50, apos=("P000010", "Produto 10"), ordem='nome'), ()),
+    ("pagina_produtos (quantidade)",
+     lambda r: database.buscar_produtos_db(
+         limite=50, apos=("P000010", "Produto 10", 0, 5), ordem='quantidade'), ()),
+    ("pagina_produtos (filtro)",
+     lambda r: database.buscar_produtos_db(
+         "produto", limite=50, apos=("P000010", "Produto 10"), ordem='nome'), ()),
+    ("obter_detalhes_cartao", lambda r: r.obter_detalhes_cartao(), ()),
+    ("obter_vendas_por_dia",
+     lambda r: r.obter_vendas_por_dia(date.today().isoformat()), ()),
+    ("obter_formas_pagamento", lambda r: r.obter_formas_pagamento(),
+     ("vendas_diarias_pagamento",)),
+    ("obter_resumo_vendas", lambda r: r.obter_resumo_vendas(), ("vendas_diarias",)),
+    ("obter_evolucao_vendas", lambda r: r.obter_evolucao_vendas(), ("vendas_diarias",)),
+    ("obter_evolucao_por_pagamento",
+     lambda r: r.obter_evolucao_por_pagamento(), ("vendas_diarias_pagamento",)),
+    ("obter_produtos_mais_vendidos",
+     lambda r: r.obter_produtos_mais_vendidos(), ("produto_vendas_diarias",)),
+    ("obter_dados_estoque", lambda r: r.obter_dados_estoque(), ("produtos",)),
+]
+
+
+def capturar_sql(funcao):
+    """Executa `funcao` e retorna os SQLs (com parâmetros) que ela rodou"""
+    conn = database.gerenciador.obter()
+    comandos = []
+    conn.set_trace_callback(comandos.append)
+    try:
+        funcao()
+    finally:
+        conn.set_trace_callback(None)
+    return [sql for sql in comandos if sql.lstrip().upper().startswith("SELECT")]
+
+
+def bench_planos(args):
+    """EXPLAIN QUERY PLAN das consultas: falha se houver varredura de tabela"""
+    import relatorio
+
+    falhas = []
+    with tempfile.TemporaryDirectory() as tmp:
+        usar_banco_temporario(tmp)
+        popular_produtos(100)
+        for i in range(50):
+            venda, itens = venda_sintetica(i)
+            cartao = {'nome_cliente': "Cliente", 'tipo_cartao': "credito",
+                      'parcelas': 1} if venda['forma_pagamento'] == "cartao" else None
+            database.registrar_venda_db(venda, itens, cartao)
+
+        conn = database.gerenciador.obter()
+        for nome, chamada, permitidas in CONSULTAS_PLANO:
+            relatorio.cache.invalidar()  # Um acerto não rodaria SQL nenhum
+            for sql in capturar_sql(lambda: chamada(relatorio)):
+                plano = [linha[3] for linha in
+                         conn.execute("EXPLAIN QUERY PLAN " + sql)]
+                # "SCAN f VIRTUAL TABLE INDEX ..." é a consulta ao índice FTS5
+                varreduras = [
+                    passo for passo in plano
+                    if passo.startswith("SCAN ") and " USING " not in passo
+                    and " VIRTUAL TABLE " not in passo
+                    and passo.split()[1] not in permitidas
+                ]
+                status = "FALHA" if varreduras else "ok"
+                print(f"  [{status:>5}] {nome}: {' | '.join(plano)}")
+                if varreduras:
+                    falhas.append(nome)
+        database.gerenciador.fechar_todas()
+
+    if falhas:
+        print(f"Consultas com varredura de tabela: {', '.join(falhas)}")
+        sys.exit(1)
+
+
+def preco_em_texto(valor_centavos, estilo):
+    """Escreve um preço em reais do jeito que chega da interface"""
+    reais, resto = divmod(valor_centavos, 100)
+    if estilo == 0:
+        return f"{reais},{resto:02d}"                   # 12,34
+    if estilo == 1:
+        return f"{reais}.{resto:02d}"                   # 12.34
+    if estilo == 2:
+        return f"R$ {reais:,}".replace(",", ".") + f",{resto:02d}"  # R$ 1.234,56
+    return f"{reais}.{resto:02d}".rstrip("0").rstrip(".")  # 12.3 / 12
+
+
+def bench_centavos(args):
+    """Concilia ao centavo vendas gravadas pelo caminho real (texto -> centavos ->
+    Carrinho -> registrar_vendas_lote) com a soma exata"""
+    import relatorio
+    from carrinho import Carrinho
+    from dinheiro import centavos
+
+    rnd = random.Random(8)
+    esperado = 0        # Soma exata, em int, dos preços sorteados
+    em_float = 0.0      # O que o esquema antigo acumulava: reais em float
+    precos_errados = 0
+    lote = []
+    inicio = time.perf_counter()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        usar_banco_temporario(tmp)
+        popular_produtos(100)
+        for i in range(args.vendas):
+            carrinho = Carrinho()
+            precos = {}     # Código repetido na venda soma no preço da linha
+            for _ in range(rnd.randrange(1, 5)):
+                codigo = f"P{rnd.randrange(100):06d}"
+                preco_real = precos.setdefault(codigo, rnd.randrange(1, 500_000))
+                quantidade = rnd.randrange(1, 4)
+                texto = preco_em_texto(preco_real, rnd.randrange(4))
+                preco = centavos(texto)
+                precos_errados += preco != preco_real
+                carrinho.adicionar(codigo, codigo, preco, quantidade)
+                esperado += preco_real * quantidade
+                em_float += preco_real / 100 * quantidade
+            venda = {
+                'data_venda': f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d} 12:00:00",
+                'total': carrinho.total,
+                'forma_pagamento': ("dinheiro", "cartao", "pix")[i % 3],
+            }
+            lote.append((venda, carrinho.itens_venda()))
+            if len(lote) == 5000:
+                database.registrar_vendas_lote(lote, baixar_estoque=False)
+                lote = []
+        if lote:
+            database.registrar_vendas_lote(lote, baixar_estoque=False)
+        segundos = time.perf_counter() - inicio
+
+        conn = database.gerenciador.obter()
+        soma_vendas, qtd_vendas = conn.execute(
+            "SELECT SUM(total), COUNT(*) FROM vendas").fetchone()
+        soma_itens = conn.execute(
+            "SELECT SUM(subtotal) FROM itens_vendidos").fetchone()[0]
+        relatorio.cache.invalidar()
+        total, qtd, _ = relatorio.obter_resumo_vendas()
+        database.gerenciador.fechar_todas()
+
+    print(f"{args.vendas} vendas aleatórias gravadas em {segundos:.1f} s")
+    print(f"  soma exata (centavos)   : {esperado}")
+    print(f"  SUM(vendas.total)       : {soma_vendas} ({qtd_vendas} vendas)")
+    print(f"  SUM(itens.subtotal)     : {soma_itens}")
+    print(f"  obter_resumo_vendas     : {total} ({qtd} vendas)")
+    print(f"  soma em float (reais)   : {em_float!r} "
+          f"(desvio de {em_float * 100 - esperado:+.6f} centavos)")
+    problemas = []
+    if precos_errados:
+        problemas.append(f"{precos_errados} preços convertidos errado por centavos()")
+    if not soma_vendas == soma_itens == total == esperado:
+        problemas.append("somas divergentes da soma exata")
+    if not qtd_vendas == qtd == args.vendas:
+        problemas.append("quantidade de vendas divergente")
+    if problemas:
+        print("Conciliação falhou: " + "; ".join(problemas))
+        sys.exit(1)
+
+
+# Consultas do dashboard antes dos resumos diários, direto nas tabelas
+# de vendas: servem de referência para conferir as novas
+CONSULTAS_BRUTAS = {
+    'obter_resumo_vendas': '''
+        SELECT SUM(total), COUNT(*) FROM vendas''',
+    'obter_formas_pagamento': '''
+        SELECT forma_pagamento, COUNT(*) FROM vendas
+        GROUP BY forma_pagamento ORDER BY forma_pagamento''',
+    'obter_evolucao_vendas': '''
+        SELECT DATE(data_venda), SUM(total) FROM vendas
+        GROUP BY DATE(data_venda) ORDER BY 1''',
+    'obter_evolucao_por_pagamento': '''
+        SELECT DATE(data_venda), forma_pagamento, SUM(total) FROM vendas
+        GROUP BY DATE(data_venda), forma_pagamento ORDER BY 1, 2''',
+    'obter_produtos_mais_vendidos': '''
+        SELECT nome, SUM(quantidade) FROM itens_vendidos
+        GROUP BY produto_codigo, nome ORDER BY 2 DESC, 1''',
+}
+
+
+def bench_resumos(args):
+    """Dashboard: consultas nos resumos diários x varredura das vendas"""
+    import relatorio
+
+    def novas():
+        # sem_cache: mede as consultas, não o cache de relatórios
+        total, qtd, _ = relatorio.obter_resumo_vendas.sem_cache()
+        evolucao, _ = relatorio.obter_evolucao_por_pagamento.sem_cache()
+        return {
+            'obter_resumo_vendas': [(total, qtd)],
+            'obter_formas_pagamento': sorted(
+                relatorio.obter_formas_pagamento.sem_cache()),
+            'obter_evolucao_vendas': relatorio.obter_evolucao_vendas.sem_cache(),
+            'obter_evolucao_por_pagamento': [
+                (dia, forma, valor) for dia, formas in evolucao
+                for forma, valor in sorted(formas.items())],
+            'obter_produtos_mais_vendidos': sorted(
+                relatorio.obter_produtos_mais_vendidos.sem_cache(),
+                key=lambda linha: (-linha[1], linha[0])),
+        }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        usar_banco_temporario(tmp)
+        popular_produtos(100)
+        popular_historico(args.vendas)
+        # Algumas vendas pelo caminho normal, que acumula os resumos
+        for i in range(200):
+            database.registrar_venda_db(*venda_sintetica(i))
+
+        conn = database.gerenciador.obter()
+        esperado = {nome: [tuple(linha) for linha in conn.execute(sql)]
+                    for nome, sql in CONSULTAS_BRUTAS.items()}
+        obtido = {nome: [tuple(linha) for linha in linhas]
+                  for nome, linhas in novas().items()}
+        divergentes = [nome for nome in CONSULTAS_BRUTAS
+                       if esperado[nome] != obtido[nome]]
+
+        def antes(i):
+            for sql in CONSULTAS_BRUTAS.values():
+                conn.execute(sql).fetchall()
+
+        ms_antes = cronometrar(antes, 5) / 1000
+        ms_depois = cronometrar(lambda i: novas(), 5) / 1000
+        database.gerenciador.fechar_todas()
+
+    print(f"Dashboard completo ({args.vendas + 200} vendas)")
+    print(f"  varrendo as vendas : {ms_antes:9.2f} ms")
+    print(f"  resumos diários    : {ms_depois:9.2f} ms")
+    if divergentes:
+        print(f"Resumos divergentes das vendas: {', '.join(divergentes)}")
+        sys.exit(1)
+
+
+def bench_relatorios(args):
+    """Dashboard com e sem o cache de relatórios; confere a invalidação"""
+    import relatorio
+
+    ontem = (date.today() - timedelta(days=1)).isoformat()
+
+    def dashboard(i):
+        relatorio.obter_resumo_vendas()
+        relatorio.obter_formas_pagamento()
+        relatorio.obter_evolucao_por_pagamento()
+        relatorio.obter_produtos_mais_vendidos()
+        relatorio.obter_detalhes_cartao()
+        relatorio.obter_dados_estoque()
+        relatorio.obter_vendas_por_dia(ontem)
+
+    def vendidos_ontem():
+        return sum(qtd for _, qtd in relatorio.obter_vendas_por_dia(ontem))
+
+    erros = []
+    with tempfile.TemporaryDirectory() as tmp:
+        usar_banco_temporario(tmp)
+        popular_produtos(100)
+        popular_historico(args.vendas)
+
+        def sem_cache(i):
+            relatorio.cache.invalidar()
+            dashboard(i)
+
+        ms_sem = cronometrar(sem_cache, 5) / 1000
+        ms_com = cronometrar(dashboard, 50) / 1000
+
+        # Uma venda nova tem de aparecer no resumo, mas não mexe em ontem
+        _, qtd_antes, _ = relatorio.obter_resumo_vendas()
+        ontem_antes = vendidos_ontem()
+        acertos = relatorio.cache.acertos
+        database.registrar_venda_db(*venda_sintetica(0))
+        if relatorio.obter_resumo_vendas()[1] != qtd_antes + 1:
+            erros.append("resumo não viu a venda nova")
+        if vendidos_ontem() != ontem_antes or relatorio.cache.acertos != acertos + 1:
+            erros.append("dia passado saiu do cache com uma venda de hoje")
+
+        # Uma venda importada para ontem invalida os dias passados
+        venda, itens = venda_sintetica(1)
+        venda['data_venda'] = f"{ontem} 12:00:00"
+        database.registrar_vendas_lote([(venda, itens)])
+        if vendidos_ontem() != ontem_antes + sum(i['quantidade'] for i in itens):
+            erros.append("dia passado não viu a venda importada")
+
+        estatisticas = relatorio.cache.estatisticas()
+        database.gerenciador.fechar_todas()
+
+    print(f"Dashboard ({args.vendas} vendas, 7 consultas)")
+    print(f"  sem cache : {ms_sem:9.2f} ms")
+    print(f"  com cache : {ms_com:9.3f} ms")
+    print(f"  {estatisticas}")
+    if erros:
+        print(f"Invalidação incorreta: {'; '.join(erros)}")
+        sys.exit(1)
+
+
+class PaginaSemTela:
+    """O mínimo de ft.Page que o DashboardGraficos usa, sem interface"""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.atualizacoes = 0
+
+    def run_task(self, handler, *args):
+        return asyncio.run_coroutine_threadsafe(handler(*args), self.loop)
+
+    def update(self):
+        self.atualizacoes += 1
+
+
+def bench_dashboard(args):
+    """Espera do caixa por venda: dashboard síncrono x em segundo plano"""
+    import relatorio
+
+    async def medir():
+        loop = asyncio.get_running_loop()
+        pagina = PaginaSemTela(loop)
+        dashboard = relatorio.DashboardGraficos(pagina, intervalo=args.intervalo)
+
+        def vender(i, atualizar):
+            database.registrar_venda_db(*venda_sintetica(i))
+            inicio = time.perf_counter()
+            atualizar()
+            return (time.perf_counter() - inicio) * 1000
+
+        # Vendas em sequência, como chegam dos handlers (threads do Flet)
+        sincrono = [await loop.run_in_executor(
+            None, vender, i, dashboard.atualizar_tudo) for i in range(args.vendas)]
+        pagina.atualizacoes = 0
+        inicio = time.perf_counter()
+        agendado = [await loop.run_in_executor(
+            None, vender, i, dashboard.agendar_atualizacao)
+            for i in range(args.vendas)]
+        segundos = time.perf_counter() - inicio
+        await asyncio.sleep(args.intervalo + 1)  # Deixa a última terminar
+        return sincrono, agendado, segundos, pagina.atualizacoes
+
+    with tempfile.TemporaryDirectory() as tmp:
+        usar_banco_temporario(tmp)
+        popular_produtos(100)
+        popular_historico(args.historico)
+        sincrono, agendado, segundos, atualizacoes = asyncio.run(medir())
+        database.gerenciador.fechar_todas()
+
+    print(f"Espera por venda no checkout ({args.vendas} vendas, "
+          f"{args.historico} no histórico)")
+    print(f"  atualizar_tudo      : {percentis(sincrono)}")
+    print(f"  agendar_atualizacao : {percentis(agendado)}")
+    print(f"  {atualizacoes} atualizações em segundo plano em {segundos:.1f} s "
+          f"(no máximo uma a cada {args.intervalo} s)")
+
+
+def bench_logs(args):
+    """Tempo de logging.info na thread que loga: arquivo direto x fila"""
+    import logging
+    import queue
+    from logging.handlers import QueueHandler, QueueListener
+    import logs
+
+    class Arquivo(logging.FileHandler):
+        """FileHandler com `--atraso` ms por gravação (disco lento, antivírus)"""
+
+        def emit(self, registro):
+            if args.atraso:
+                time.sleep(args.atraso / 1000)
+            super().emit(registro)
+
+    def medir(logger):
+        amostras = []
+        for i in range(args.mensagens):
+            inicio = time.perf_counter()
+            logger.info("Venda registrada: ID %d", i)
+            amostras.append((time.perf_counter() - inicio) * 1000)
+        return amostras
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Antes: FileHandler na própria thread (o basicConfig antigo)
+        direto = logging.getLogger("benchmark.direto")
+        arquivo = Arquivo(os.path.join(tmp, "direto.log"))
+        arquivo.setFormatter(logging.Formatter(logs.FORMATO))
+        direto.addHandler(arquivo)
+        direto.propagate = False
+        direto.setLevel(logging.INFO)
+        tempos_direto = medir(direto)
+        arquivo.close()
+
+        # Depois: QueueHandler + QueueListener, como em logs.py
+        em_fila = logging.getLogger("benchmark.fila")
+        fila = queue.SimpleQueue()
+        destino = Arquivo(os.path.join(tmp, "fila.log"))
+        destino.setFormatter(logging.Formatter(logs.FORMATO))
+        ouvinte = QueueListener(fila, destino)
+        ouvinte.start()
+        em_fila.addHandler(QueueHandler(fila))
+        em_fila.propagate = False
+        em_fila.setLevel(logging.INFO)
+        tempos_fila = medir(em_fila)
+        ouvinte.stop()
+        destino.close()
+
+    print(f"logging.info ({args.mensagens} mensagens, "
+          f"{args.atraso} ms de atraso por gravação)")
+    print(f"  arquivo na thread : {percentis(tempos_direto)}")
+    print(f"  fila + listener   : {percentis(tempos_fila)}")
+
+
+def esvaziar_cache_do_so():
+    """Tenta tirar os arquivos do cache de disco do SO; True se conseguiu.
+
+    Só funciona no Linux como root. Nos demais casos a "abertura a frio"
+    é apenas a primeira desta medição (reinicie o PC para uma fria de fato).
+    """
+    try:
+        os.sync()
+        with open("/proc/sys/vm/drop_caches", "w") as arquivo:
+            arquivo.write("3\n")
+        return True
+    except (OSError, AttributeError):
+        return False
+
+
+def bench_inicio(args):
+    """Abertura do executável (dist/) a frio e a quente, até a primeira tela"""
+    import json
+    import statistics
+    import subprocess
+
+    if args.fonte:
+        comando = [sys.executable, "app.py"]
+    else:
+        comando = [args.executavel]
+        if not os.path.exists(args.executavel):
+            print(f"{args.executavel} não encontrado (rode `pyinstaller graca.spec`)")
+            sys.exit(1)
+
+    def abrir():
+        """(ms até o processo sair, ms até a primeira tela segundo o app)"""
+        with tempfile.TemporaryDirectory() as tmp:
+            saida = os.path.join(tmp, "perfil.json")
+            inicio = time.perf_counter()
+            subprocess.run(comando + [f"--profile-output={saida}"],
+                           timeout=120, check=True)
+            total = (time.perf_counter() - inicio) * 1000
+            with open(saida, encoding="utf-8") as arquivo:
+                return total, json.load(arquivo)['primeira_tela_ms']
+
+    esvaziado = esvaziar_cache_do_so()
+    fria = abrir()
+    quentes = [abrir() for _ in range(args.execucoes)]
+    mediana = statistics.median(total for total, _ in quentes)
+
+    print(f"{' '.join(comando)}")
+    print(f"  cache do SO esvaziado antes da fria: {'sim' if esvaziado else 'não'}")
+    print(f"  a frio            : {fria[0]:8.0f} ms  (primeira tela em {fria[1]:.0f} ms)")
+    print(f"  a quente (mediana de {args.execucoes}): {mediana:8.0f} ms  "
+          f"(primeira tela em "
+          f"{statistics.median(tela for _, tela in quentes):.0f} ms)")
+    if args.limite and mediana > args.limite:
+        print(f"Abertura a quente acima do limite de {args.limite} ms")
+        sys.exit(1)
+
+
+def comprovante_antigo(venda_id):
+    """O comprovante como app.py montava: duas consultas e concatenação"""
+    from dinheiro import formatar_reais
+
+    venda = database.obter_venda(venda_id)
+    itens = database.obter_itens_venda(venda_id)
+    if not venda:
+        return None
+    texto = "=== COMPROVANTE DE VENDA ===\n"
+    texto += "Loja: Graça Presentes\n"
+    texto += "WhatsApp: (11) 99999-9999\n"
+    texto += f"Data: {venda[1]}\n"
+    texto += f"Venda ID: #{venda[0]}\n"
+    texto += "-" * 30 + "\n"
+    for item in itens:
+        texto += f"{item[5]}x {item[3]}\n"
+        texto += f"   {formatar_reais(item[4])} -> {formatar_reais(item[6])}\n"
+    texto += "-" * 30 + "\n"
+    texto += f"TOTAL: {formatar_reais(venda[2])}\n"
+    texto += f"Forma Pagamento: {venda[3].upper()}\n"
+    texto += "\n   Obrigado pela preferência!   \n"
+    texto += "==============================\n"
+    return texto
+
+
+def bench_comprovante(args):
+    """Comprovante: duas consultas + concatenação x consulta única + template"""
+    import comprovante
+
+    with tempfile.TemporaryDirectory() as tmp:
+        usar_banco_temporario(tmp)
+        comprovante.limpar_cache()
+        popular_produtos(100)
+        ids = [database.registrar_venda_db(*venda_sintetica(i, args.itens))['venda_id']
+               for i in range(args.vendas)]
+
+        divergentes = [venda_id for venda_id in ids
+                       if comprovante.gerar_comprovante(venda_id)
+                       != comprovante_antigo(venda_id)]
+        for formato in comprovante.FORMATOS:
+            comprovante.gerar_comprovante(ids[0], formato)  # Todos renderizam
+        if comprovante.gerar_comprovante(-1) is not None:
+            divergentes.append(-1)
+
+        us_antes = cronometrar(lambda i: comprovante_antigo(ids[i]), len(ids))
+        comprovante.limpar_cache()
+        us_novo = cronometrar(
+            lambda i: comprovante.gerar_comprovante(ids[i]), len(ids))
+        us_memo = cronometrar(  # As últimas vendas, que cabem no cache
+            lambda i: comprovante.gerar_comprovante(ids[-1 - i]),
+            min(len(ids), comprovante.TAMANHO_CACHE))
+
+        # Depois da venda, os quatro botões (copiar, imprimir, QR Code,
+        # WhatsApp) pedem o comprovante da mesma venda
+        us_botoes_antes = cronometrar(
+            lambda i: [comprovante_antigo(ids[i]) for _ in range(4)], len(ids))
+        comprovante.limpar_cache()
+        us_botoes = cronometrar(
+            lambda i: [comprovante.gerar_comprovante(ids[i]) for _ in range(4)],
+            len(ids))
+        comprovante.limpar_cache()
+        database.gerenciador.fechar_todas()
+
+    print(f"Comprovante de texto ({args.vendas} vendas de {args.itens} itens)")
+    print(f"  2 consultas + concatenação : {us_antes:8.1f} µs")
+    print(f"  1 consulta + template      : {us_novo:8.1f} µs")
+    print(f"  já renderizado (cache)     : {us_memo:8.1f} µs")
+    print(f"Quatro botões por venda: {us_botoes_antes:.1f} µs -> {us_botoes:.1f} µs")
+    if divergentes:
+        print(f"Comprovantes diferentes do formato antigo: {divergentes[:10]}")
+        sys.exit(1)
+
+
+def qr_antigo(texto):
+    """O QR Code como app.py gerava: texto completo, no loop da interface"""
+    import base64
+    from io import BytesIO
+    import qrcode
+
+    qr = qrcode.QRCode(version=None, box_size=10, border=4)
+    qr.add_data(texto)
+    qr.make(fit=True)
+    img = qr.make_image(fill_color="black", back_color="white")
+    buffer = BytesIO()
+    img.save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode("utf-8"), qr.version
+
+
+def bench_qrcode(args):
+    """QR Code do comprovante: geração no loop x thread de trabalho + cache"""
+    import comprovante
+    import qr_comprovante
+
+    with tempfile.TemporaryDirectory() as tmp:
+        usar_banco_temporario(tmp)
+        comprovante.limpar_cache()
+        popular_produtos(100)
+        ids = [database.registrar_venda_db(*venda_sintetica(i, args.itens))['venda_id']
+               for i in range(args.vendas)]
+        textos = [comprovante.gerar_comprovante(venda_id) for venda_id in ids]
+        resumos = [comprovante.gerar_comprovante(venda_id, 'qr') for venda_id in ids]
+        comprovante.limpar_cache()
+        database.gerenciador.fechar_todas()
+
+    qr_antigo(textos[0])  # Importa qrcode/PIL fora da medição
+    ms_antes = cronometrar(lambda i: qr_antigo(textos[i]), len(ids)) / 1000
+    qr_comprovante.limpar_cache()
+    ms_novo = cronometrar(
+        lambda i: qr_comprovante.gerar_png_base64(resumos[i]), len(ids)) / 1000
+    us_cache = cronometrar(lambda i: qr_comprovante.em_cache(resumos[i]), len(ids))
+
+    problemas = []
+    # O cache devolve a mesma imagem que uma geração nova
+    guardada = qr_comprovante.em_cache(resumos[0])
+    qr_comprovante.limpar_cache()
+    if qr_comprovante.gerar_png_base64(resumos[0]) != guardada:
+        problemas.append("imagem do cache diferente da gerada")
+
+    async def maior_pausa_do_loop(gerar):
+        """Maior intervalo (ms) entre tiques de 1 ms do loop durante `gerar`"""
+        pausas = []
+
+        async def tique():
+            anterior = time.perf_counter()
+            while True:
+                await asyncio.sleep(0.001)
+                agora = time.perf_counter()
+                pausas.append(agora - anterior)
+                anterior = agora
+
+        tarefa = asyncio.create_task(tique())
+        await asyncio.sleep(0.01)
+        for gerar_um in gerar:
+            await gerar_um()
+            await asyncio.sleep(0.002)  # Deixa o tique registrar a pausa
+        tarefa.cancel()
+        return max(pausas) * 1000
+
+    async def no_loop(texto):
+        qr_antigo(texto)
+
+    qr_comprovante.limpar_cache()
+    pausa_antes = asyncio.run(maior_pausa_do_loop(
+        [lambda t=t: no_loop(t) for t in textos[:10]]))
+    pausa_novo = asyncio.run(maior_pausa_do_loop(
+        [lambda t=t: qr_comprovante.gerar_em_segundo_plano(t) for t in resumos[:10]]))
+    qr_comprovante.limpar_cache()
+
+    versao_antes = qr_antigo(textos[0])[1]
+    import qrcode
+    from qrcode.constants import ERROR_CORRECT_L
+    qr = qrcode.QRCode(error_correction=ERROR_CORRECT_L)
+    qr.add_data(resumos[0])
+    qr.make(fit=True)
+    if qr.version > versao_antes:
+        problemas.append(f"QR resumido maior que o antigo ({qr.version} > {versao_antes})")
+
+    print(f"QR Code do comprovante ({args.vendas} vendas de {args.itens} itens)")
+    print(f"  conteúdo: {len(textos[0].encode())} -> {len(resumos[0].encode())} bytes, "
+          f"versão {versao_antes} -> {qr.version}")
+    print(f"  texto completo, correção M  : {ms_antes:8.1f} ms")
+    print(f"  resumo, correção L          : {ms_novo:8.1f} ms")
+    print(f"  já gerado (cache)           : {us_cache / 1000:8.3f} ms")
+    print(f"Maior pausa do loop da interface: {pausa_antes:.1f} ms "
+          f"(no loop) -> {pausa_novo:.1f} ms (thread de trabalho)")
+    if problemas:
+        print("Problemas: " + "; ".join(problemas))
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="benchmark", required=True)
+
+    p = sub.add_parser("conexoes", help=bench_conexoes.__doc__)
+    p.add_argument("--chamadas", type=int, default=5000)
+    p.set_defaults(funcao=bench_conexoes)
+
+    p = sub.add_parser("perfis", help=bench_perfis.__doc__)
+    p.add_argument("--vendas", type=int, default=2000)
+    p.set_defaults(funcao=bench_perfis)
+
+    p = sub.add_parser("datas", help=bench_datas.__doc__)
+    p.add_argument("--vendas", type=int, default=1_000_000)
+    p.set_defaults(funcao=bench_datas)
+
+    p = sub.add_parser("lote", help=bench_lote.__doc__)
+    p.add_argument("--vendas", type=int, default=2000)
+    p.add_argument("--itens", type=int, default=20)
+    p.set_defaults(funcao=bench_lote)
+
+    p = sub.add_parser("busca", help=bench_busca.__doc__)
+    p.add_argument("--produtos", type=int, default=200_000)
+    p.add_argument("--limite", type=int, default=50)
+    p.set_defaults(funcao=bench_busca)
+
+    p = sub.add_parser("sugestoes", help=bench_sugestoes.__doc__)
+    p.add_argument("--produtos", type=int, default=200_000)
+    p.add_argument("--limite", type=int, default=8)
+    p.set_defaults(funcao=bench_sugestoes)
+
+    p = sub.add_parser("pipeline", help=bench_pipeline.__doc__)
+    p.add_argument("--produtos", type=int, default=200_000)
+    p.add_argument("--intervalo", type=int, default=60)
+    p.set_defaults(funcao=bench_pipeline)
+
+    p = sub.add_parser("scanner", help=bench_scanner.__doc__)
+    p.add_argument("--produtos", type=int, default=20_000)
+    p.add_argument("--leituras", type=int, default=5000)
+    p.set_defaults(funcao=bench_scanner)
+
+    p = sub.add_parser("carrinho", help=bench_carrinho.__doc__)
+    p.add_argument("--linhas", type=int, default=500)
+    p.set_defaults(funcao=bench_carrinho)
+
+    p = sub.add_parser("catalogo", help=bench_catalogo.__doc__)
+    p.add_argument("--produtos", type=int, default=20_000)
+    p.set_defaults(funcao=bench_catalogo)
+
+    p = sub.add_parser("tabela", help=bench_tabela.__doc__)
+    p.add_argument("--vendas", type=int, default=20)
+    p.add_argument("--itens", type=int, default=3)
+    p.set_defaults(funcao=bench_tabela)
+
+    p = sub.add_parser("planos", help=bench_planos.__doc__)
+    p.set_defaults(funcao=bench_planos)
+
+    p = sub.add_parser("resumos", help=bench_resumos.__doc__)
+    p.add_argument("--vendas", type=int, default=1_000_000)
+    p.set_defaults(funcao=bench_resumos)
+
+    p = sub.add_parser("relatorios", help=bench_relatorios.__doc__)
+    p.add_argument("--vendas", type=int, default=200_000)
+    p.set_defaults(funcao=bench_relatorios)
+
+    p = sub.add_parser("dashboard", help=bench_dashboard.__doc__)
+    p.add_argument("--vendas", type=int, default=200)
+    p.add_argument("--historico", type=int, default=200_000)
+    p.add_argument("--intervalo", type=float, default=1.0)
+    p.set_defaults(funcao=bench_dashboard)
+
+    p = sub.add_parser("logs", help=bench_logs.__doc__)
+    p.add_argument("--mensagens", type=int, default=20_000)
+    p.add_argument("--atraso", type=float, default=0)
+    p.set_defaults(funcao=bench_logs)
+
+    p = sub.add_parser("inicio", help=bench_inicio.__doc__)
+    p.add_argument("--executavel", default=os.path.join(
+        "dist", "Graça_Presentes",
+        "Graça_Presentes.exe" if os.name == "nt" else "Graça_Presentes"))
+    p.add_argument("--fonte", action="store_true",
+                   help="mede `python app.py` em vez do executável")
+    p.add_argument("--execucoes", type=int, default=5)
+    p.add_argument("--limite", type=float, default=None,
+                   help="ms; sai com código 1 se a mediana a quente passar disso")
+    p.set_defaults(funcao=bench_inicio)
+
+    p = sub.add_parser("comprovante", help=bench_comprovante.__doc__)
+    p.add_argument("--vendas", type=int, default=500)
+    p.add_argument("--itens", type=int, default=5)
+    p.set_defaults(funcao=bench_comprovante)
+
+    p = sub.add_parser("qrcode", help=bench_qrcode.__doc__)
+    p.add_argument("--vendas", type=int, default=20)
+    p.add_argument("--itens", type=int, default=5)
+    p.set_defaults(funcao=bench_qrcode)
+
+    p = sub.add_parser("centavos", help=bench_centavos.__doc__)
+    p.add_argument("--vendas", type=int, default=1_000_000)
+    p.set_defaults(funcao=bench_centavos)
+
+    args = parser.parse_args()
+    print(f"SQLite {sqlite3.sqlite_version} - {datetime.now():%Y-%m-%d %H:%M}")
+    args.funcao(args)
+
+
+if __name__ == "__main__":
+    main()
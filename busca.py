@@ -0,0 +1,164 @@
+import asyncio
+import threading
+import time
+import logging
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+# ==============================================================
+# PIPELINE DE BUSCA ASSÍNCRONO
+# ==============================================================
+#
+# Usado pelos campos que buscam enquanto se digita (busca de produtos
+# e seletor do carrinho):
+#   1. cada tecla cancela a busca anterior e reagenda a nova depois de
+#      uma pausa (debounce);
+#   2. a consulta roda numa thread de trabalho, sem travar o loop do
+#      Flet; se o texto mudar enquanto ela roda, o resultado é
+#      descartado;
+#   3. resultados recentes ficam num LRU, válido enquanto a versão dos
+#      dados (ex.: catalogo.versao) não muda;
+#   4. a latência de cada busca entra nas estatísticas (percentis).
+
+ESPERA_PADRAO = 0.2         # segundos sem digitar antes de buscar
+TAMANHO_CACHE = 64          # buscas recentes guardadas
+AMOSTRAS_LATENCIA = 1000    # últimas latências usadas nos percentis
+
+# Uma única thread para todas as buscas: a conexão SQLite dela é
+# reaproveitada (ver conexao.py) e as buscas não competem entre si
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="busca")
+
+
+def percentil(valores, p):
+    """Percentil `p` (0-100) de uma lista já ordenada"""
+    if not valores:
+        return 0.0
+    return valores[min(len(valores) - 1, int(len(valores) * p / 100))]
+
+
+class PipelineBusca:
+    """Busca com debounce, cancelamento, thread de trabalho e LRU.
+
+    `buscar(texto)` é a função síncrona que consulta o banco;
+    `ao_resultado(texto, resultados)` é chamada no loop do Flet só para
+    a busca mais recente; `versao()` (opcional) invalida o LRU quando
+    os dados mudam.
+    """
+
+    def __init__(self, buscar, ao_resultado, versao=None, espera=ESPERA_PADRAO,
+                 tamanho_cache=TAMANHO_CACHE):
+        self._buscar = buscar
+        self._ao_resultado = ao_resultado
+        self._versao = versao or (lambda: None)
+        self.espera = espera
+        self.tamanho_cache = tamanho_cache
+
+        self._tarefa = None
+        self._geracao = 0
+        self._loop = None
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._versao_cache = None
+
+        self.latencias = deque(maxlen=AMOSTRAS_LATENCIA)
+        self.buscas = 0
+        self.acertos_cache = 0
+        self.canceladas = 0
+
+    # ----------------------------------------------------------
+    # Entrada (chamar a partir do loop do Flet, em handlers async)
+    # ----------------------------------------------------------
+
+    async def digitar(self, texto):
+        """Agenda a busca de `texto` após a pausa; cancela a anterior"""
+        self._agendar(texto, self.espera)
+
+    async def buscar_agora(self, texto):
+        """Busca `texto` sem esperar (Enter ou botão Buscar)"""
+        self._agendar(texto, 0)
+
+    def cancelar(self):
+        """Descarta a busca pendente (pode ser chamado de qualquer thread)"""
+        with self._lock:
+            self._geracao += 1
+            tarefa, loop = self._tarefa, self._loop
+        if tarefa is not None and loop is not None:
+            loop.call_soon_threadsafe(tarefa.cancel)
+
+    def _agendar(self, texto, espera):
+        self._loop = asyncio.get_running_loop()
+        with self._lock:
+            self._geracao += 1
+            geracao = self._geracao
+            anterior = self._tarefa
+            self._tarefa = self._loop.create_task(
+                self._executar(texto, espera, geracao))
+        if anterior is not None and not anterior.done():
+            anterior.cancel()
+            self.canceladas += 1
+
+    # ----------------------------------------------------------
+    # Execução
+    # ----------------------------------------------------------
+
+    async def _executar(self, texto, espera, geracao):
+        if espera:
+            await asyncio.sleep(espera)
+
+        inicio = time.perf_counter()
+        resultados = self._do_cache(texto)
+        if resultados is None:
+            loop = asyncio.get_running_loop()
+            versao = self._versao_cache
+            resultados = await loop.run_in_executor(_executor, self._buscar, texto)
+            if self._versao() == versao:
+                self._guardar(texto, resultados)
+
+        if geracao != self._geracao:
+            return  # Superada enquanto rodava: descarta
+        self.buscas += 1
+        self.latencias.append((time.perf_counter() - inicio) * 1000)
+        self._ao_resultado(texto, resultados)
+
+    def _do_cache(self, texto):
+        versao = self._versao()
+        if versao != self._versao_cache:
+            self._cache.clear()
+            self._versao_cache = versao
+            return None
+        resultados = self._cache.get(texto)
+        if resultados is not None:
+            self._cache.move_to_end(texto)
+            self.acertos_cache += 1
+        return resultados
+
+    def _guardar(self, texto, resultados):
+        self._cache[texto] = resultados
+        self._cache.move_to_end(texto)
+        while len(self._cache) > self.tamanho_cache:
+            self._cache.popitem(last=False)
+
+    # ----------------------------------------------------------
+    # Métricas
+    # ----------------------------------------------------------
+
+    def estatisticas(self):
+        """Buscas, acertos do LRU, canceladas e percentis de latência (ms)"""
+        latencias = sorted(self.latencias)
+        return {
+            'buscas': self.buscas,
+            'acertos_cache': self.acertos_cache,
+            'canceladas': self.canceladas,
+            'p50_ms': percentil(latencias, 50),
+            'p95_ms': percentil(latencias, 95),
+            'p99_ms': percentil(latencias, 99),
+        }
+
+    def registrar_estatisticas(self, nome):
+        """Escreve as estatísticas no log"""
+        e = self.estatisticas()
+        logging.info(
+            "Busca '%s': %d buscas, %d do cache, %d canceladas; "
+            "p50 %.1f ms, p95 %.1f ms, p99 %.1f ms",
+            nome, e['buscas'], e['acertos_cache'], e['canceladas'],
+            e['p50_ms'], e['p95_ms'], e['p99_ms'])
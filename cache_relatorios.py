@@ -0,0 +1,162 @@
+import threading
+import time
+import logging
+from collections import OrderedDict
+
+# ==============================================================
+# CACHE DOS RELATÓRIOS
+# ==============================================================
+#
+# Guarda o resultado de cada função de relatório por (função, parâmetros).
+# Uma entrada vale enquanto:
+#   - a versão dos dados não mudar (contadores incrementados a cada
+#     escrita: vendas em database.py, produtos em catalogo.py);
+#   - não passar do TTL, que cobre escritas feitas por outro processo
+#     (ex.: manutencao.py ou outra instância do app no mesmo banco).
+# O número de entradas é limitado (LRU).
+#
+# Relatórios de dias que já passaram não mudam com novas vendas: ficam
+# num LRU à parte, sem TTL, que só é esvaziado quando a versão do
+# histórico muda (importação de vendas com data, registrar_vendas_lote).
+#
+# Os resultados são compartilhados entre as chamadas: quem recebe não
+# deve alterá-los.
+
+TTL_PADRAO = 60             # segundos
+TAMANHO_PADRAO = 128        # entradas com versão e TTL
+TAMANHO_HISTORICO = 512     # entradas permanentes (dias passados)
+INTERVALO_LOG = 500         # consultas entre um registro de estatísticas e outro
+
+
+class CacheRelatorios:
+    """LRU de resultados de relatórios, invalidado por versão e TTL.
+
+    `versao()` devolve a versão atual dos dados (qualquer valor
+    comparável); `versao_historico()` (opcional) a dos dias passados.
+    """
+
+    def __init__(self, versao, versao_historico=None, ttl=TTL_PADRAO,
+                 tamanho=TAMANHO_PADRAO, tamanho_historico=TAMANHO_HISTORICO,
+                 relogio=time.monotonic):
+        self._versao = versao
+        self._versao_historico = versao_historico or (lambda: None)
+        self.ttl = ttl
+        self.tamanho = tamanho
+        self.tamanho_historico = tamanho_historico
+        self._relogio = relogio
+
+        self._lock = threading.Lock()
+        # chave -> (versao, validade, resultado)
+        self._entradas = OrderedDict()
+        # chave -> resultado; válidas enquanto a versão do histórico for esta
+        self._historico = OrderedDict()
+        self._versao_guardada = None
+
+        self.acertos = 0
+        self.falhas = 0
+        self.expiradas = 0
+
+    # ----------------------------------------------------------
+    # Consulta
+    # ----------------------------------------------------------
+
+    def consultar(self, chave, calcular, permanente=False):
+        """Devolve o resultado de `chave`, chamando `calcular()` se preciso"""
+        versao = self._versao()
+        versao_historico = self._versao_historico()
+        agora = self._relogio()
+
+        with self._lock:
+            if versao_historico != self._versao_guardada:
+                self._historico.clear()
+                self._versao_guardada = versao_historico
+            if permanente and chave in self._historico:
+                self._historico.move_to_end(chave)
+                return self._acertou(self._historico[chave])
+            entrada = self._entradas.get(chave)
+            if entrada is not None:
+                if entrada[0] == versao and entrada[1] > agora:
+                    self._entradas.move_to_end(chave)
+                    return self._acertou(entrada[2])
+                del self._entradas[chave]
+                if entrada[0] == versao:
+                    self.expiradas += 1
+            self.falhas += 1
+            self._talvez_registrar()
+
+        # Calcula fora da trava: relatórios diferentes rodam em paralelo.
+        # Uma escrita durante o cálculo muda a versão, e a entrada gravada
+        # com a versão antiga é descartada na próxima consulta.
+        resultado = calcular()
+
+        with self._lock:
+            if permanente:
+                if self._versao_historico() == versao_historico:
+                    self._historico[chave] = resultado
+                    self._historico.move_to_end(chave)
+                    while len(self._historico) > self.tamanho_historico:
+                        self._historico.popitem(last=False)
+            else:
+                self._entradas[chave] = (versao, agora + self.ttl, resultado)
+                self._entradas.move_to_end(chave)
+                while len(self._entradas) > self.tamanho:
+                    self._entradas.popitem(last=False)
+        return resultado
+
+    def _acertou(self, resultado):
+        self.acertos += 1
+        self._talvez_registrar()
+        return resultado
+
+    def _talvez_registrar(self):
+        if (self.acertos + self.falhas) % INTERVALO_LOG == 0:
+            self.registrar_estatisticas()
+
+    def em_cache(self, permanente=None):
+        """Decorador: guarda os resultados da função neste cache.
+
+        `permanente(*args, **kwargs)` (opcional) diz se o resultado
+        daquela chamada nunca muda com novas vendas.
+        """
+        def decorador(funcao):
+            def envoltorio(*args, **kwargs):
+                chave = (funcao.__name__, args, tuple(sorted(kwargs.items())))
+                return self.consultar(
+                    chave, lambda: funcao(*args, **kwargs),
+                    permanente=bool(permanente and permanente(*args, **kwargs)))
+            envoltorio.__name__ = funcao.__name__
+            envoltorio.__doc__ = funcao.__doc__
+            envoltorio.sem_cache = funcao
+            return envoltorio
+        return decorador
+
+    def invalidar(self):
+        """Esquece todos os resultados (inclusive os permanentes)"""
+        with self._lock:
+            self._entradas.clear()
+            self._historico.clear()
+
+    # ----------------------------------------------------------
+    # Métricas
+    # ----------------------------------------------------------
+
+    def estatisticas(self):
+        """Acertos, falhas, expiradas por TTL, taxa de acerto e tamanhos"""
+        consultas = self.acertos + self.falhas
+        return {
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'expiradas': self.expiradas,
+            'taxa_acerto': self.acertos / consultas if consultas else 0.0,
+            'entradas': len(self._entradas),
+            'permanentes': len(self._historico),
+        }
+
+    def registrar_estatisticas(self):
+        """Escreve as estatísticas no log"""
+        e = self.estatisticas()
+        logging.info(
+            "Cache de relatórios: %d acertos, %d falhas (%.0f%% de acerto), "
+            "%d expiradas; %d entradas, %d permanentes",
+            e['acertos'], e['falhas'], e['taxa_acerto'] * 100, e['expiradas'],
+            e['entradas'], e['permanentes'])
@@ -0,0 +1,96 @@
+from collections import OrderedDict
+
+# ==============================================================
+# CARRINHO DE COMPRAS
+# ==============================================================
+#
+# Itens indexados por código (OrderedDict mantém a ordem de inclusão)
+# e total/quantidade mantidos a cada alteração: incluir, remover e
+# consultar o total são O(1), qualquer que seja o tamanho do carrinho.
+# Valores em centavos (ver dinheiro.py).
+
+
+class ItemCarrinho:
+    """Uma linha do carrinho"""
+    __slots__ = ('codigo', 'nome', 'preco', 'quantidade')
+
+    def __init__(self, codigo, nome, preco, quantidade):
+        self.codigo = codigo
+        self.nome = nome
+        self.preco = preco
+        self.quantidade = quantidade
+
+    @property
+    def subtotal(self):
+        return self.preco * self.quantidade
+
+    def como_dict(self):
+        """Formato de item usado por registrar_venda_db"""
+        return {
+            'codigo': self.codigo,
+            'nome': self.nome,
+            'preco': self.preco,
+            'quantidade': self.quantidade,
+            'subtotal': self.subtotal,
+        }
+
+
+class Carrinho:
+    """Itens por código, com total e quantidade de unidades incrementais"""
+
+    def __init__(self):
+        self._itens = OrderedDict()
+        self.total = 0              # Centavos
+        self.quantidade_itens = 0   # Unidades somadas de todas as linhas
+
+    def __len__(self):
+        return len(self._itens)
+
+    def __bool__(self):
+        return bool(self._itens)
+
+    def __iter__(self):
+        return iter(self._itens.values())
+
+    def __contains__(self, codigo):
+        return codigo in self._itens
+
+    def obter(self, codigo):
+        return self._itens.get(codigo)
+
+    def quantidade_de(self, codigo):
+        item = self._itens.get(codigo)
+        return item.quantidade if item else 0
+
+    def adicionar(self, codigo, nome, preco, quantidade):
+        """Soma `quantidade` à linha do produto (criando-a se preciso).
+
+        Levanta ValueError se `quantidade` não for positiva: tirar
+        unidades é com remover().
+        """
+        if quantidade <= 0:
+            raise ValueError(f"Quantidade inválida para {codigo}: {quantidade}")
+        item = self._itens.get(codigo)
+        if item is None:
+            item = self._itens[codigo] = ItemCarrinho(codigo, nome, preco, 0)
+        item.quantidade += quantidade
+        self.total += item.preco * quantidade
+        self.quantidade_itens += quantidade
+        return item
+
+    def remover(self, codigo):
+        """Remove a linha do produto; retorna o item removido ou None"""
+        item = self._itens.pop(codigo, None)
+        if item is not None:
+            self.total -= item.subtotal
+            self.quantidade_itens -= item.quantidade
+        return item
+
+    def limpar(self):
+        self._itens.clear()
+        self.total = 0
+        self.quantidade_itens = 0
+
+    def itens_venda(self):
+        """Itens como dicts, no formato de registrar_venda_db"""
+        return [item.como_dict() for item in self._itens.values()]
@@ -0,0 +1,209 @@
+import threading
+import time
+import logging
+from bisect import bisect_left, insort
+
+# ==============================================================
+# CACHE DO CATÁLOGO DE PRODUTOS EM MEMÓRIA
+# ==============================================================
+#
+# O catálogo inteiro é lido do banco uma vez e mantido em memória:
+# um dict por código e um índice ordenado por nome. As escritas em
+# database.py atualizam o cache logo após o COMMIT (write-through),
+# então as leituras não voltam ao disco.
+#
+# Outro terminal (ou processo) pode mexer nos mesmos produtos. Antes de
+# responder, o cache compara o contador de alterações do banco (tabela
+# versao_catalogo, migração 8): uma consulta de uma linha, feita no
+# máximo a cada INTERVALO_VERIFICACAO segundos para que as leituras
+# seguidas (scanner, autocompletar) continuem só em memória. Se o
+# contador mudou sem passar por aqui, o catálogo é recarregado. As
+# escritas deste processo informam o contador antes e depois da sua
+# transação, então não provocam recarga.
+#
+# Dois contadores de versão permitem que a interface pule a
+# reconstrução quando nada mudou:
+#   versao          - qualquer alteração (inclusive estoque)
+#   versao_cadastro - só cadastro/edição/exclusão (nome, preço...)
+
+# Posições das colunas em uma linha de produtos (SELECT *)
+CODIGO, NOME, PRECO, QUANTIDADE = 0, 1, 2, 3
+
+# Segundos entre duas consultas ao contador de alterações do banco. O
+# estoque de outro terminal aparece em até esse tempo; a venda em si é
+# protegida pela conferência dentro da transação (database.py).
+INTERVALO_VERIFICACAO = 0.5
+
+
+def chave_nome(nome):
+    """Chave de ordenação/busca por nome (sem diferenciar maiúsculas)"""
+    return nome.casefold()
+
+
+class CatalogoCache:
+    """Produtos em memória {codigo: linha}, com índice ordenado por nome"""
+
+    def __init__(self, carregar, versao_banco=None,
+                 intervalo=INTERVALO_VERIFICACAO, relogio=time.monotonic):
+        # carregar: função sem argumentos que retorna todas as linhas
+        # versao_banco: função sem argumentos que retorna o contador de
+        # alterações de produtos no banco (None = não revalida)
+        self._carregar = carregar
+        self._versao_banco = versao_banco or (lambda: None)
+        self._lock = threading.RLock()
+        self._produtos = None
+        self._por_nome = []
+        self._versao_conhecida = None
+        self.intervalo = intervalo
+        self._relogio = relogio
+        self._proxima_verificacao = 0.0
+        self.versao = 0
+        self.versao_cadastro = 0
+        self.acertos = 0
+        self.falhas = 0
+        self.recargas = 0
+
+    def _garantir_carregado(self):
+        """Lê o catálogo do banco na primeira utilização ou se ele mudou
+        por fora (com o lock)"""
+        agora = self._relogio()
+        if self._produtos is not None and agora < self._proxima_verificacao:
+            self.acertos += 1
+            return
+        atual = self._versao_banco()
+        self._proxima_verificacao = agora + self.intervalo
+        if self._produtos is not None:
+            if atual == self._versao_conhecida:
+                self.acertos += 1
+                return
+            logging.info("Produtos alterados por outro processo: recarregando o catálogo")
+            self.recargas += 1
+            self.versao += 1
+            self.versao_cadastro += 1
+        self.falhas += 1
+        # Contador lido antes das linhas: se mudar no meio da carga, a
+        # próxima leitura recarrega de novo (nunca fica velho)
+        linhas = self._carregar()
+        self._versao_conhecida = atual
+        self._produtos = {linha[CODIGO]: linha for linha in linhas}
+        self._por_nome = sorted(
+            (chave_nome(linha[NOME]), linha[CODIGO]) for linha in linhas)
+        logging.info("Catálogo carregado: %d produtos", len(linhas))
+
+    def obter(self, codigo):
+        """Linha do produto ou None se não existir"""
+        with self._lock:
+            self._garantir_carregado()
+            return self._produtos.get(codigo)
+
+    def listar(self):
+        """Todos os produtos, ordenados por nome"""
+        with self._lock:
+            self._garantir_carregado()
+            return [self._produtos[codigo] for _, codigo in self._por_nome]
+
+    def com_prefixo(self, prefixo, limite=None):
+        """Produtos cujo nome começa com `prefixo`, ordenados por nome"""
+        chave = chave_nome(prefixo)
+        resultado = []
+        with self._lock:
+            self._garantir_carregado()
+            i = bisect_left(self._por_nome, (chave, ""))
+            while i < len(self._por_nome) and self._por_nome[i][0].startswith(chave):
+                if limite is not None and len(resultado) >= limite:
+                    break
+                resultado.append(self._produtos[self._por_nome[i][1]])
+                i += 1
+        return resultado
+
+    def __len__(self):
+        with self._lock:
+            self._garantir_carregado()
+            return len(self._produtos)
+
+    # ----------------------------------------------------------
+    # Write-through (chamado por database.py após o COMMIT)
+    # ----------------------------------------------------------
+
+    def _tirar_do_indice(self, linha):
+        i = bisect_left(self._por_nome, (chave_nome(linha[NOME]), linha[CODIGO]))
+        if i < len(self._por_nome) and self._por_nome[i][1] == linha[CODIGO]:
+            del self._por_nome[i]
+
+    def _acompanhar_banco(self, versoes):
+        """Avança o contador conhecido com (antes, depois) da transação.
+
+        Se o banco não estava em `antes`, houve outra escrita que o cache
+        não viu: descarta tudo e retorna False (a próxima leitura recarrega).
+        """
+        if versoes is None:
+            return True
+        antes, depois = versoes
+        if antes != self._versao_conhecida:
+            self._produtos = None
+            self._por_nome = []
+            return False
+        self._versao_conhecida = depois
+        return True
+
+    def salvar(self, linha, versoes=None):
+        """Insere ou substitui um produto.
+
+        `versoes` (opcional): contador do banco (antes, depois) da
+        transação que gravou a alteração.
+        """
+        with self._lock:
+            self.versao += 1
+            self.versao_cadastro += 1
+            if self._produtos is None or not self._acompanhar_banco(versoes):
+                return  # Não carregado: a carga lerá do banco
+            anterior = self._produtos.get(linha[CODIGO])
+            if anterior is not None:
+                self._tirar_do_indice(anterior)
+            self._produtos[linha[CODIGO]] = linha
+            insort(self._por_nome, (chave_nome(linha[NOME]), linha[CODIGO]))
+
+    def remover(self, codigo, versoes=None):
+        """Remove um produto (se existir)"""
+        with self._lock:
+            self.versao += 1
+            self.versao_cadastro += 1
+            if self._produtos is None or not self._acompanhar_banco(versoes):
+                return
+            anterior = self._produtos.pop(codigo, None)
+            if anterior is not None:
+                self._tirar_do_indice(anterior)
+
+    def ajustar_estoque(self, ajustes, versoes=None):
+        """Soma cada quantidade de [(codigo, delta)] ao estoque em cache"""
+        with self._lock:
+            self.versao += 1
+            if self._produtos is None or not self._acompanhar_banco(versoes):
+                return
+            for codigo, delta in ajustes:
+                linha = self._produtos.get(codigo)
+                if linha is not None:
+                    self._produtos[codigo] = (
+                        linha[:QUANTIDADE] + (linha[QUANTIDADE] + delta,)
+                        + linha[QUANTIDADE + 1:])
+
+    def invalidar(self):
+        """Descarta o cache; a próxima leitura recarrega do banco"""
+        with self._lock:
+            self.versao += 1
+            self.versao_cadastro += 1
+            self._produtos = None
+            self._por_nome = []
+
+    def estatisticas(self):
+        """Acertos, falhas (cargas do banco) e taxa de acerto"""
+        with self._lock:
+            total = self.acertos + self.falhas
+            return {
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'taxa_acerto': self.acertos / total if total else 0.0,
+                'recargas': self.recargas,
+                'produtos': len(self._produtos or {}),
+                'versao': self.versao,
+            }
@@ -0,0 +1,195 @@
+from functools import lru_cache
+from html import escape
+
+from database import obter_venda_com_itens
+from dinheiro import formatar_reais
+
+# ==============================================================
+# COMPROVANTES DE VENDA
+# ==============================================================
+#
+# Uma consulta busca a venda com os itens (obter_venda_com_itens); os
+# dados viram texto simples, bytes ESC/POS (impressora térmica) ou HTML
+# por templates montados uma vez, na importação do módulo, e preenchidos
+# com str.format_map (sem concatenar texto linha a linha). Vendas
+# gravadas não mudam, então cada comprovante é renderizado uma vez por
+# venda e formato: copiar, imprimir, QR Code e WhatsApp reaproveitam.
+
+LOJA = "Graça Presentes"
+WHATSAPP_LOJA = "(11) 99999-9999"  # <--- COLOQUE O NÚMERO DA LOJA AQUI
+LARGURA = 30                       # colunas do comprovante em texto
+TAMANHO_CACHE = 64                 # comprovantes renderizados guardados
+
+# ----------------------------------------------------------
+# Templates
+# ----------------------------------------------------------
+
+SEPARADOR = "-" * LARGURA
+
+# Campos entre chaves, preenchidos por str.format_map. Loja, WhatsApp e
+# separadores são fixos e já entram no template.
+TEXTO_CABECALHO = (
+    "=== COMPROVANTE DE VENDA ===\n"
+    f"Loja: {LOJA}\n"
+    f"WhatsApp: {WHATSAPP_LOJA}\n"
+    "Data: {data}\n"
+    "Venda ID: #{venda_id}\n"
+    f"{SEPARADOR}\n")
+TEXTO_ITEM = (
+    "{quantidade}x {nome}\n"
+    "   {preco} -> {subtotal}\n")
+TEXTO_RODAPE = (
+    f"{SEPARADOR}\n"
+    "TOTAL: {total}\n"
+    "Forma Pagamento: {forma_pagamento}\n"
+    "\n   Obrigado pela preferência!   \n"
+    f"{'=' * LARGURA}\n")
+
+# QR Code: só o essencial, uma linha por item. Menos bytes, versão
+# menor do QR (menos módulos), geração mais rápida e leitura mais fácil.
+QR_CABECALHO = f"{LOJA}\n" "Venda #{venda_id} - {data}\n"
+QR_ITEM = "{quantidade}x {nome} {subtotal}\n"
+QR_RODAPE = "TOTAL: {total} ({forma_pagamento})\n"
+
+HTML_DOCUMENTO = ("""<!DOCTYPE html>
+<html lang="pt-BR">
+<head><meta charset="utf-8"><title>Comprovante #{venda_id}</title></head>
+<body style="font-family: monospace; max-width: 320px">
+<h2 style="text-align: center">""" + escape(LOJA) + """</h2>
+<p>WhatsApp: """ + escape(WHATSAPP_LOJA) + """<br>Data: {data}<br>Venda ID: #{venda_id}</p>
+<table style="width: 100%">
+<tr><th align="left">Item</th><th align="right">Qtde</th><th align="right">Subtotal</th></tr>
+{itens}
+</table>
+<p><strong>TOTAL: {total}</strong><br>Forma Pagamento: {forma_pagamento}</p>
+<p style="text-align: center">Obrigado pela preferência!</p>
+</body>
+</html>
+""")
+HTML_ITEM = (
+    '<tr><td>{nome}<br><small>{preco}</small></td>'
+    '<td align="right">{quantidade}</td><td align="right">{subtotal}</td></tr>')
+
+# Comandos ESC/POS (impressoras térmicas de 58/80 mm)
+ESC_INICIAR = b"\x1b@"
+ESC_PAGINA_CODIGO = b"\x1bt\x03"        # PC860 (português)
+ESC_CENTRO = b"\x1ba\x01"
+ESC_ESQUERDA = b"\x1ba\x00"
+ESC_NEGRITO = b"\x1bE\x01"
+ESC_NORMAL = b"\x1bE\x00"
+ESC_CORTAR = b"\n\n\n\x1dV\x01"          # avança o papel e corta (parcial)
+CODIFICACAO_IMPRESSORA = "cp860"
+
+# ----------------------------------------------------------
+# Dados
+# ----------------------------------------------------------
+
+
+@lru_cache(maxsize=TAMANHO_CACHE)
+def dados_comprovante(venda_id):
+    """Dados da venda prontos para os templates; LookupError se não existir"""
+    linhas = obter_venda_com_itens(venda_id)
+    if not linhas:
+        raise LookupError(venda_id)  # Exceções não entram no lru_cache
+    venda = linhas[0]
+    return {
+        'venda_id': venda[0],
+        'data': venda[1],
+        'total': formatar_reais(venda[2]),
+        'forma_pagamento': venda[3].upper(),
+        'itens': tuple(
+            {
+                'nome': nome,
+                'preco': formatar_reais(preco),
+                'quantidade': quantidade,
+                'subtotal': formatar_reais(subtotal),
+            }
+            for *_, codigo, nome, preco, quantidade, subtotal in linhas
+            if codigo is not None
+        ),
+    }
+
+
+# ----------------------------------------------------------
+# Formatos
+# ----------------------------------------------------------
+
+
+def renderizar_texto(dados):
+    """Comprovante em texto simples (área de transferência, .txt, QR, WhatsApp)"""
+    partes = [TEXTO_CABECALHO.format_map(dados)]
+    partes.extend(TEXTO_ITEM.format_map(item) for item in dados['itens'])
+    partes.append(TEXTO_RODAPE.format_map(dados))
+    return "".join(partes)
+
+
+def renderizar_qr(dados):
+    """Comprovante resumido para o QR Code"""
+    partes = [QR_CABECALHO.format_map(dados)]
+    partes.extend(QR_ITEM.format_map(item) for item in dados['itens'])
+    partes.append(QR_RODAPE.format_map(dados))
+    return "".join(partes)
+
+
+def renderizar_escpos(dados):
+    """Comprovante em bytes ESC/POS para impressora térmica"""
+    def texto(valor):
+        return valor.encode(CODIFICACAO_IMPRESSORA, errors="replace")
+
+    cabecalho = TEXTO_CABECALHO.format_map(dados)
+    itens = "".join(TEXTO_ITEM.format_map(item) for item in dados['itens'])
+    return b"".join([
+        ESC_INICIAR, ESC_PAGINA_CODIGO,
+        ESC_CENTRO, ESC_NEGRITO, texto(LOJA + "\n"), ESC_NORMAL,
+        ESC_ESQUERDA, texto(cabecalho), texto(itens),
+        texto(SEPARADOR + "\n"),
+        ESC_NEGRITO, texto(f"TOTAL: {dados['total']}\n"), ESC_NORMAL,
+        texto(f"Forma Pagamento: {dados['forma_pagamento']}\n\n"),
+        ESC_CENTRO, texto("Obrigado pela preferência!\n"),
+        ESC_CORTAR,
+    ])
+
+
+def renderizar_html(dados):
+    """Comprovante em HTML (e-mail, navegador)"""
+    seguros = {chave: escape(str(valor)) for chave, valor in dados.items()
+               if chave != 'itens'}
+    seguros['itens'] = "\n".join(
+        HTML_ITEM.format_map({chave: escape(str(valor))
+                              for chave, valor in item.items()})
+        for item in dados['itens'])
+    return HTML_DOCUMENTO.format_map(seguros)
+
+
+FORMATOS = {
+    'texto': renderizar_texto,
+    'qr': renderizar_qr,
+    'escpos': renderizar_escpos,
+    'html': renderizar_html,
+}
+
+
+@lru_cache(maxsize=TAMANHO_CACHE)
+def _renderizado(venda_id, formato):
+    return FORMATOS[formato](dados_comprovante(venda_id))
+
+
+def gerar_comprovante(venda_id, formato='texto'):
+    """Comprovante da venda no formato pedido ('texto', 'qr', 'escpos' ou 'html').
+
+    Retorna str (bytes no ESC/POS), ou None se a venda não existir.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de comprovante desconhecido: {formato}")
+    if not venda_id:
+        return None
+    try:
+        return _renderizado(venda_id, formato)
+    except LookupError:
+        return None
+
+
+def limpar_cache():
+    """Esquece os comprovantes guardados (ex.: ao trocar de banco)"""
+    dados_comprovante.cache_clear()
+    _renderizado.cache_clear()
@@ -0,0 +1,171 @@
+import os
+import sqlite3
+import threading
+import logging
+from contextlib import contextmanager
+
+# ==============================================================
+# GERENCIADOR DE CONEXÕES SQLITE
+# ==============================================================
+#
+# Cada thread recebe sua própria conexão (o sqlite3 não permite
+# compartilhar conexões entre threads por padrão). A conexão é aberta
+# na primeira utilização, recebe os PRAGMAs configurados uma única vez
+# e é reaproveitada em todas as chamadas seguintes da mesma thread.
+
+PRAGMAS_PADRAO = {
+    'busy_timeout': 5000,
+}
+
+# Perfis de desempenho. journal_mode é persistente no arquivo e é
+# aplicado uma vez na inicialização (aplicar_perfil); os demais PRAGMAs
+# valem por conexão e são aplicados ao abri-la.
+PERFIS = {
+    # Padrões do SQLite: journal de rollback e fsync completo por commit
+    'seguro': {
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+    },
+    # WAL: leituras do dashboard não bloqueiam a venda e o commit não
+    # espera o fsync do banco principal (só o checkpoint espera)
+    'rapido': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -16384,           # 16 MiB (negativo = KiB)
+        'mmap_size': 64 * 1024 * 1024,  # 64 MiB
+        'temp_store': 'MEMORY',
+    },
+}
+
+# Perfil usado pelo app; pode ser trocado com GRACA_PERFIL_DB=seguro
+PERFIL_PADRAO = os.environ.get('GRACA_PERFIL_DB', 'rapido')
+
+# Commits entre dois checkpoints passivos do WAL
+CHECKPOINT_A_CADA = 200
+
+
+class GerenciadorConexoes:
+    """Mantém uma conexão por thread para um arquivo de banco"""
+
+    def __init__(self, db_path, perfil=None, pragmas=None):
+        self.db_path = db_path
+        self.perfil = perfil or PERFIL_PADRAO
+        if self.perfil not in PERFIS:
+            raise ValueError(f"Perfil de banco desconhecido: {self.perfil}")
+
+        config = dict(PERFIS[self.perfil])
+        self.journal_mode = config.pop('journal_mode')
+        self.pragmas = dict(PRAGMAS_PADRAO if pragmas is None else pragmas)
+        self.pragmas.update(config)
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._conexoes = []
+        self._commits = 0
+
+    def _abrir(self):
+        """Abre uma nova conexão e aplica os PRAGMAs configurados"""
+        # isolation_level=None: leituras não abrem transação implícita;
+        # as escritas usam BEGIN/COMMIT explícitos em transacao().
+        # check_same_thread=False apenas para permitir fechar_todas() no
+        # encerramento; o uso normal continua restrito à thread dona.
+        conn = sqlite3.connect(
+            self.db_path, isolation_level=None, check_same_thread=False)
+        for nome, valor in self.pragmas.items():
+            conn.execute(f"PRAGMA {nome} = {valor}")
+
+        with self._lock:
+            self._conexoes.append(conn)
+        logging.debug("Nova conexão aberta (%s): %s",
+                      threading.current_thread().name, self.db_path)
+        return conn
+
+    def aplicar_perfil(self):
+        """Grava o journal_mode do perfil no arquivo do banco"""
+        modo = self.obter().execute(
+            f"PRAGMA journal_mode = {self.journal_mode}").fetchone()[0]
+        logging.info("Perfil de banco '%s' (journal_mode=%s)", self.perfil, modo)
+        return modo
+
+    def checkpoint(self, modo="PASSIVE"):
+        """Copia as páginas do WAL para o banco principal"""
+        return self.obter().execute(f"PRAGMA wal_checkpoint({modo})").fetchone()
+
+    def obter(self):
+        """Retorna a conexão da thread atual, abrindo-a se necessário"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._abrir()
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def conexao(self):
+        """Context manager para leituras: entrega a conexão da thread"""
+        yield self.obter()
+
+    @contextmanager
+    def transacao(self, imediata=False):
+        """Context manager para escritas: BEGIN, COMMIT ou ROLLBACK.
+
+        imediata=True usa BEGIN IMMEDIATE, reservando a escrita já no
+        início (leituras feitas dentro da transação não ficam obsoletas).
+        Chamadas aninhadas participam da transação mais externa.
+        """
+        conn = self.obter()
+        profundidade = getattr(self._local, 'profundidade', 0)
+        if profundidade:
+            self._local.profundidade = profundidade + 1
+            try:
+                yield conn
+            finally:
+                self._local.profundidade = profundidade
+            return
+
+        if conn.in_transaction:
+            # Transação aberta sem transacao() por perto (ex.: COMMIT que
+            # falhou fora deste gerenciador): não é a transação de ninguém
+            logging.warning("Transação pendente desfeita antes de um novo BEGIN")
+            conn.rollback()
+
+        conn.execute("BEGIN IMMEDIATE" if imediata else "BEGIN")
+        self._local.profundidade = 1
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            try:
+                conn.commit()
+            except BaseException:
+                # Sem o ROLLBACK a conexão ficaria presa na transação e
+                # as escritas seguintes da thread nunca seriam gravadas
+                conn.rollback()
+                raise
+            self._contar_commit()
+        finally:
+            self._local.profundidade = 0
+
+    def _contar_commit(self):
+        """Dispara um checkpoint passivo a cada CHECKPOINT_A_CADA commits"""
+        if self.journal_mode != 'WAL':
+            return
+        with self._lock:
+            self._commits += 1
+            if self._commits < CHECKPOINT_A_CADA:
+                return
+            self._commits = 0
+        try:
+            self.checkpoint()
+        except sqlite3.Error as e:
+            # Checkpoint é só manutenção; nunca deve derrubar uma venda
+            logging.warning("Falha no checkpoint do WAL: %s", e)
+
+    def fechar_todas(self):
+        """Fecha todas as conexões abertas (usar ao encerrar o app)"""
+        with self._lock:
+            conexoes, self._conexoes = self._conexoes, []
+        for conn in conexoes:
+            conn.close()
+        self._local = threading.local()
@@ -4,33 +4,13 @@ from datetime import datetime
 import sys
 import logging
 
-# ==============================================================
-# CONFIGURAÇÃO DE LOGGING PARA CAPTURAR ERROS
-# ==============================================================
-
-
-def setup_logging():
-    """Configura sistema de logging para debug"""
-    try:
-        if getattr(sys, 'frozen', False):
-            log_dir = os.path.dirname(sys.executable)
-        else:
-            log_dir = os.path.dirname(os.path.abspath(__file__))
-
-        log_file = os.path.join(log_dir, 'erros.log')
-
-        logging.basicConfig(
-            filename=log_file,
-            level=logging.DEBUG,
-            format='%(asctime)s - %(levelname)s - %(message)s'
-        )
-        logging.info("=== INICIANDO APLICATIVO ===")
-    except Exception as e:
-        print(f"Erro no logging: {e}")
-
+from conexao import GerenciadorConexoes
+from migracoes import aplicar_migracoes
+from catalogo import CatalogoCache
+from logs import configurar_logging
 
-# Configurar logging imediatamente
-setup_logging()
+# Logging em fila com arquivo rotativo (ver logs.py)
+configurar_logging()
 
 # ==============================================================
 # CONFIGURAÇÃO DO BANCO DE DADOS (CORRIGIDA)
@@ -40,48 +20,102 @@ setup_logging()
 def get_db_path():
     """Obtém o caminho do banco de dados com tratamento de erro"""
     try:
-        logging.info("Obtendo caminho do banco de dados...")
+        logging.debug("Obtendo caminho do banco de dados...")
 
         # Verifica se está executando como executável PyInstaller
         if getattr(sys, 'frozen', False):
             # Se é executável, usa o diretório do executável
             base_dir = os.path.dirname(sys.executable)
-            logging.info(f"Modo executável - Diretório: {base_dir}")
+            logging.debug("Modo executável - Diretório: %s", base_dir)
         else:
             # Se é script Python, usa o diretório do script
             base_dir = os.path.dirname(os.path.abspath(__file__))
-            logging.info(f"Modo desenvolvimento - Diretório: {base_dir}")
+            logging.debug("Modo desenvolvimento - Diretório: %s", base_dir)
 
         # Cria a pasta database se não existir
         database_dir = os.path.join(base_dir, "database")
         os.makedirs(database_dir, exist_ok=True)
-        logging.info(f"Pasta database: {database_dir}")
+        logging.debug("Pasta database: %s", database_dir)
 
         db_path = os.path.join(database_dir, "graca_presentes.db")
-        logging.info(f"Caminho final do banco: {db_path}")
+        logging.info("Caminho final do banco: %s", db_path)
 
-        # Testa se consegue escrever no diretório
-        test_file = os.path.join(database_dir, "test_write.tmp")
-        with open(test_file, 'w') as f:
-            f.write("test")
-        os.remove(test_file)
-        logging.info("Permissão de escrita OK")
+        if os.path.exists(db_path):
+            # Banco já criado aqui antes: basta conferir o atributo de
+            # escrita, sem criar e apagar um arquivo a cada inicialização
+            if not os.access(db_path, os.W_OK):
+                raise PermissionError(f"Banco somente leitura: {db_path}")
+        else:
+            # Primeira execução: testa se consegue escrever no diretório
+            test_file = os.path.join(database_dir, "test_write.tmp")
+            with open(test_file, 'w') as f:
+                f.write("test")
+            os.remove(test_file)
+        logging.debug("Permissão de escrita OK")
 
         return db_path
 
     except Exception as e:
-        logging.error(f"ERRO em get_db_path: {e}")
+        logging.error("ERRO em get_db_path: %s", e)
 
         # Fallback: usar diretório temporário
         import tempfile
         temp_db = os.path.join(tempfile.gettempdir(), "graca_presentes.db")
-        logging.info(f"Usando fallback: {temp_db}")
+        logging.info("Usando fallback: %s", temp_db)
 
         return temp_db
 
 
 DB_PATH = get_db_path()
 
+# Conexões reaproveitadas por thread (ver conexao.py)
+gerenciador = GerenciadorConexoes(DB_PATH)
+
+
+def conexao():
+    """Conexão da thread atual para leituras (context manager)"""
+    return gerenciador.conexao()
+
+
+def transacao(imediata=False):
+    """Transação na conexão da thread atual (context manager)"""
+    return gerenciador.transacao(imediata)
+
+
+def carregar_catalogo():
+    """Lê todos os produtos do banco (carga do cache do catálogo)"""
+    with conexao() as conn:
+        return conn.execute('SELECT * FROM produtos').fetchall()
+
+
+def versao_catalogo_banco(conn=None):
+    """Contador de alterações em produtos (tabela versao_catalogo)"""
+    if conn is None:
+        with conexao() as conn:
+            return versao_catalogo_banco(conn)
+    return conn.execute("SELECT versao FROM versao_catalogo").fetchone()[0]
+
+
+# Catálogo em memória (ver catalogo.py). As funções de escrita abaixo o
+# atualizam depois do COMMIT, informando o contador de alterações antes
+# e depois da transação; escritas de outros processos mudam o contador
+# e o catálogo se recarrega na leitura seguinte.
+catalogo = CatalogoCache(carregar_catalogo, versao_catalogo_banco)
+
+# Versões dos dados de vendas, lidas pelo cache dos relatórios
+# (cache_relatorios.py): versao_vendas muda a cada venda gravada;
+# versao_historico só quando podem ter entrado vendas de dias passados.
+versao_vendas = 0
+versao_historico = 0
+
+
+def marcar_vendas_alteradas(historico=False):
+    """Avisa o cache dos relatórios que as vendas mudaram"""
+    global versao_vendas, versao_historico
+    versao_vendas += 1
+    if historico:
+        versao_historico += 1
+
 # ==============================================================
 # FUNÇÕES DO BANCO DE DADOS (COM TRATAMENTO DE ERRO)
 # ==============================================================
@@ -90,260 +124,541 @@ DB_PATH = get_db_path()
 def criar_banco():
     """Cria as tabelas do banco de dados se não existirem"""
     try:
-        logging.info("Criando/verificando banco de dados...")
+        logging.debug("Criando/verificando banco de dados...")
 
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        gerenciador.aplicar_perfil()
 
-        # Tabela de produtos
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS produtos (
-            codigo TEXT PRIMARY KEY,
-            nome TEXT NOT NULL,
-            preco REAL NOT NULL,
-            quantidade INTEGER NOT NULL,
-            categoria TEXT NOT NULL,
-            descricao TEXT,
-            data_cadastro TEXT NOT NULL,
-            image_path TEXT
-        )
-        ''')
-
-        # Tabela de vendas
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS vendas (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            data_venda TEXT NOT NULL,
-            total REAL NOT NULL,
-            forma_pagamento TEXT NOT NULL,
-            valor_recebido REAL,
-            troco REAL
-        )
-        ''')
-
-        # Tabela de itens vendidos
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS itens_vendidos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            venda_id INTEGER NOT NULL,
-            produto_codigo TEXT NOT NULL,
-            nome TEXT NOT NULL,
-            preco_unitario REAL NOT NULL,
-            quantidade INTEGER NOT NULL,
-            subtotal REAL NOT NULL,
-            FOREIGN KEY (venda_id) REFERENCES vendas(id),
-            FOREIGN KEY (produto_codigo) REFERENCES produtos(codigo)
-        )
-        ''')
-
-        # Tabela de dados do cartão (NOVA)
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS dados_cartao (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            venda_id INTEGER NOT NULL,
-            nome_cliente TEXT,
-            tipo_cartao TEXT,
-            parcelas INTEGER,
-            FOREIGN KEY (venda_id) REFERENCES vendas(id)
-        )
-        ''')
-
-        conn.commit()
-        conn.close()
-        logging.info("Banco de dados criado/verificado com sucesso")
+        with transacao() as conn:
+            cursor = conn.cursor()
+
+            # Esquema inicial (v0). Alterações posteriores, como os valores
+            # em centavos, são feitas pelas migrações em migracoes.py
+            # Tabela de produtos
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS produtos (
+                codigo TEXT PRIMARY KEY,
+                nome TEXT NOT NULL,
+                preco REAL NOT NULL,
+                quantidade INTEGER NOT NULL,
+                categoria TEXT NOT NULL,
+                descricao TEXT,
+                data_cadastro TEXT NOT NULL,
+                image_path TEXT
+            )
+            ''')
+
+            # Tabela de vendas
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS vendas (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                data_venda TEXT NOT NULL,
+                total REAL NOT NULL,
+                forma_pagamento TEXT NOT NULL,
+                valor_recebido REAL,
+                troco REAL
+            )
+            ''')
+
+            # Tabela de itens vendidos
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS itens_vendidos (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                venda_id INTEGER NOT NULL,
+                produto_codigo TEXT NOT NULL,
+                nome TEXT NOT NULL,
+                preco_unitario REAL NOT NULL,
+                quantidade INTEGER NOT NULL,
+                subtotal REAL NOT NULL,
+                FOREIGN KEY (venda_id) REFERENCES vendas(id),
+                FOREIGN KEY (produto_codigo) REFERENCES produtos(codigo)
+            )
+            ''')
+
+            # Tabela de dados do cartão (NOVA)
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS dados_cartao (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                venda_id INTEGER NOT NULL,
+                nome_cliente TEXT,
+                tipo_cartao TEXT,
+                parcelas INTEGER,
+                FOREIGN KEY (venda_id) REFERENCES vendas(id)
+            )
+            ''')
+
+        versao = aplicar_migracoes(gerenciador)
+        logging.info("Banco de dados criado/verificado com sucesso (esquema v%d)", versao)
 
     except Exception as e:
-        logging.error(f"ERRO ao criar banco: {e}")
+        logging.error("ERRO ao criar banco: %s", e)
         raise  # Re-lança a exceção para ser tratada no app principal
 
 
 def salvar_produto_db(produto):
     """Salva ou atualiza um produto no banco de dados"""
+    linha = (
+        produto['codigo'],
+        produto['nome'],
+        produto['preco'],
+        produto['quantidade'],
+        produto['categoria'],
+        produto['descricao'],
+        datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        produto.get('image_path', '')
+    )
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            INSERT OR REPLACE INTO produtos
-            (codigo, nome, preco, quantidade, categoria,
-             descricao, data_cadastro, image_path)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            produto['codigo'],
-            produto['nome'],
-            produto['preco'],
-            produto['quantidade'],
-            produto['categoria'],
-            produto['descricao'],
-            datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            produto.get('image_path', '')
-        ))
-
-        conn.commit()
-        conn.close()
-        logging.info(f"Produto salvo: {produto['codigo']}")
+        # IMMEDIATE: nenhuma outra escrita entre as duas leituras do contador
+        with transacao(imediata=True) as conn:
+            antes = versao_catalogo_banco(conn)
+            # UPSERT em vez de INSERT OR REPLACE: o REPLACE apaga a linha
+            # sem disparar o gatilho de DELETE do índice de busca
+            conn.execute('''
+                INSERT INTO produtos
+                (codigo, nome, preco, quantidade, categoria,
+                 descricao, data_cadastro, image_path)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(codigo) DO UPDATE SET
+                    nome = excluded.nome,
+                    preco = excluded.preco,
+                    quantidade = excluded.quantidade,
+                    categoria = excluded.categoria,
+                    descricao = excluded.descricao,
+                    data_cadastro = excluded.data_cadastro,
+                    image_path = excluded.image_path
+            ''', linha)
+            depois = versao_catalogo_banco(conn)
+        catalogo.salvar(linha, (antes, depois))
+
+        logging.info("Produto salvo: %s", produto['codigo'])
 
     except Exception as e:
-        logging.error(f"ERRO ao salvar produto {produto['codigo']}: {e}")
+        logging.error("ERRO ao salvar produto %s: %s", produto['codigo'], e)
         raise
 
 
-def buscar_produtos_db(filtro=None):
-    """Busca produtos no banco de dados com filtro opcional"""
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+def expressao_busca(filtro):
+    """Converte o texto digitado em uma consulta FTS5 por prefixo.
 
-        if filtro:
-            cursor.execute('''
-                SELECT * FROM produtos
-                WHERE codigo LIKE ? OR nome LIKE ?
-                ORDER BY nome
-            ''', (f'%{filtro}%', f'%{filtro}%'))
-        else:
-            cursor.execute('SELECT * FROM produtos ORDER BY nome')
+    Cada palavra vira um prefixo entre aspas ("cane"*), e todas precisam
+    aparecer: "cane azul" acha "Caneca Azul". Retorna None se não sobrar
+    nenhuma palavra.
+    """
+    termos = [t.replace('"', '') for t in filtro.split()]
+    termos = [f'"{t}"*' for t in termos if t]
+    return " ".join(termos) or None
 
-        produtos = cursor.fetchall()
-        conn.close()
-        logging.info(f"Busca realizada - {len(produtos)} produtos encontrados")
+
+# Ordenações da paginação: coluna -> posição dela na linha de produtos.
+# O código desempata, então (coluna, codigo) identifica a posição na
+# ordem; os índices da migração 6 cobrem esses pares.
+ORDENS_PRODUTOS = {'nome': 1, 'codigo': 0, 'quantidade': 3}
+
+
+def buscar_produtos_db(filtro=None, limite=-1, apos=None, ordem=None):
+    """Busca produtos no banco de dados com filtro opcional.
+
+    Sem `ordem`: com filtro, os `limite` mais relevantes (-1 = todos);
+    sem filtro, o catálogo inteiro por nome.
+    Com `ordem` ('nome', 'codigo' ou 'quantidade'): página de até
+    `limite` produtos nessa ordem, começando depois da linha `apos`
+    (a última da página anterior; None = primeira página).
+    """
+    try:
+        with conexao() as conn:
+            consulta = expressao_busca(filtro) if filtro else None
+            if filtro and consulta is None:
+                return []
+
+            if ordem is not None:
+                produtos = pagina_produtos(conn, consulta, limite, apos, ordem)
+            elif consulta:
+                # Ordena e limita dentro do FTS5 (bm25, ver migração 5)
+                # antes de buscar as linhas de produtos
+                produtos = conn.execute('''
+                    SELECT p.* FROM (
+                        SELECT rowid, rank FROM produtos_fts
+                        WHERE produtos_fts MATCH ?
+                        ORDER BY rank LIMIT ?
+                    ) f
+                    JOIN produtos p ON p.rowid = f.rowid
+                    ORDER BY f.rank
+                ''', (consulta, limite)).fetchall()
+            else:
+                produtos = catalogo.listar()
+
+        logging.debug("Busca realizada - %d produtos encontrados", len(produtos))
         return produtos
 
     except Exception as e:
-        logging.error(f"ERRO ao buscar produtos: {e}")
+        logging.error("ERRO ao buscar produtos: %s", e)
         return []  # Retorna lista vazia em caso de erro
 
 
+def pagina_produtos(conn, consulta, limite, apos, ordem):
+    """Paginação por keyset: WHERE (coluna, codigo) > (?, ?) + índice.
+
+    Ao contrário de OFFSET, o custo não cresce com o número da página.
+    """
+    posicao = ORDENS_PRODUTOS[ordem]
+    condicoes, parametros = [], []
+    if consulta:
+        condicoes.append(
+            "rowid IN (SELECT rowid FROM produtos_fts WHERE produtos_fts MATCH ?)")
+        parametros.append(consulta)
+    if apos is not None:
+        if ordem == 'codigo':
+            condicoes.append("codigo > ?")
+            parametros.append(apos[0])
+        else:
+            condicoes.append(f"({ordem}, codigo) > (?, ?)")
+            parametros.extend((apos[posicao], apos[0]))
+
+    where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+    ordenacao = "codigo" if ordem == 'codigo' else f"{ordem}, codigo"
+    return conn.execute(f'''
+        SELECT * FROM produtos {where}
+        ORDER BY {ordenacao} LIMIT ?
+    ''', (*parametros, limite)).fetchall()
+
+
+def sugerir_produtos_db(texto, limite=8):
+    """Sugestões para o seletor de produtos enquanto se digita.
+
+    Em ordem: produto com o código exato, produtos cujo nome começa com
+    o texto (índice por nome do catálogo em memória) e, se ainda faltar,
+    produtos com palavras que começam com os termos (FTS5, sem ranking:
+    pega as primeiras ocorrências, o que mantém o custo baixo mesmo
+    para termos muito comuns).
+    """
+    texto = texto.strip()
+    if not texto:
+        return []
+    try:
+        sugestoes = {}
+        exato = catalogo.obter(texto)
+        if exato:
+            sugestoes[exato[0]] = exato
+        for produto in catalogo.com_prefixo(texto, limite):
+            sugestoes.setdefault(produto[0], produto)
+
+        consulta = expressao_busca(texto)
+        if len(sugestoes) < limite and consulta:
+            with conexao() as conn:
+                extras = conn.execute('''
+                    SELECT * FROM produtos
+                    WHERE rowid IN (
+                        SELECT rowid FROM produtos_fts
+                        WHERE produtos_fts MATCH ? LIMIT ?
+                    )
+                    ORDER BY nome
+                ''', (consulta, limite * 2)).fetchall()
+            for produto in extras:
+                sugestoes.setdefault(produto[0], produto)
+
+        return list(sugestoes.values())[:limite]
+
+    except Exception as e:
+        logging.error("ERRO ao sugerir produtos para '%s': %s", texto, e)
+        return []
+
+
 def buscar_produto_db(codigo):
     """Busca um produto específico pelo código"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM produtos WHERE codigo = ?', (codigo,))
-        produto = cursor.fetchone()
-        conn.close()
-        return produto
+        return catalogo.obter(codigo)
 
     except Exception as e:
-        logging.error(f"ERRO ao buscar produto {codigo}: {e}")
+        logging.error("ERRO ao buscar produto %s: %s", codigo, e)
         return None
 
 
 def excluir_produto_db(codigo):
     """Exclui um produto do banco de dados"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM produtos WHERE codigo = ?', (codigo,))
-        conn.commit()
-        conn.close()
-        logging.info(f"Produto excluído: {codigo}")
+        with transacao(imediata=True) as conn:
+            antes = versao_catalogo_banco(conn)
+            conn.execute('DELETE FROM produtos WHERE codigo = ?', (codigo,))
+            depois = versao_catalogo_banco(conn)
+        catalogo.remover(codigo, (antes, depois))
+        logging.info("Produto excluído: %s", codigo)
 
     except Exception as e:
-        logging.error(f"ERRO ao excluir produto {codigo}: {e}")
+        logging.error("ERRO ao excluir produto %s: %s", codigo, e)
         raise
 
 
 def atualizar_estoque_db(codigo, quantidade):
     """Atualiza o estoque de um produto"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute('''
-        UPDATE produtos
-        SET quantidade = quantidade + ?
-        WHERE codigo = ?
-        ''', (quantidade, codigo))
-        conn.commit()
-        conn.close()
-        logging.info(f"Estoque atualizado: {codigo} + {quantidade}")
+        with transacao(imediata=True) as conn:
+            antes = versao_catalogo_banco(conn)
+            conn.execute('''
+            UPDATE produtos
+            SET quantidade = quantidade + ?
+            WHERE codigo = ?
+            ''', (quantidade, codigo))
+            depois = versao_catalogo_banco(conn)
+        catalogo.ajustar_estoque([(codigo, quantidade)], (antes, depois))
+        logging.info("Estoque atualizado: %s + %d", codigo, quantidade)
 
     except Exception as e:
-        logging.error(f"ERRO ao atualizar estoque {codigo}: {e}")
+        logging.error("ERRO ao atualizar estoque %s: %s", codigo, e)
         raise
 
 
+class EstoqueInsuficiente(Exception):
+    """Levantada dentro da transação para desfazê-la; carrega os conflitos"""
+
+    def __init__(self, conflitos):
+        super().__init__(f"Estoque insuficiente: {conflitos}")
+        self.conflitos = conflitos
+
+
 def registrar_venda_db(venda, itens, dados_cartao=None):
-    """Registra uma venda e seus itens no banco de dados"""
+    """Registra a venda, seus itens e a baixa de estoque numa única transação.
+
+    Retorna {'venda_id': id, 'conflitos': []}. Se algum item não tiver
+    estoque suficiente nada é gravado: venda_id vem None e 'conflitos'
+    lista {'codigo', 'nome', 'solicitado', 'disponivel'} de cada produto
+    (somando as linhas do mesmo código). Quantidade <= 0 levanta ValueError.
+    """
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        # IMMEDIATE: outro terminal não consegue baixar o mesmo estoque
+        # entre a conferência e a gravação
+        with transacao(imediata=True) as conn:
+            antes = versao_catalogo_banco(conn)
+            venda_id = gravar_venda(conn.cursor(), venda, itens, dados_cartao)
+            depois = versao_catalogo_banco(conn)
+        catalogo.ajustar_estoque(
+            [(item['codigo'], -item['quantidade']) for item in itens],
+            (antes, depois))
+        marcar_vendas_alteradas()
+
+        logging.info("Venda registrada: ID %d", venda_id)
+        return {'venda_id': venda_id, 'conflitos': []}
+
+    except EstoqueInsuficiente as e:
+        logging.warning("Venda recusada por falta de estoque: %s", e.conflitos)
+        return {'venda_id': None, 'conflitos': e.conflitos}
 
-        # Insere a venda principal
-        cursor.execute('''
-        INSERT INTO vendas
-        (data_venda, total, forma_pagamento, valor_recebido, troco)
-        VALUES (?, ?, ?, ?, ?)
-        ''', (
-            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            venda['total'],
-            venda['forma_pagamento'],
-            venda.get('valor_recebido'),
-            venda.get('troco')
-        ))
+    except Exception as e:
+        logging.error("ERRO ao registrar venda: %s", e)
+        raise
 
-        venda_id = cursor.lastrowid
 
-        # Insere os dados do cartão se houver
-        if dados_cartao:
-            cursor.execute('''
-            INSERT INTO dados_cartao
-            (venda_id, nome_cliente, tipo_cartao, parcelas)
-            VALUES (?, ?, ?, ?)
-            ''', (
-                venda_id,
-                dados_cartao.get('nome_cliente'),
-                dados_cartao.get('tipo_cartao'),
-                dados_cartao.get('parcelas')
-            ))
-
-        # Insere os itens vendidos
-        for item in itens:
-            cursor.execute('''
-            INSERT INTO itens_vendidos
-            (venda_id, produto_codigo, nome, preco_unitario, quantidade, subtotal)
-            VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                venda_id,
-                item['codigo'],
-                item['nome'],
-                item['preco'],
-                item['quantidade'],
-                item['subtotal']
-            ))
-
-        conn.commit()
-        conn.close()
-        logging.info(f"Venda registrada: ID {venda_id}")
-        return venda_id
+def registrar_vendas_lote(vendas, baixar_estoque=True):
+    """Registra várias vendas numa única transação.
+
+    Usado para reenviar vendas feitas offline ou importar histórico.
+    `vendas` é uma sequência de (venda, itens) ou (venda, itens, dados_cartao);
+    a data de cada venda vem de venda['data_venda'] quando informada.
+    Tudo ou nada: se alguma venda não tiver estoque, nenhuma é gravada e
+    os conflitos trazem também o 'indice' da venda na sequência.
+    Retorna {'venda_ids': [...], 'conflitos': [...]}.
+    """
+    venda_ids = []
+    baixas = []
+    indice = 0
+    historico = False   # Alguma venda trouxe data própria (dia passado)
+    try:
+        with transacao(imediata=True) as conn:
+            antes = versao_catalogo_banco(conn)
+            cursor = conn.cursor()
+            for indice, registro in enumerate(vendas):
+                historico = historico or 'data_venda' in registro[0]
+                venda_ids.append(gravar_venda(cursor, *registro,
+                                              baixar_estoque=baixar_estoque))
+                if baixar_estoque:
+                    baixas.extend((item['codigo'], -item['quantidade'])
+                                  for item in registro[1])
+            depois = versao_catalogo_banco(conn)
+        if baixas:
+            catalogo.ajustar_estoque(baixas, (antes, depois))
+        marcar_vendas_alteradas(historico)
+
+        logging.info("Lote de vendas registrado: %d vendas", len(venda_ids))
+        return {'venda_ids': venda_ids, 'conflitos': []}
+
+    except EstoqueInsuficiente as e:
+        conflitos = [dict(c, indice=indice) for c in e.conflitos]
+        logging.warning("Lote recusado por falta de estoque: %s", conflitos)
+        return {'venda_ids': [], 'conflitos': conflitos}
 
     except Exception as e:
-        logging.error(f"ERRO ao registrar venda: {e}")
+        logging.error("ERRO ao registrar lote de vendas: %s", e)
         raise
 
+
+def gravar_venda(cursor, venda, itens, dados_cartao=None, baixar_estoque=True):
+    """Grava uma venda no cursor de uma transação já aberta; retorna o ID"""
+    for item in itens:
+        # Quantidade negativa somaria ao estoque na baixa abaixo
+        if item['quantidade'] <= 0:
+            raise ValueError(
+                f"Quantidade inválida para {item['codigo']}: {item['quantidade']}")
+
+    if baixar_estoque:
+        conflitos = conferir_estoque(cursor, itens)
+        if conflitos:
+            raise EstoqueInsuficiente(conflitos)
+
+        # Baixa o estoque; a condição quantidade >= ? é a garantia final
+        # contra venda acima do estoque
+        cursor.executemany('''
+        UPDATE produtos
+        SET quantidade = quantidade - ?
+        WHERE codigo = ? AND quantidade >= ?
+        ''', [(item['quantidade'], item['codigo'], item['quantidade'])
+              for item in itens])
+        if cursor.rowcount != len(itens):
+            raise sqlite3.IntegrityError("Estoque alterado durante a venda")
+
+    # Insere a venda principal
+    data_venda = venda.get('data_venda') or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    cursor.execute('''
+    INSERT INTO vendas
+    (data_venda, total, forma_pagamento, valor_recebido, troco)
+    VALUES (?, ?, ?, ?, ?)
+    ''', (
+        data_venda,
+        venda['total'],
+        venda['forma_pagamento'],
+        venda.get('valor_recebido'),
+        venda.get('troco')
+    ))
+
+    venda_id = cursor.lastrowid
+
+    # Insere os dados do cartão se houver
+    if dados_cartao:
+        cursor.execute('''
+        INSERT INTO dados_cartao
+        (venda_id, nome_cliente, tipo_cartao, parcelas)
+        VALUES (?, ?, ?, ?)
+        ''', (
+            venda_id,
+            dados_cartao.get('nome_cliente'),
+            dados_cartao.get('tipo_cartao'),
+            dados_cartao.get('parcelas')
+        ))
+
+    # Insere os itens vendidos (um único comando preparado para todos)
+    cursor.executemany('''
+    INSERT INTO itens_vendidos
+    (venda_id, produto_codigo, nome, preco_unitario, quantidade, subtotal)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ''', [(
+        venda_id,
+        item['codigo'],
+        item['nome'],
+        item['preco'],
+        item['quantidade'],
+        item['subtotal']
+    ) for item in itens])
+
+    acumular_resumos(cursor, data_venda[:10], venda, itens)
+    return venda_id
+
+
+def acumular_resumos(cursor, dia, venda, itens):
+    """Soma a venda às tabelas de resumo diário (migração 7).
+
+    Roda na mesma transação da venda, então os resumos nunca ficam
+    fora de sincronia com vendas/itens_vendidos.
+    """
+    cursor.execute('''
+    INSERT INTO vendas_diarias (dia, quantidade, total) VALUES (?, 1, ?)
+    ON CONFLICT(dia) DO UPDATE SET
+        quantidade = quantidade + 1,
+        total = total + excluded.total
+    ''', (dia, venda['total']))
+    cursor.execute('''
+    INSERT INTO vendas_diarias_pagamento (dia, forma_pagamento, quantidade, total)
+    VALUES (?, ?, 1, ?)
+    ON CONFLICT(dia, forma_pagamento) DO UPDATE SET
+        quantidade = quantidade + 1,
+        total = total + excluded.total
+    ''', (dia, venda['forma_pagamento'], venda['total']))
+    cursor.executemany('''
+    INSERT INTO produto_vendas_diarias (dia, produto_codigo, nome, quantidade, total)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(dia, produto_codigo, nome) DO UPDATE SET
+        quantidade = quantidade + excluded.quantidade,
+        total = total + excluded.total
+    ''', [(dia, item['codigo'], item['nome'], item['quantidade'], item['subtotal'])
+          for item in itens])
+
+
+def conferir_estoque(cursor, itens):
+    """Lista os produtos cujo pedido excede o estoque atual.
+
+    O mesmo código pode vir em mais de uma linha: as quantidades são
+    somadas por produto antes de comparar, e o conflito sai uma vez só.
+    """
+    pedidos = {}    # codigo -> (nome, quantidade total)
+    for item in itens:
+        nome, quantidade = pedidos.get(item['codigo'], (item['nome'], 0))
+        pedidos[item['codigo']] = (nome, quantidade + item['quantidade'])
+
+    conflitos = []
+    for codigo, (nome, solicitado) in pedidos.items():
+        cursor.execute(
+            'SELECT quantidade FROM produtos WHERE codigo = ?', (codigo,))
+        linha = cursor.fetchone()
+        disponivel = linha[0] if linha else 0
+        if solicitado > disponivel:
+            conflitos.append({
+                'codigo': codigo,
+                'nome': nome,
+                'solicitado': solicitado,
+                'disponivel': disponivel,
+            })
+    return conflitos
+
+
 def obter_venda(venda_id):
     """Busca uma venda pelo ID"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM vendas WHERE id = ?", (venda_id,))
-        venda = cursor.fetchone()
-        conn.close()
-        return venda
+        with conexao() as conn:
+            return conn.execute(
+                "SELECT * FROM vendas WHERE id = ?", (venda_id,)).fetchone()
     except Exception as e:
-        logging.error(f"ERRO ao buscar venda {venda_id}: {e}")
+        logging.error("ERRO ao buscar venda %s: %s", venda_id, e)
         return None
 
 def obter_itens_venda(venda_id):
     """Busca os itens de uma venda pelo ID"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM itens_vendidos WHERE venda_id = ?", (venda_id,))
-        itens = cursor.fetchall()
-        conn.close()
-        return itens
+        with conexao() as conn:
+            return conn.execute(
+                "SELECT * FROM itens_vendidos WHERE venda_id = ?", (venda_id,)).fetchall()
+    except Exception as e:
+        logging.error("ERRO ao buscar itens da venda %s: %s", venda_id, e)
+        return []
+
+
+def obter_venda_com_itens(venda_id):
+    """Venda e seus itens numa única consulta (usado pelos comprovantes).
+
+    Uma linha por item: (id, data_venda, total, forma_pagamento,
+    valor_recebido, troco, produto_codigo, nome, preco_unitario,
+    quantidade, subtotal); as colunas do item vêm None se a venda não
+    tiver itens. Lista vazia se a venda não existir.
+    """
+    try:
+        with conexao() as conn:
+            return conn.execute("""
+                SELECT v.id, v.data_venda, v.total, v.forma_pagamento,
+                       v.valor_recebido, v.troco,
+                       i.produto_codigo, i.nome, i.preco_unitario,
+                       i.quantidade, i.subtotal
+                FROM vendas v
+                LEFT JOIN itens_vendidos i ON i.venda_id = v.id
+                WHERE v.id = ?
+                ORDER BY i.id
+            """, (venda_id,)).fetchall()
     except Exception as e:
-        logging.error(f"ERRO ao buscar itens da venda {venda_id}: {e}")
+        logging.error("ERRO ao buscar venda %s com itens: %s", venda_id, e)
         return []
 
 # ==============================================================
@@ -359,5 +674,5 @@ def inicializar_banco():
         logging.info("Banco inicializado com sucesso")
         return True
     except Exception as e:
-        logging.error(f"FALHA na inicialização do banco: {e}")
+        logging.error("FALHA na inicialização do banco: %s", e)
         return False
@@ -0,0 +1,49 @@
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+# ==============================================================
+# VALORES MONETÁRIOS EM CENTAVOS
+# ==============================================================
+#
+# Todo valor em dinheiro circula como int de centavos: no banco
+# (colunas INTEGER), no carrinho e nos relatórios. Somas são exatas e
+# só viram texto (ou float, para os gráficos) na hora de exibir.
+
+
+def centavos(valor):
+    """Converte um valor em reais (texto, float, int ou Decimal) para centavos.
+
+    Aceita "12.5", "12,50", "R$ 1.234,56". Levanta ValueError se o valor
+    não for um número.
+    """
+    if isinstance(valor, str):
+        texto = valor.strip().replace("R$", "").replace(" ", "")
+        if "," in texto:
+            # Formato brasileiro: ponto de milhar e vírgula decimal
+            texto = texto.replace(".", "").replace(",", ".")
+        valor = texto
+    elif isinstance(valor, float):
+        valor = repr(valor)
+
+    try:
+        reais = Decimal(valor)
+        return int((reais * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"Valor monetário inválido: {valor!r}")
+
+
+def reais(valor_centavos):
+    """Valor em reais como float (somente para gráficos)"""
+    return valor_centavos / 100
+
+
+def formatar_valor(valor_centavos, milhar=False):
+    """Centavos como texto com duas casas: 1234 -> '12.34'"""
+    sinal = "-" if valor_centavos < 0 else ""
+    inteiro, resto = divmod(abs(valor_centavos), 100)
+    inteiro = f"{inteiro:,}" if milhar else str(inteiro)
+    return f"{sinal}{inteiro}.{resto:02d}"
+
+
+def formatar_reais(valor_centavos, milhar=False):
+    """Centavos como texto monetário: 1234 -> 'R$ 12.34'"""
+    return f"R$ {formatar_valor(valor_centavos, milhar)}"
@@ -1,4 +1,17 @@
 # -*- mode: python ; coding: utf-8 -*-
+import os
+import sys
+
+# Build enxuto para os PCs do caixa: sem pacotes que o app não usa (ver
+# PACOTES_EXCLUIDOS em analise_build.py), bytecode pré-compilado e sem
+# UPX, que descompacta as DLLs a cada abertura do programa.
+# GRACA_UPX=1 liga o UPX de novo quando o tamanho importar mais que o tempo.
+# Depois do build: `python analise_build.py` (tamanho e módulos) e
+# `python benchmark.py inicio` (abertura a frio e a quente).
+sys.path.insert(0, SPECPATH)
+from analise_build import PACOTES_EXCLUIDOS
+
+USAR_UPX = os.environ.get('GRACA_UPX') == '1'
 
 block_cipher = None
 
@@ -12,9 +25,9 @@ a = Analysis(
         'sqlite3',
         'datetime',
         'asyncio',
-        'traceback',
-        'pandas',
+        # Importados só dentro de funções (carregamento tardio, ver app.py)
         'relatorio',
+        'qr_comprovante',
         'database',
         'qrcode',
         'PIL',
@@ -22,11 +35,14 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=PACOTES_EXCLUIDOS,
     win_no_prefer_redirects=False,
     win_private_assemblies=False,
     cipher=block_cipher,
     noarchive=False,
+    # Remove os asserts do bytecode; 2 tiraria também as docstrings, que
+    # migracoes.py usa nas mensagens de log
+    optimize=1,
 )
 pyz = PYZ(a.pure, a.zipped_data, cipher=block_cipher)
 
@@ -39,7 +55,7 @@ exe = EXE(
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
+    upx=USAR_UPX,
     console=False,
     disable_windowed_traceback=False,
     argv_emulation=False,
@@ -55,6 +71,6 @@ coll = COLLECT(
     a.zipfiles,
     name='Graça_Presentes',
     strip=False,
-    upx=True,
+    upx=USAR_UPX,
     upx_exclude=[],
-)
\ No newline at end of file
+)
@@ -0,0 +1,95 @@
+import os
+import sys
+import queue
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# ==============================================================
+# LOGGING ASSÍNCRONO COM ROTAÇÃO
+# ==============================================================
+#
+# Quem chama logging.info(...) só coloca o registro numa fila em memória
+# (QueueHandler); uma thread própria (QueueListener) formata e grava no
+# arquivo. Assim uma venda nunca espera pelo disco por causa de um log.
+# O arquivo gira ao passar de TAMANHO_ARQUIVO, guardando ARQUIVOS_ANTIGOS
+# cópias (erros.log.1, erros.log.2, ...).
+#
+# A verbosidade vem da variável de ambiente GRACA_LOG:
+#   silencioso  só avisos e erros
+#   normal      + eventos do sistema (vendas, migrações...) [padrão]
+#   detalhado   + mensagens de depuração do app
+#   flet        + protocolo interno do Flet (muito volume)
+
+ARQUIVO_LOG = 'erros.log'
+TAMANHO_ARQUIVO = 1024 * 1024   # bytes
+ARQUIVOS_ANTIGOS = 3
+FORMATO = '%(asctime)s - %(levelname)s - %(name)s - %(message)s'
+
+# Verbosidade -> (nível do app, nível dos módulos internos do Flet)
+VERBOSIDADES = {
+    'silencioso': (logging.WARNING, logging.WARNING),
+    'normal': (logging.INFO, logging.WARNING),
+    'detalhado': (logging.DEBUG, logging.WARNING),
+    'flet': (logging.DEBUG, logging.DEBUG),
+}
+VERBOSIDADE_PADRAO = 'normal'
+
+# Loggers do Flet (protocolo, websocket, runtime) e do asyncio
+MODULOS_INTERNOS = ('flet', 'flet_core', 'flet_runtime', 'flet_desktop', 'asyncio')
+
+_ouvinte = None
+_manipulador = None
+
+
+def pasta_log():
+    """Pasta do executável (PyInstaller) ou do código-fonte"""
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def configurar_logging(verbosidade=None, arquivo=None):
+    """Liga o logging em fila com arquivo rotativo (só na primeira chamada)"""
+    global _ouvinte, _manipulador
+    if _ouvinte is not None:
+        return
+
+    verbosidade = verbosidade or os.environ.get('GRACA_LOG', VERBOSIDADE_PADRAO)
+    if verbosidade not in VERBOSIDADES:
+        print(f"GRACA_LOG desconhecido: {verbosidade!r}; usando '{VERBOSIDADE_PADRAO}'")
+        verbosidade = VERBOSIDADE_PADRAO
+    nivel_app, nivel_interno = VERBOSIDADES[verbosidade]
+
+    try:
+        destino = RotatingFileHandler(
+            arquivo or os.path.join(pasta_log(), ARQUIVO_LOG),
+            maxBytes=TAMANHO_ARQUIVO, backupCount=ARQUIVOS_ANTIGOS,
+            encoding='utf-8', delay=True)
+    except Exception as e:
+        print(f"Erro no logging: {e}")
+        return
+    destino.setFormatter(logging.Formatter(FORMATO))
+
+    fila = queue.SimpleQueue()
+    raiz = logging.getLogger()
+    raiz.setLevel(nivel_app)
+    _manipulador = QueueHandler(fila)
+    raiz.addHandler(_manipulador)
+    for nome in MODULOS_INTERNOS:
+        logging.getLogger(nome).setLevel(nivel_interno)
+
+    _ouvinte = QueueListener(fila, destino)
+    _ouvinte.start()
+    # Ao sair, grava o que ainda estiver na fila
+    atexit.register(parar_logging)
+    logging.info("=== INICIANDO APLICATIVO (log %s) ===", verbosidade)
+
+
+def parar_logging():
+    """Esvazia a fila no arquivo e para a thread de gravação"""
+    global _ouvinte, _manipulador
+    if _ouvinte is not None:
+        logging.getLogger().removeHandler(_manipulador)
+        _ouvinte.stop()
+        _ouvinte = _manipulador = None
@@ -0,0 +1,43 @@
+"""Tarefas de manutenção do banco.
+
+Uso:
+    python manutencao.py resumos    # recalcula os resumos diários de vendas
+    python manutencao.py busca      # refaz o índice de busca de produtos
+
+Os resumos são mantidos a cada venda; recalculá-los só é preciso depois
+de mexer nas tabelas vendas/itens_vendidos por fora do sistema (ex.:
+importação manual ou correção de uma venda direto no banco).
+"""
+import argparse
+import time
+
+import database
+from migracoes import reconstruir_resumos, reconstruir_busca_produtos
+
+
+def executar(nome, refazer):
+    """Roda `refazer(conn)` numa transação exclusiva e mede o tempo"""
+    database.criar_banco()  # Garante o esquema (e as migrações) em dia
+    inicio = time.perf_counter()
+    with database.transacao(imediata=True) as conn:
+        refazer(conn)
+    print(f"{nome} refeito em {time.perf_counter() - inicio:.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="tarefa", required=True)
+    sub.add_parser("resumos", help="Recalcula os resumos diários de vendas")
+    sub.add_parser("busca", help="Refaz o índice de busca de produtos")
+    args = parser.parse_args()
+
+    if args.tarefa == "resumos":
+        executar("Resumos diários", reconstruir_resumos)
+    else:
+        executar("Índice de busca", reconstruir_busca_produtos)
+    database.gerenciador.checkpoint()
+    database.gerenciador.fechar_todas()
+
+
+if __name__ == "__main__":
+    main()
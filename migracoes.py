@@ -0,0 +1,353 @@
+import logging
+
+# ==============================================================
+# MIGRAÇÕES VERSIONADAS DO ESQUEMA
+# ==============================================================
+#
+# A versão do esquema fica em PRAGMA user_version. Cada migração é uma
+# função registrada com @migracao(N) e roda uma única vez, em ordem,
+# dentro de uma transação que também grava a nova versão.
+#
+# Dois terminais podem abrir o app juntos depois de uma atualização:
+# cada passo roda sob BEGIN IMMEDIATE e relê a versão dentro da
+# transação, então só o primeiro aplica a migração; o outro espera a
+# trava de escrita (busy_timeout), vê a versão nova e pula o passo.
+
+MIGRACOES = []
+
+
+def migracao(versao):
+    """Registra a função decorada como a migração de número `versao`"""
+    def registrar(funcao):
+        MIGRACOES.append((versao, funcao))
+        MIGRACOES.sort(key=lambda m: m[0])
+        return funcao
+    return registrar
+
+
+def versao_atual(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def aplicar_migracoes(gerenciador):
+    """Aplica as migrações pendentes; retorna a versão final do esquema"""
+    with gerenciador.conexao() as conn:
+        versao = versao_atual(conn)
+
+    for numero, funcao in MIGRACOES:
+        if numero <= versao:
+            continue
+
+        with gerenciador.transacao(imediata=True) as conn:
+            # A leitura de fora da transação pode estar velha: outro
+            # processo pode ter aplicado este passo nesse meio tempo
+            versao = versao_atual(conn)
+            if numero <= versao:
+                logging.info("Migração %d já aplicada por outro processo", numero)
+                continue
+            logging.info("Aplicando migração %d: %s", numero, funcao.__doc__)
+            funcao(conn)
+            conn.execute(f"PRAGMA user_version = {numero}")
+        versao = numero
+
+    return versao
+
+
+# ==============================================================
+# MIGRAÇÕES
+# ==============================================================
+
+
+@migracao(1)
+def indices_itens_vendidos(conn):
+    """Índices de itens_vendidos por venda e por produto"""
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_itens_venda ON itens_vendidos(venda_id)")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_itens_produto ON itens_vendidos(produto_codigo)")
+
+
+@migracao(2)
+def indices_vendas(conn):
+    """Índices de vendas por data e por forma de pagamento"""
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_vendas_data ON vendas(data_venda)")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_vendas_pagamento ON vendas(forma_pagamento)")
+
+
+@migracao(3)
+def indice_dados_cartao(conn):
+    """Índice de dados_cartao por venda"""
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_cartao_venda ON dados_cartao(venda_id)")
+
+
+def reconstruir_tabela(conn, tabela, ddl, colunas):
+    """Recria `tabela` com o DDL novo, copiando os dados.
+
+    `colunas` mapeia cada coluna nova para a expressão SQL que a preenche
+    a partir da tabela antiga. Índices da tabela devem ser recriados por
+    quem chamar.
+    """
+    nova = f"{tabela}_nova"
+    conn.execute(ddl.format(tabela=nova))
+    conn.execute(f"""
+        INSERT INTO {nova} ({', '.join(colunas)})
+        SELECT {', '.join(colunas.values())} FROM {tabela}
+    """)
+    conn.execute(f"DROP TABLE {tabela}")
+    conn.execute(f"ALTER TABLE {nova} RENAME TO {tabela}")
+
+
+def em_centavos(coluna):
+    return f"CAST(ROUND({coluna} * 100) AS INTEGER)"
+
+
+def tipo_coluna(conn, tabela, coluna):
+    """Tipo declarado da coluna (ex.: 'REAL', 'INTEGER'), em maiúsculas"""
+    for _, nome, tipo, *_ in conn.execute(f"PRAGMA table_info({tabela})"):
+        if nome == coluna:
+            return tipo.upper()
+    return None
+
+
+@migracao(4)
+def valores_em_centavos(conn):
+    """Valores monetários de REAL (reais) para INTEGER (centavos)"""
+    # Multiplicar por 100 duas vezes estragaria todos os valores: cada
+    # tabela só é convertida se a coluna de dinheiro ainda for REAL
+    # (lido na mesma transação IMMEDIATE que grava a versão)
+    for tabela, coluna, converter in (
+            ("produtos", "preco", converter_produtos_em_centavos),
+            ("vendas", "total", converter_vendas_em_centavos),
+            ("itens_vendidos", "subtotal", converter_itens_em_centavos)):
+        if tipo_coluna(conn, tabela, coluna) == "REAL":
+            converter(conn)
+        else:
+            logging.warning("%s.%s já não é REAL: tabela não convertida",
+                            tabela, coluna)
+
+    # DROP TABLE leva os índices junto: recria os das migrações 1 e 2
+    indices_itens_vendidos(conn)
+    indices_vendas(conn)
+
+
+def converter_produtos_em_centavos(conn):
+    reconstruir_tabela(conn, "produtos", '''
+        CREATE TABLE {tabela} (
+            codigo TEXT PRIMARY KEY,
+            nome TEXT NOT NULL,
+            preco INTEGER NOT NULL,
+            quantidade INTEGER NOT NULL,
+            categoria TEXT NOT NULL,
+            descricao TEXT,
+            data_cadastro TEXT NOT NULL,
+            image_path TEXT
+        )
+    ''', {
+        'codigo': 'codigo',
+        'nome': 'nome',
+        'preco': em_centavos('preco'),
+        'quantidade': 'quantidade',
+        'categoria': 'categoria',
+        'descricao': 'descricao',
+        'data_cadastro': 'data_cadastro',
+        'image_path': 'image_path',
+    })
+
+
+def converter_vendas_em_centavos(conn):
+    reconstruir_tabela(conn, "vendas", '''
+        CREATE TABLE {tabela} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data_venda TEXT NOT NULL,
+            total INTEGER NOT NULL,
+            forma_pagamento TEXT NOT NULL,
+            valor_recebido INTEGER,
+            troco INTEGER
+        )
+    ''', {
+        'id': 'id',
+        'data_venda': 'data_venda',
+        'total': em_centavos('total'),
+        'forma_pagamento': 'forma_pagamento',
+        'valor_recebido': em_centavos('valor_recebido'),
+        'troco': em_centavos('troco'),
+    })
+
+
+def converter_itens_em_centavos(conn):
+    reconstruir_tabela(conn, "itens_vendidos", '''
+        CREATE TABLE {tabela} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            venda_id INTEGER NOT NULL,
+            produto_codigo TEXT NOT NULL,
+            nome TEXT NOT NULL,
+            preco_unitario INTEGER NOT NULL,
+            quantidade INTEGER NOT NULL,
+            subtotal INTEGER NOT NULL,
+            FOREIGN KEY (venda_id) REFERENCES vendas(id),
+            FOREIGN KEY (produto_codigo) REFERENCES produtos(codigo)
+        )
+    ''', {
+        'id': 'id',
+        'venda_id': 'venda_id',
+        'produto_codigo': 'produto_codigo',
+        'nome': 'nome',
+        'preco_unitario': em_centavos('preco_unitario'),
+        'quantidade': 'quantidade',
+        'subtotal': em_centavos('subtotal'),
+    })
+
+
+@migracao(5)
+def busca_textual_produtos(conn):
+    """Índice FTS5 de produtos (codigo, nome, categoria, descricao)"""
+    # Tabela de conteúdo externo: o índice guarda só os tokens e aponta
+    # para produtos.rowid. remove_diacritics 2 faz "luminaria" achar
+    # "Luminária"; prefix '2 3' acelera buscas por prefixo curto.
+    # produtos não tem INTEGER PRIMARY KEY, então um VACUUM pode
+    # renumerar os rowids: depois dele, rode reconstruir_busca_produtos.
+    conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS produtos_fts USING fts5(
+            codigo, nome, categoria, descricao,
+            content='produtos', content_rowid='rowid',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )
+    ''')
+
+    # Pesos do bm25 por coluna: nome e código valem mais que categoria
+    # e descrição. A configuração fica gravada no próprio índice.
+    conn.execute('''
+        INSERT INTO produtos_fts (produtos_fts, rank)
+        VALUES ('rank', 'bm25(5.0, 10.0, 2.0, 1.0)')
+    ''')
+
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS produtos_fts_insert
+        AFTER INSERT ON produtos BEGIN
+            INSERT INTO produtos_fts (rowid, codigo, nome, categoria, descricao)
+            VALUES (new.rowid, new.codigo, new.nome, new.categoria, new.descricao);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS produtos_fts_delete
+        AFTER DELETE ON produtos BEGIN
+            INSERT INTO produtos_fts (produtos_fts, rowid, codigo, nome, categoria, descricao)
+            VALUES ('delete', old.rowid, old.codigo, old.nome, old.categoria, old.descricao);
+        END
+    ''')
+    # Só colunas indexadas: baixas de estoque não mexem no índice
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS produtos_fts_update
+        AFTER UPDATE OF codigo, nome, categoria, descricao ON produtos BEGIN
+            INSERT INTO produtos_fts (produtos_fts, rowid, codigo, nome, categoria, descricao)
+            VALUES ('delete', old.rowid, old.codigo, old.nome, old.categoria, old.descricao);
+            INSERT INTO produtos_fts (rowid, codigo, nome, categoria, descricao)
+            VALUES (new.rowid, new.codigo, new.nome, new.categoria, new.descricao);
+        END
+    ''')
+
+    reconstruir_busca_produtos(conn)
+
+
+def reconstruir_busca_produtos(conn):
+    """Refaz o índice FTS5 inteiro a partir da tabela produtos"""
+    conn.execute("INSERT INTO produtos_fts (produtos_fts) VALUES ('rebuild')")
+
+
+@migracao(6)
+def indices_paginacao_produtos(conn):
+    """Índices de produtos para a paginação por nome e por estoque"""
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_produtos_nome ON produtos(nome, codigo)")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_produtos_quantidade ON produtos(quantidade, codigo)")
+
+
+@migracao(7)
+def resumos_diarios(conn):
+    """Tabelas de resumo diário de vendas (por dia, pagamento e produto)"""
+    # Mantidas por database.acumular_resumos na transação de cada venda;
+    # os relatórios leem O(dias) ou O(produtos) linhas em vez de todas
+    # as vendas. WITHOUT ROWID: a chave primária é o próprio índice.
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS vendas_diarias (
+            dia TEXT PRIMARY KEY,
+            quantidade INTEGER NOT NULL,
+            total INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS vendas_diarias_pagamento (
+            dia TEXT NOT NULL,
+            forma_pagamento TEXT NOT NULL,
+            quantidade INTEGER NOT NULL,
+            total INTEGER NOT NULL,
+            PRIMARY KEY (dia, forma_pagamento)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS produto_vendas_diarias (
+            dia TEXT NOT NULL,
+            produto_codigo TEXT NOT NULL,
+            nome TEXT NOT NULL,
+            quantidade INTEGER NOT NULL,
+            total INTEGER NOT NULL,
+            PRIMARY KEY (dia, produto_codigo, nome)
+        ) WITHOUT ROWID
+    ''')
+    reconstruir_resumos(conn)
+
+
+def reconstruir_resumos(conn):
+    """Recalcula as tabelas de resumo diário a partir das vendas"""
+    conn.execute("DELETE FROM vendas_diarias")
+    conn.execute("DELETE FROM vendas_diarias_pagamento")
+    conn.execute("DELETE FROM produto_vendas_diarias")
+    conn.execute('''
+        INSERT INTO vendas_diarias (dia, quantidade, total)
+        SELECT substr(data_venda, 1, 10), COUNT(*), SUM(total)
+        FROM vendas
+        GROUP BY substr(data_venda, 1, 10)
+    ''')
+    conn.execute('''
+        INSERT INTO vendas_diarias_pagamento (dia, forma_pagamento, quantidade, total)
+        SELECT substr(data_venda, 1, 10), forma_pagamento, COUNT(*), SUM(total)
+        FROM vendas
+        GROUP BY substr(data_venda, 1, 10), forma_pagamento
+    ''')
+    conn.execute('''
+        INSERT INTO produto_vendas_diarias
+        (dia, produto_codigo, nome, quantidade, total)
+        SELECT substr(v.data_venda, 1, 10), iv.produto_codigo, iv.nome,
+               SUM(iv.quantidade), SUM(iv.subtotal)
+        FROM itens_vendidos iv
+        JOIN vendas v ON iv.venda_id = v.id
+        GROUP BY substr(v.data_venda, 1, 10), iv.produto_codigo, iv.nome
+    ''')
+
+
+@migracao(8)
+def versao_catalogo(conn):
+    """Contador de alterações em produtos (revalidação do catálogo em memória)"""
+    # Incrementado por gatilho a cada linha inserida, alterada ou
+    # excluída, venha a escrita deste processo ou de outro terminal.
+    # O catálogo em memória (catalogo.py) compara o contador antes de
+    # responder e recarrega se alguém mais mexeu nos produtos.
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS versao_catalogo (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            versao INTEGER NOT NULL
+        )
+    ''')
+    conn.execute("INSERT OR IGNORE INTO versao_catalogo (id, versao) VALUES (1, 0)")
+    for evento in ("INSERT", "UPDATE", "DELETE"):
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS produtos_versao_{evento.lower()}
+            AFTER {evento} ON produtos BEGIN
+                UPDATE versao_catalogo SET versao = versao + 1;
+            END
+        ''')
@@ -0,0 +1,91 @@
+import os
+import sys
+import json
+import time
+import builtins
+
+# ==============================================================
+# PERFIL DE INICIALIZAÇÃO (--profile-startup)
+# ==============================================================
+#
+# `python app.py --profile-startup` imprime quanto tempo cada importação
+# de primeiro nível e cada etapa da inicialização levaram até a primeira
+# tela interativa. Este módulo precisa ser o primeiro importado por
+# app.py: a partir daí ele mede as importações seguintes. Sem a opção,
+# não instala nada e marcar()/relatorio() não fazem nada.
+#
+# Com `--profile-output=ARQUIVO` o perfil vai em JSON para ARQUIVO e o
+# processo sai assim que a primeira tela fica pronta: é o modo usado por
+# `benchmark.py inicio` para medir o executável gerado pelo PyInstaller.
+
+PREFIXO_SAIDA = "--profile-output="
+SAIDA = next((arg[len(PREFIXO_SAIDA):] for arg in sys.argv
+              if arg.startswith(PREFIXO_SAIDA)), None)
+ATIVO = "--profile-startup" in sys.argv or SAIDA is not None
+
+_inicio = time.perf_counter()
+_importacoes = []       # (módulo, ms), só as importações de primeiro nível
+_etapas = []            # (etapa, ms desde o início)
+_profundidade = 0
+_import_original = builtins.__import__
+
+
+def _import_medido(name, globals=None, locals=None, fromlist=(), level=0):
+    """__import__ que cronometra as importações feitas fora de outras"""
+    global _profundidade
+    if _profundidade or level or name in sys.modules:
+        return _import_original(name, globals, locals, fromlist, level)
+    _profundidade += 1
+    inicio = time.perf_counter()
+    try:
+        return _import_original(name, globals, locals, fromlist, level)
+    finally:
+        _profundidade -= 1
+        _importacoes.append((name, (time.perf_counter() - inicio) * 1000))
+
+
+if ATIVO:
+    builtins.__import__ = _import_medido
+
+
+def marcar(etapa):
+    """Registra o fim de uma etapa da inicialização"""
+    if ATIVO:
+        _etapas.append((etapa, (time.perf_counter() - _inicio) * 1000))
+
+
+def relatorio():
+    """Imprime o perfil (uma vez só) e para de medir as importações"""
+    global ATIVO
+    if not ATIVO:
+        return
+    ATIVO = False
+    builtins.__import__ = _import_original
+
+    anterior = _etapas[-1][1] if _etapas else 0.0
+    if SAIDA:
+        with open(SAIDA, "w", encoding="utf-8") as arquivo:
+            json.dump({'primeira_tela_ms': anterior, 'etapas': _etapas,
+                       'importacoes': _importacoes}, arquivo)
+        os._exit(0)  # Só a medição interessa: não abre a interface
+
+    linhas = ["=== Perfil de inicialização ===",
+              "Importações (primeiro nível, inclui as dependências):"]
+    for modulo, ms in sorted(_importacoes, key=lambda i: i[1], reverse=True):
+        if ms >= 1:
+            linhas.append(f"  {modulo:<28} {ms:8.1f} ms")
+    linhas.append("Etapas:")
+    acumulado = 0.0
+    for etapa, ms in _etapas:
+        linhas.append(
+            f"  {etapa:<28} {ms - acumulado:8.1f} ms  (acumulado {ms:8.1f} ms)")
+        acumulado = ms
+    linhas.append(f"Primeira tela interativa em {anterior:.1f} ms "
+                  f"(desde a importação de perfil_inicio)")
+
+    if sys.stdout is not None:
+        print("\n" + "\n".join(linhas) + "\n")
+    else:
+        # Executável sem console (PyInstaller console=False): vai para o log
+        import logging
+        logging.info("\n".join(linhas))
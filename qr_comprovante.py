@@ -0,0 +1,97 @@
+import asyncio
+import base64
+import hashlib
+import threading
+import time
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+# ==============================================================
+# QR CODE DO COMPROVANTE
+# ==============================================================
+#
+# Montar o QR (escolha de versão e máscara) e codificar o PNG leva
+# dezenas de ms em Python puro, então:
+#   1. a geração roda numa thread de trabalho; a tela mostra um
+#      indicador de progresso enquanto isso;
+#   2. as imagens prontas ficam num LRU indexado pelo hash do conteúdo:
+#      "Voltar" e abrir o QR de novo (ou outro botão que peça o mesmo
+#      comprovante) não gera nada outra vez;
+#   3. o conteúdo é o comprovante resumido (formato 'qr' de
+#      comprovante.py) com correção de erro baixa, suficiente para um
+#      QR lido da tela: menos módulos, geração mais rápida.
+#
+# qrcode e PIL só são importados na primeira geração, já na thread.
+
+LADO_PX = 300               # tamanho em que o QR é exibido no modal
+BORDA = 4                   # zona de silêncio (módulos), mínimo da norma
+TAMANHO_CACHE = 32          # imagens guardadas
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="qrcode")
+_lock = threading.Lock()
+_cache = OrderedDict()      # hash do conteúdo -> PNG em base64
+
+
+def chave(conteudo):
+    """Hash do conteúdo do QR (chave do cache)"""
+    return hashlib.blake2b(conteudo.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def em_cache(conteudo):
+    """PNG em base64 já gerado para `conteudo`, ou None"""
+    hash_conteudo = chave(conteudo)
+    with _lock:
+        imagem = _cache.get(hash_conteudo)
+        if imagem is not None:
+            _cache.move_to_end(hash_conteudo)
+        return imagem
+
+
+def gerar_png_base64(conteudo):
+    """Gera (ou reaproveita) o QR de `conteudo` como PNG em base64"""
+    imagem = em_cache(conteudo)
+    if imagem is not None:
+        return imagem
+
+    import qrcode
+    from qrcode.constants import ERROR_CORRECT_L
+
+    inicio = time.perf_counter()
+    qr = qrcode.QRCode(version=None, error_correction=ERROR_CORRECT_L,
+                       border=BORDA)
+    qr.add_data(conteudo)
+    qr.make(fit=True)
+    # Módulos com número inteiro de pixels, perto do tamanho exibido:
+    # a imagem não é ampliada (nem borrada) na tela
+    qr.box_size = max(1, LADO_PX // (qr.modules_count + 2 * BORDA))
+    buffer = BytesIO()
+    qr.make_image(fill_color="black", back_color="white").save(buffer, format="PNG")
+    imagem = base64.b64encode(buffer.getvalue()).decode("ascii")
+    logging.debug("QR Code gerado em %.1f ms (versão %d, %d bytes)",
+                  (time.perf_counter() - inicio) * 1000, qr.version,
+                  len(buffer.getvalue()))
+
+    hash_conteudo = chave(conteudo)
+    with _lock:
+        _cache[hash_conteudo] = imagem
+        _cache.move_to_end(hash_conteudo)
+        while len(_cache) > TAMANHO_CACHE:
+            _cache.popitem(last=False)
+    return imagem
+
+
+async def gerar_em_segundo_plano(conteudo):
+    """gerar_png_base64 na thread de trabalho, sem travar o loop do Flet"""
+    imagem = em_cache(conteudo)
+    if imagem is not None:
+        return imagem
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, gerar_png_base64, conteudo)
+
+
+def limpar_cache():
+    """Esquece as imagens guardadas"""
+    with _lock:
+        _cache.clear()
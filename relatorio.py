@@ -1,52 +1,94 @@
 import flet as ft
-import sqlite3
+import asyncio
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+import database
 from database import *
+from dinheiro import formatar_reais, reais
+from cache_relatorios import CacheRelatorios
 
+# Resultados das consultas abaixo (ver cache_relatorios.py): invalidados
+# por novas vendas e por mudanças no catálogo (o estoque entra no dashboard)
+cache = CacheRelatorios(
+    versao=lambda: (database.versao_vendas, catalogo.versao),
+    versao_historico=lambda: database.versao_historico)
 
+
+def dia_passado(data_alvo):
+    """True para datas anteriores a hoje: novas vendas não as alteram"""
+    return date.fromisoformat(data_alvo) < date.today()
+
+
+def filtro_periodo(inicio=None, fim=None, coluna="data_venda"):
+    """Monta o WHERE semiaberto `inicio <= coluna < fim` e seus parâmetros"""
+    condicoes, params = [], []
+    if inicio:
+        condicoes.append(f"{coluna} >= ?")
+        params.append(inicio)
+    if fim:
+        condicoes.append(f"{coluna} < ?")
+        params.append(fim)
+    where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+    return where, params
+
+
+# As consultas do dashboard leem as tabelas de resumo diário (migração 7,
+# mantidas a cada venda por database.acumular_resumos): O(dias) ou
+# O(produtos) linhas, em vez de varrer vendas/itens_vendidos inteiras.
+# Por isso os períodos [inicio, fim) são datas 'AAAA-MM-DD'.
+
+
+@cache.em_cache()
 def obter_resumo_vendas():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT SUM(total), COUNT(*), AVG(total) FROM vendas")
-    total, qtd, ticket = cursor.fetchone()
-    conn.close()
-    return total or 0, qtd or 0, ticket or 0
+    """Total vendido e ticket médio em centavos, e o número de vendas"""
+    with conexao() as conn:
+        total, qtd = conn.execute(
+            "SELECT SUM(total), SUM(quantidade) FROM vendas_diarias").fetchone()
+    total, qtd = total or 0, qtd or 0
+    # Média arredondada em aritmética inteira (AVG devolveria float)
+    ticket = (total + qtd // 2) // qtd if qtd else 0
+    return total, qtd, ticket
 
 
+@cache.em_cache()
 def obter_formas_pagamento():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT forma_pagamento, COUNT(*) FROM vendas GROUP BY forma_pagamento")
-    dados = cursor.fetchall()
-    conn.close()
+    with conexao() as conn:
+        dados = conn.execute("""
+            SELECT forma_pagamento, SUM(quantidade)
+            FROM vendas_diarias_pagamento
+            GROUP BY forma_pagamento
+        """).fetchall()
     return dados
 
 
-def obter_evolucao_vendas():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT DATE(data_venda), SUM(total)
-        FROM vendas
-        GROUP BY DATE(data_venda)
-        ORDER BY DATE(data_venda)
-    """)
-    dados = cursor.fetchall()
-    conn.close()
+@cache.em_cache()
+def obter_evolucao_vendas(inicio=None, fim=None):
+    """Total por dia, opcionalmente no período [inicio, fim)"""
+    where, params = filtro_periodo(inicio, fim, coluna="dia")
+    with conexao() as conn:
+        dados = conn.execute(f"""
+            SELECT dia, total
+            FROM vendas_diarias
+            {where}
+            ORDER BY dia
+        """, params).fetchall()
     return dados
 
 
-def obter_evolucao_por_pagamento():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT DATE(data_venda), forma_pagamento, SUM(total)
-        FROM vendas
-        GROUP BY DATE(data_venda), forma_pagamento
-        ORDER BY DATE(data_venda)
-    """)
-    rows = cursor.fetchall()
-    conn.close()
+@cache.em_cache()
+def obter_evolucao_por_pagamento(inicio=None, fim=None):
+    """Total por dia e forma de pagamento, opcionalmente no período [inicio, fim)"""
+    where, params = filtro_periodo(inicio, fim, coluna="dia")
+    with conexao() as conn:
+        rows = conn.execute(f"""
+            SELECT dia, forma_pagamento, total
+            FROM vendas_diarias_pagamento
+            {where}
+            ORDER BY dia
+        """, params).fetchall()
 
     dados = {}
     formas = set()
@@ -59,59 +101,51 @@ def obter_evolucao_por_pagamento():
     return sorted(dados.items()), sorted(list(formas))
 
 
+@cache.em_cache()
 def obter_produtos_mais_vendidos():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT nome, SUM(quantidade)
-        FROM itens_vendidos
-        GROUP BY produto_codigo, nome
-        ORDER BY SUM(quantidade) DESC
-    """)
-    dados = cursor.fetchall()
-    conn.close()
+    with conexao() as conn:
+        dados = conn.execute("""
+            SELECT nome, SUM(quantidade)
+            FROM produto_vendas_diarias
+            GROUP BY produto_codigo, nome
+            ORDER BY SUM(quantidade) DESC
+        """).fetchall()
     return dados
 
 
+@cache.em_cache(permanente=dia_passado)
 def obter_vendas_por_dia(data_alvo):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT iv.nome, SUM(iv.quantidade)
-        FROM itens_vendidos iv
-        JOIN vendas v ON iv.venda_id = v.id
-        WHERE DATE(v.data_venda) = ?
-        GROUP BY iv.produto_codigo, iv.nome
-        ORDER BY SUM(iv.quantidade) DESC
-    """, (data_alvo,))
-    resultados = cursor.fetchall()
-    conn.close()
+    """Produtos vendidos no dia 'AAAA-MM-DD', do mais vendido ao menos"""
+    with conexao() as conn:
+        resultados = conn.execute("""
+            SELECT nome, SUM(quantidade)
+            FROM produto_vendas_diarias
+            WHERE dia = ?
+            GROUP BY produto_codigo, nome
+            ORDER BY SUM(quantidade) DESC
+        """, (date.fromisoformat(data_alvo).isoformat(),)).fetchall()
     return resultados
 
 
+@cache.em_cache()
 def obter_dados_estoque():
     """Obtém dados de estoque do banco de dados"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT nome, quantidade FROM produtos ORDER BY quantidade DESC")
-    dados = cursor.fetchall()
-    conn.close()
+    with conexao() as conn:
+        dados = conn.execute(
+            "SELECT nome, quantidade FROM produtos ORDER BY quantidade DESC").fetchall()
     return dados
 
 
+@cache.em_cache()
 def obter_detalhes_cartao():
     """Obtém relatório detalhado de vendas no cartão"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT v.id, v.data_venda, v.total, d.nome_cliente, d.tipo_cartao, d.parcelas
-        FROM vendas v
-        JOIN dados_cartao d ON v.id = d.venda_id
-        ORDER BY v.data_venda DESC
-    """)
-    dados = cursor.fetchall()
-    conn.close()
+    with conexao() as conn:
+        dados = conn.execute("""
+            SELECT v.id, v.data_venda, v.total, d.nome_cliente, d.tipo_cartao, d.parcelas
+            FROM vendas v
+            JOIN dados_cartao d ON v.id = d.venda_id
+            ORDER BY v.data_venda DESC
+        """).fetchall()
     return dados
 
 # ----------------- COMPONENTES -----------------
@@ -121,30 +155,123 @@ TEXT_COLOR = ft.Colors.GREY_900
 HIGHLIGHT_COLOR = ft.Colors.GREEN_600
 
 
+# Pool das consultas do dashboard: cada thread tem sua conexão SQLite
+# (ver conexao.py), então as partes são consultadas em paralelo
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="relatorios")
+
+INTERVALO_ATUALIZACAO = 5   # segundos mínimos entre duas atualizações
+
+
 class DashboardGraficos:
-    def __init__(self, page):
+    """Gráficos do dashboard, atualizados em segundo plano.
+
+    Cada parte fica num Container fixo (o "encaixe") que entra no layout
+    uma vez só; atualizar troca o conteúdo dos encaixes. Pedidos de
+    atualização (ex.: a cada venda) são agrupados: roda no máximo uma
+    atualização a cada `intervalo` segundos, com as consultas no pool e
+    a troca de todos os gráficos de uma vez no loop do Flet.
+    """
+
+    # Parte do dashboard -> (consulta, método que monta o controle)
+    PARTES = {
+        'cards': (obter_resumo_vendas, 'criar_cards_resumo'),
+        'grafico_pizza': (obter_formas_pagamento, 'criar_grafico_pizza'),
+        'grafico_linha_pagamento': (obter_evolucao_por_pagamento,
+                                    'criar_grafico_linha_pagamento'),
+        'grafico_barras': (obter_produtos_mais_vendidos, 'criar_grafico_barras'),
+        'tabela_cartoes': (obter_detalhes_cartao, 'criar_tabela_cartoes'),
+        'grafico_estoque': (obter_dados_estoque, 'criar_grafico_estoque'),
+    }
+
+    def __init__(self, page, intervalo=INTERVALO_ATUALIZACAO):
         self.page = page
-        self.cards = self.criar_cards_resumo()
-        self.grafico_pizza = self.criar_grafico_pizza()
-        self.grafico_linha_pagamento = self.criar_grafico_linha_pagamento()
-        self.grafico_barras = self.criar_grafico_barras()
-        self.tabela_cartoes = self.criar_tabela_cartoes()
+        self.intervalo = intervalo
+        self.encaixes = {
+            nome: ft.Container(content=ft.ProgressRing(width=24, height=24))
+            for nome in self.PARTES
+        }
+        self.cards = self.encaixes['cards']
+        self.grafico_pizza = self.encaixes['grafico_pizza']
+        self.grafico_linha_pagamento = self.encaixes['grafico_linha_pagamento']
+        self.grafico_barras = self.encaixes['grafico_barras']
+        self.tabela_cartoes = self.encaixes['tabela_cartoes']
+        self.grafico_estoque = self.encaixes['grafico_estoque']
+        self.texto_atualizado = ft.Text(
+            "Carregando...", size=12, italic=True, color=ft.Colors.GREY_600)
+
+        self._trava = threading.Lock()
+        self._agendada = False
+        self._ultima = 0.0          # time.monotonic() do início da última
+        self._geracao = 0
+
+    # ----------------------------------------------------------
+    # Atualização
+    # ----------------------------------------------------------
+
+    def agendar_atualizacao(self):
+        """Pede uma atualização em segundo plano (de qualquer thread).
+
+        Se já houver uma agendada, este pedido vai junto com ela.
+        """
+        with self._trava:
+            if self._agendada:
+                return
+            self._agendada = True
+        self.page.run_task(self._atualizar_em_segundo_plano)
+
+    async def _atualizar_em_segundo_plano(self):
+        espera = self._ultima + self.intervalo - time.monotonic()
+        if espera > 0:
+            await asyncio.sleep(espera)
+        with self._trava:
+            # Pedidos que chegarem daqui em diante agendam a próxima
+            self._agendada = False
+            self._ultima = time.monotonic()
+            self._geracao += 1
+            geracao = self._geracao
+
+        try:
+            loop = asyncio.get_running_loop()
+            resultados = await asyncio.gather(*[
+                loop.run_in_executor(_executor, consulta)
+                for consulta, _ in self.PARTES.values()])
+            if geracao != self._geracao:
+                return  # Uma atualização mais nova já vai trocar os gráficos
+            self._trocar(self.montar(dict(zip(self.PARTES, resultados))))
+        except Exception as e:
+            logging.error("ERRO ao atualizar o dashboard: %s", e)
+
+    def coletar(self):
+        """Roda as consultas de todas as partes (na thread atual)"""
+        return {nome: consulta() for nome, (consulta, _) in self.PARTES.items()}
+
+    def montar(self, dados):
+        """Monta os controles de cada parte a partir dos resultados"""
+        return {nome: getattr(self, metodo)(dados[nome])
+                for nome, (_, metodo) in self.PARTES.items()}
+
+    def _trocar(self, controles):
+        """Troca o conteúdo de todos os encaixes e envia numa só atualização"""
+        for nome, controle in controles.items():
+            encaixe = self.encaixes[nome]
+            encaixe.content = controle
+            encaixe.expand = controle.expand  # O layout segue o do gráfico
+        self.texto_atualizado.value = (
+            f"Atualizado às {datetime.now():%H:%M:%S}")
+        # Fora da tela basta guardar: o conteúdo vai quando for exibido
+        if self.texto_atualizado.page is not None:
+            self.page.update()
 
     def atualizar_tudo(self):
-        """Atualiza todos os componentes do dashboard"""
-        self.cards = self.criar_cards_resumo()
-        self.grafico_pizza = self.criar_grafico_pizza()
-        self.grafico_linha_pagamento = self.criar_grafico_linha_pagamento()
-        self.grafico_barras = self.criar_grafico_barras()
-        self.tabela_cartoes = self.criar_tabela_cartoes()
-        self.page.update()
-
-    def criar_cards_resumo(self):
-        total, qtd, ticket = obter_resumo_vendas()
+        """Atualiza todos os componentes já, na thread atual"""
+        self._trocar(self.montar(self.coletar()))
+
+    def criar_cards_resumo(self, resumo):
+        total, qtd, ticket = resumo
         cards = [
-            ("💰 Total Vendido", f"R$ {total:,.2f}"),
+            ("💰 Total Vendido", formatar_reais(total, milhar=True)),
             ("🛒 Nº de Vendas", str(qtd)),
-            ("📊 Ticket Médio", f"R$ {ticket:,.2f}")
+            ("📊 Ticket Médio", formatar_reais(ticket, milhar=True))
         ]
 
         return ft.Row(
@@ -164,8 +291,7 @@ class DashboardGraficos:
             expand=True
         )
 
-    def criar_grafico_pizza(self):
-        dados = obter_formas_pagamento()
+    def criar_grafico_pizza(self, dados):
         if not dados:
             return ft.Text("Nenhuma venda registrada")
 
@@ -189,8 +315,8 @@ class DashboardGraficos:
             expand=True
         )
 
-    def criar_grafico_linha_pagamento(self):
-        dados, formas = obter_evolucao_por_pagamento()
+    def criar_grafico_linha_pagamento(self, evolucao):
+        dados, formas = evolucao
         if not dados:
             return ft.Text("Nenhuma venda registrada")
 
@@ -202,7 +328,7 @@ class DashboardGraficos:
             pontos = []
             for idx, (data, valores) in enumerate(dados):
                 pontos.append(ft.LineChartDataPoint(
-                    idx, valores.get(forma, 0)))
+                    idx, reais(valores.get(forma, 0))))
             series.append(ft.LineChartData(
                 data_points=pontos,
                 stroke_width=3,
@@ -225,8 +351,8 @@ class DashboardGraficos:
                     ),
                     expand=True,
                     interactive=True,
-                    max_y=max([max(valores.values())
-                              for _, valores in dados]) * 1.2 if dados else 100
+                    max_y=reais(max([max(valores.values())
+                                    for _, valores in dados])) * 1.2 if dados else 100
                 )
             ], spacing=10),
             padding=10,
@@ -235,8 +361,7 @@ class DashboardGraficos:
             expand=True
         )
 
-    def criar_grafico_barras(self):
-        dados = obter_produtos_mais_vendidos()
+    def criar_grafico_barras(self, dados):
         if not dados:
             return ft.Container(
                 content=ft.Text("Nenhum produto vendido"),
@@ -392,11 +517,8 @@ class DashboardGraficos:
             border=ft.border.all(1, ft.Colors.GREY_300)
         )
 
-    def criar_grafico_estoque(self):
+    def criar_grafico_estoque(self, dados):
         """Cria gráfico de barras horizontais para estoque de produtos"""
-        # Obtém os dados do banco
-        dados = obter_dados_estoque()
-
         # Ordena os dados em ordem decrescente por quantidade
         dados_ordenados = sorted(dados, key=lambda x: x[1], reverse=True)
 
@@ -578,9 +700,8 @@ class DashboardGraficos:
             )
         )
 
-    def criar_tabela_cartoes(self):
+    def criar_tabela_cartoes(self, dados):
         """Cria uma tabela detalhada com as vendas de cartão"""
-        dados = obter_detalhes_cartao()
 
         if not dados:
             return ft.Container(
@@ -613,7 +734,7 @@ class DashboardGraficos:
                         ft.DataCell(ft.Text(nome or "Não informado")),
                         ft.DataCell(ft.Text(tipo.upper(), color=ft.Colors.BLUE_700 if tipo == 'credito' else ft.Colors.GREEN_700, weight="bold")),
                         ft.DataCell(ft.Text(f"{parcelas}x")),
-                        ft.DataCell(ft.Text(f"R$ {total:.2f}", weight="bold")),
+                        ft.DataCell(ft.Text(formatar_reais(total), weight="bold")),
                     ]
                 )
             )
@@ -0,0 +1,107 @@
+import threading
+import time
+import logging
+
+# ==============================================================
+# RESERVAS DE ESTOQUE EM MEMÓRIA
+# ==============================================================
+#
+# O carrinho não grava em produtos.quantidade: cada sessão apenas
+# reserva o que colocou no carrinho. Disponível = estoque - reservas
+# ativas das outras sessões. A baixa real acontece só na venda
+# (registrar_venda_db). Reservas não renovadas expiram e são liberadas
+# pela varredura em segundo plano.
+
+TTL_RESERVA = 15 * 60          # segundos sem mexer no carrinho
+INTERVALO_VARREDURA = 60       # segundos entre varreduras
+
+
+class ReservasEstoque:
+    """Livro de reservas {codigo: {sessao: [quantidade, expira_em]}}"""
+
+    def __init__(self, ttl=TTL_RESERVA, relogio=time.monotonic):
+        self.ttl = ttl
+        self._relogio = relogio
+        self._lock = threading.Lock()
+        self._reservas = {}
+        self._varredura = None
+
+    def _reservado_por_outros(self, codigo, sessao, agora):
+        return sum(
+            quantidade
+            for dono, (quantidade, expira_em) in self._reservas.get(codigo, {}).items()
+            if dono != sessao and expira_em > agora
+        )
+
+    def disponivel(self, codigo, estoque, sessao=None):
+        """Estoque que `sessao` ainda pode reservar"""
+        with self._lock:
+            return estoque - self._reservado_por_outros(codigo, sessao, self._relogio())
+
+    def reservar(self, sessao, codigo, quantidade, estoque):
+        """Define a reserva da sessão para `codigo` como `quantidade`.
+
+        Retorna False (sem alterar nada) se não houver disponível.
+        Toda reserva bem-sucedida renova o prazo das demais da sessão.
+        """
+        with self._lock:
+            agora = self._relogio()
+            if quantidade > estoque - self._reservado_por_outros(codigo, sessao, agora):
+                return False
+
+            self._reservas.setdefault(codigo, {})[sessao] = [quantidade, agora + self.ttl]
+            self._renovar(sessao, agora)
+            return True
+
+    def _renovar(self, sessao, agora):
+        for por_sessao in self._reservas.values():
+            if sessao in por_sessao:
+                por_sessao[sessao][1] = agora + self.ttl
+
+    def liberar(self, sessao, codigo=None):
+        """Libera a reserva de um produto, ou todas as da sessão"""
+        with self._lock:
+            codigos = [codigo] if codigo is not None else list(self._reservas)
+            for cod in codigos:
+                por_sessao = self._reservas.get(cod)
+                if por_sessao is None:
+                    continue
+                por_sessao.pop(sessao, None)
+                if not por_sessao:
+                    del self._reservas[cod]
+
+    def varrer(self):
+        """Remove as reservas expiradas; retorna quantas foram liberadas"""
+        liberadas = 0
+        with self._lock:
+            agora = self._relogio()
+            for codigo in list(self._reservas):
+                por_sessao = self._reservas[codigo]
+                for sessao in [s for s, (_, expira_em) in por_sessao.items()
+                               if expira_em <= agora]:
+                    del por_sessao[sessao]
+                    liberadas += 1
+                if not por_sessao:
+                    del self._reservas[codigo]
+
+        if liberadas:
+            logging.info("Reservas expiradas liberadas: %d", liberadas)
+        return liberadas
+
+    def iniciar_varredura(self, intervalo=INTERVALO_VARREDURA):
+        """Inicia (uma única vez) a thread que libera carrinhos abandonados"""
+        if self._varredura is not None:
+            return
+
+        def laco():
+            while True:
+                time.sleep(intervalo)
+                self.varrer()
+
+        self._varredura = threading.Thread(
+            target=laco, name="varredura-reservas", daemon=True)
+        self._varredura.start()
+
+
+# Livro compartilhado por todas as sessões do processo
+reservas = ReservasEstoque()
@@ -0,0 +1,105 @@
+import flet as ft
+
+from busca import PipelineBusca
+from database import sugerir_produtos_db, catalogo
+from dinheiro import formatar_reais
+
+# ==============================================================
+# SELETOR DE PRODUTO COM AUTOCOMPLETAR
+# ==============================================================
+#
+# Substitui o Dropdown com o catálogo inteiro: o caixa digita parte do
+# nome (ou o código) e vê as primeiras sugestões. Debounce, descarte
+# de buscas superadas e cache ficam no PipelineBusca (busca.py).
+
+ESPERA_DIGITACAO = 0.15     # segundos sem digitar antes de buscar
+LIMITE_SUGESTOES = 8
+
+
+class SeletorProduto:
+    """Campo de texto com sugestões de produtos; `value` é o código escolhido"""
+
+    def __init__(self, page, ao_escolher=None, espera=ESPERA_DIGITACAO,
+                 limite=LIMITE_SUGESTOES):
+        self.page = page
+        self.ao_escolher = ao_escolher
+        self.espera = espera
+        self.limite = limite
+
+        self.value = None           # Código do produto escolhido
+        self.sugestoes = []
+        self.pipeline = PipelineBusca(
+            lambda texto: sugerir_produtos_db(texto, limite),
+            self._receber,
+            versao=lambda: catalogo.versao,
+            espera=espera
+        )
+
+        self.campo = ft.TextField(
+            label="Produto",
+            hint_text="Nome ou código",
+            width=300,
+            border_color=ft.Colors.BLUE_700,
+            prefix_icon=ft.Icons.SHOPPING_BAG,
+            on_change=self._digitou,
+            on_submit=self._confirmar
+        )
+        self.lista = ft.Column(spacing=0, visible=False)
+        self.controle = ft.Column([
+            self.campo,
+            ft.Container(
+                content=self.lista,
+                width=300,
+                border=ft.border.all(1, ft.Colors.GREY_300),
+                border_radius=5
+            )
+        ], spacing=2)
+
+    def focus(self):
+        self.campo.focus()
+
+    def limpar(self):
+        """Esquece a escolha e as sugestões"""
+        self.pipeline.cancelar()
+        self.value = None
+        self.campo.value = ""
+        self._mostrar([])
+
+    # ----------------------------------------------------------
+    # Digitação e busca
+    # ----------------------------------------------------------
+
+    async def _digitou(self, e):
+        self.value = None
+        await self.pipeline.digitar(self.campo.value or "")
+
+    def _receber(self, texto, produtos):
+        self._mostrar(produtos)
+        self.page.update()
+
+    def _mostrar(self, produtos):
+        self.sugestoes = produtos
+        self.lista.controls = [
+            ft.ListTile(
+                title=ft.Text(p[1], weight=ft.FontWeight.BOLD),
+                subtitle=ft.Text(
+                    f"{p[0]} | {formatar_reais(p[2])} | Estoque: {p[3]}"),
+                dense=True,
+                on_click=lambda e, p=p: self.escolher(p)
+            ) for p in produtos
+        ]
+        self.lista.visible = bool(produtos)
+
+    def _confirmar(self, e):
+        """Enter escolhe a primeira sugestão"""
+        if self.sugestoes:
+            self.escolher(self.sugestoes[0])
+
+    def escolher(self, produto):
+        self.pipeline.cancelar()  # Descarta buscas ainda pendentes
+        self.value = produto[0]
+        self.campo.value = f"{produto[1]} ({formatar_reais(produto[2])})"
+        self._mostrar([])
+        self.page.update()
+        if self.ao_escolher:
+            self.ao_escolher(produto)
@@ -0,0 +1,136 @@
+import flet as ft
+
+from dinheiro import formatar_reais
+
+# ==============================================================
+# EXIBIÇÃO INCREMENTAL DO CARRINHO
+# ==============================================================
+#
+# Cada linha do carrinho tem seus controles guardados por código.
+# Incluir um item envia só a linha nova; somar quantidade envia só os
+# textos de quantidade e subtotal; remover envia só a lista de linhas.
+# O texto do total é enviado sozinho a cada alteração. Nada disso usa
+# page.update(), então o custo não cresce com o resto da página.
+
+
+class TabelaCarrinho:
+    """Linhas do carrinho mantidas por código e atualizadas no lugar"""
+
+    def __init__(self, page, carrinho, ao_remover):
+        self.page = page
+        self.carrinho = carrinho
+        self.ao_remover = ao_remover
+        # codigo -> {'linha': Row, 'quantidade': Text, 'subtotal': Text, 'mostrada': int}
+        self.linhas = {}
+
+        self.coluna = ft.Column([
+            ft.Row([
+                ft.Text("Produto", weight=ft.FontWeight.BOLD,
+                        size=20, expand=2),
+                ft.Text("Qtde", weight=ft.FontWeight.BOLD, size=20, expand=1),
+                ft.Text("Preço un", weight=ft.FontWeight.BOLD,
+                        size=20, expand=1),
+                ft.Text("Subtotal", weight=ft.FontWeight.BOLD,
+                        size=20, expand=1),
+                ft.Text("", expand=1)
+            ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN)
+        ], spacing=15)
+        self.texto_total = ft.Text(
+            f"Total: {formatar_reais(0)}", size=25, weight=ft.FontWeight.BOLD)
+
+        self.controles = [
+            ft.Card(
+                content=ft.Container(
+                    content=self.coluna,
+                    padding=10,
+                    bgcolor=ft.Colors.GREY_100,
+                    border_radius=8
+
+                ),
+                elevation=2,
+                margin=ft.margin.symmetric(vertical=5)
+            ),
+            ft.Row(  # total alinhado com a coluna "Subtotal"
+                controls=[
+                    ft.Container(
+                        content=self.texto_total,
+                        alignment=ft.alignment.center_right,
+                        expand=True
+                    )
+                ],
+                alignment=ft.MainAxisAlignment.END
+            )
+        ]
+
+    def atualizar(self, codigo=None):
+        """Sincroniza a tela com o carrinho e envia só o que mudou.
+
+        Com `codigo`, confere apenas essa linha (inclusão ou remoção de
+        um item); sem ele, confere todas (ex.: carrinho limpo).
+        """
+        alterados = []
+        if codigo is not None:
+            codigos = [codigo]
+        else:
+            codigos = list(self.linhas) + [item.codigo for item in self.carrinho
+                                           if item.codigo not in self.linhas]
+        for cod in codigos:
+            alterados.extend(self._sincronizar(cod))
+        alterados = list(dict.fromkeys(alterados))  # A coluna vai uma vez só
+
+        texto = f"Total: {formatar_reais(self.carrinho.total)}"
+        if texto != self.texto_total.value:
+            self.texto_total.value = texto
+            alterados.append(self.texto_total)
+
+        # Antes de a página ser montada, basta guardar os valores
+        if self.coluna.page is not None:
+            for controle in alterados:
+                controle.update()
+
+    def _sincronizar(self, codigo):
+        """Ajusta a linha de `codigo`; retorna os controles a enviar"""
+        item = self.carrinho.obter(codigo)
+        linha = self.linhas.get(codigo)
+
+        if item is None:
+            if linha is None:
+                return []
+            del self.linhas[codigo]
+            self.coluna.controls.remove(linha['linha'])
+            return [self.coluna]
+
+        if linha is None:
+            self.coluna.controls.append(self._criar_linha(item))
+            return [self.coluna]
+
+        if linha['mostrada'] == item.quantidade:
+            return []
+        linha['mostrada'] = item.quantidade
+        linha['quantidade'].value = str(item.quantidade)
+        linha['subtotal'].value = formatar_reais(item.subtotal)
+        return [linha['quantidade'], linha['subtotal']]
+
+    def _criar_linha(self, item):
+        texto_quantidade = ft.Text(str(item.quantidade), size=20, expand=1)
+        texto_subtotal = ft.Text(formatar_reais(item.subtotal),
+                                 size=20, expand=1, color=ft.Colors.GREEN)
+        linha = ft.Row([
+            ft.Text(item.nome, size=20, expand=2),
+            texto_quantidade,
+            ft.Text(formatar_reais(item.preco), size=20, expand=1),
+            texto_subtotal,
+            ft.IconButton(
+                icon=ft.Icons.DELETE,
+                icon_color=ft.Colors.RED_700,
+                tooltip="Remover",
+                on_click=lambda e, cod=item.codigo: self.ao_remover(cod)
+            )
+        ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN)
+        self.linhas[item.codigo] = {
+            'linha': linha,
+            'quantidade': texto_quantidade,
+            'subtotal': texto_subtotal,
+            'mostrada': item.quantidade,
+        }
+        return linha
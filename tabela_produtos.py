@@ -0,0 +1,249 @@
+import flet as ft
+import logging
+
+from database import buscar_produtos_db, catalogo
+from dinheiro import formatar_reais
+
+# ==============================================================
+# TABELA DE PRODUTOS PAGINADA
+# ==============================================================
+#
+# Só a página visível vira controles: a tabela pede ao banco uma página
+# por vez (paginação por keyset em buscar_produtos_db) e guarda a última
+# linha de cada página visitada para poder voltar. Filtro e ordenação
+# rodam no banco.
+#
+# Quando o catálogo muda sem mexer na composição da página (o caso de
+# uma venda: só o estoque muda), as linhas existentes são reaproveitadas
+# e só as células de preço/estoque alteradas são enviadas, cada uma com
+# seu próprio control.update(). Bytes por venda nos dois caminhos:
+# `python benchmark.py tabela`.
+
+PRODUTOS_POR_PAGINA = 50
+
+# Colunas que podem ser ordenadas: índice da coluna -> ordem no banco
+COLUNAS_ORDENAVEIS = {0: 'codigo', 1: 'nome', 3: 'quantidade'}
+
+
+def cor_estoque(quantidade):
+    """Estoque baixo (menos de 5) aparece em vermelho"""
+    return ft.Colors.RED if quantidade < 5 else ft.Colors.BLACK
+
+
+class TabelaProdutos:
+    """Tabela de produtos com filtro, ordenação e paginação"""
+
+    def __init__(self, page, ao_selecionar, ao_visualizar, ao_excluir,
+                 por_pagina=PRODUTOS_POR_PAGINA):
+        self.page = page
+        self.ao_selecionar = ao_selecionar
+        self.ao_visualizar = ao_visualizar
+        self.ao_excluir = ao_excluir
+        self.por_pagina = por_pagina
+
+        self.filtro = None
+        self.ordem = 'nome'
+        # Cursor de cada página visitada (None = primeira página)
+        self.cursores = [None]
+        self.ultima_linha = None
+        self.tem_proxima = False
+        self.versao = None  # Versão do catálogo da página desenhada
+        # codigo -> {'dados': linha, 'preco': Text, 'estoque': Text}
+        self.linhas = {}
+
+        self.tabela = ft.DataTable(
+            columns=[
+                self._coluna("Código", 0),
+                self._coluna("Nome", 1),
+                self._coluna("Preço", 2),
+                self._coluna("Estoque", 3),
+                self._coluna("Categoria", 4),
+                self._coluna("Ações", 5),
+            ],
+            rows=[],
+            width=1100,
+            heading_row_color=ft.Colors.BLUE_50,
+            column_spacing=20,
+            sort_column_index=1,
+            sort_ascending=True
+        )
+        self.campo_filtro = ft.TextField(
+            label="Filtrar por código, nome ou categoria",
+            prefix_icon=ft.Icons.SEARCH,
+            on_submit=lambda e: self.filtrar(e.control.value),
+            width=400
+        )
+        self.rotulo_pagina = ft.Text()
+        self.botao_anterior = ft.IconButton(
+            ft.Icons.CHEVRON_LEFT, tooltip="Página anterior",
+            on_click=lambda e: self.pagina_anterior())
+        self.botao_proxima = ft.IconButton(
+            ft.Icons.CHEVRON_RIGHT, tooltip="Próxima página",
+            on_click=lambda e: self.proxima_pagina())
+
+        self.controle = ft.Column([
+            self.campo_filtro,
+            self.tabela,
+            ft.Row([self.botao_anterior, self.rotulo_pagina, self.botao_proxima],
+                   alignment=ft.MainAxisAlignment.CENTER)
+        ])
+
+    def _coluna(self, titulo, indice):
+        ordenavel = indice in COLUNAS_ORDENAVEIS
+        return ft.DataColumn(
+            ft.Text(titulo, weight=ft.FontWeight.BOLD),
+            on_sort=(lambda e: self.ordenar(COLUNAS_ORDENAVEIS[indice]))
+            if ordenavel else None
+        )
+
+    # ----------------------------------------------------------
+    # Navegação
+    # ----------------------------------------------------------
+
+    def filtrar(self, filtro):
+        """Aplica um filtro e volta para a primeira página"""
+        self.filtro = filtro.strip() or None
+        self.cursores = [None]
+        self.atualizar(forcar=True)
+
+    def ordenar(self, ordem):
+        """Ordena por outra coluna e volta para a primeira página"""
+        self.ordem = ordem
+        self.tabela.sort_column_index = next(
+            i for i, o in COLUNAS_ORDENAVEIS.items() if o == ordem)
+        self.cursores = [None]
+        self.atualizar(forcar=True)
+
+    def proxima_pagina(self):
+        if self.tem_proxima:
+            self.cursores.append(self.ultima_linha)
+            self.atualizar(forcar=True)
+
+    def pagina_anterior(self):
+        if len(self.cursores) > 1:
+            self.cursores.pop()
+            self.atualizar(forcar=True)
+
+    # ----------------------------------------------------------
+    # Desenho
+    # ----------------------------------------------------------
+
+    def atualizar(self, forcar=False):
+        """Recarrega a página atual (se o catálogo mudou ou se forçado).
+
+        Sem `forcar`, tenta só corrigir as células alteradas; a página é
+        redesenhada inteira se os produtos dela (ou sua ordem) mudaram.
+        """
+        versao = catalogo.versao
+        if not forcar and self.versao == versao:
+            return  # Catálogo não mudou desde o último desenho
+
+        # Uma linha a mais só para saber se existe próxima página
+        produtos = buscar_produtos_db(
+            self.filtro, limite=self.por_pagina + 1,
+            apos=self.cursores[-1], ordem=self.ordem)
+        if not produtos and len(self.cursores) > 1:
+            # A página ficou vazia (ex.: exclusões): volta uma
+            self.cursores.pop()
+            return self.atualizar(forcar=True)
+        self.tem_proxima = len(produtos) > self.por_pagina
+        produtos = produtos[:self.por_pagina]
+        self.ultima_linha = produtos[-1] if produtos else None
+        self.versao = versao
+
+        if not forcar and produtos and self._mesma_composicao(produtos):
+            alterados = self._aplicar_diferencas(produtos)
+            if self.botao_proxima.disabled == self.tem_proxima:
+                self.botao_proxima.disabled = not self.tem_proxima
+                alterados.append(self.botao_proxima)
+            self._enviar(alterados)
+            return
+
+        self.linhas = {}
+        self.tabela.rows = [self._criar_linha(idx, p)
+                            for idx, p in enumerate(produtos)]
+        if not produtos:
+            texto = ("Nenhum produto encontrado" if self.filtro
+                     else "Nenhum produto cadastrado")
+            self.tabela.rows = [
+                ft.DataRow(
+                    cells=[
+                        ft.DataCell(ft.Text(texto, italic=True)),
+                        *[ft.DataCell(ft.Text("")) for _ in range(5)]
+                    ]
+                )
+            ]
+
+        self.rotulo_pagina.value = f"Página {len(self.cursores)}"
+        self.botao_anterior.disabled = len(self.cursores) == 1
+        self.botao_proxima.disabled = not self.tem_proxima
+        self.page.update()
+
+    def _mesma_composicao(self, produtos):
+        """True se a página tem os mesmos produtos, na mesma ordem, com
+        os mesmos textos fixos (código, nome e categoria)"""
+        if len(produtos) != len(self.linhas):
+            return False
+        for p, (codigo, linha) in zip(produtos, self.linhas.items()):
+            anterior = linha['dados']
+            if (p[0], p[1], p[4]) != (codigo, anterior[1], anterior[4]):
+                return False
+        return True
+
+    def _aplicar_diferencas(self, produtos):
+        """Atualiza só as células de preço e estoque que mudaram"""
+        alterados = []
+        for p in produtos:
+            linha = self.linhas[p[0]]
+            anterior, linha['dados'] = linha['dados'], p
+            if p[2] != anterior[2]:
+                linha['preco'].value = formatar_reais(p[2])
+                alterados.append(linha['preco'])
+            if p[3] != anterior[3]:
+                linha['estoque'].value = str(p[3])
+                linha['estoque'].color = cor_estoque(p[3])
+                alterados.append(linha['estoque'])
+        return alterados
+
+    def _enviar(self, alterados):
+        """Envia só os controles alterados, um control.update() cada"""
+        # Fora da tela (página de cadastro fechada) basta guardar os
+        # valores: eles vão junto quando a tabela for exibida
+        if self.tabela.page is not None:
+            for controle in alterados:
+                controle.update()
+        logging.debug("Tabela de produtos: %d controles atualizados", len(alterados))
+
+    def _criar_linha(self, idx, p):
+        texto_preco = ft.Text(formatar_reais(p[2]), color=ft.Colors.GREEN)
+        texto_estoque = ft.Text(str(p[3]), color=cor_estoque(p[3]))
+        self.linhas[p[0]] = {'dados': p, 'preco': texto_preco,
+                             'estoque': texto_estoque}
+        return ft.DataRow(
+            cells=[
+                ft.DataCell(ft.Text(p[0], weight=ft.FontWeight.BOLD)),
+                ft.DataCell(ft.Text(p[1])),
+                ft.DataCell(texto_preco),
+                ft.DataCell(texto_estoque),
+                ft.DataCell(ft.Text(p[4].capitalize(),
+                                    color=ft.Colors.BLUE_700)),
+                ft.DataCell(
+                    ft.Row([
+                        ft.IconButton(
+                            ft.Icons.REMOVE_RED_EYE,
+                            icon_color=ft.Colors.BLUE_700,
+                            tooltip="Visualizar",
+                            on_click=lambda e, cod=p[0]: self.ao_visualizar(cod)
+                        ),
+                        ft.IconButton(
+                            ft.Icons.DELETE,
+                            icon_color=ft.Colors.RED_700,
+                            tooltip="Excluir",
+                            on_click=lambda e, cod=p[0]: self.ao_excluir(cod)
+                        ),
+                    ], spacing=5)
+                ),
+            ],
+            on_select_changed=lambda e, cod=p[0]: self.ao_selecionar(cod),
+            color=ft.Colors.GREY_100 if idx % 2 == 0 else None
+        )
@@ -0,0 +1,117 @@
+import pytest
+
+from carrinho import Carrinho
+
+
+@pytest.fixture
+def carrinho():
+    c = Carrinho()
+    c.adicionar("A", "Caneca", 1250, 2)
+    c.adicionar("B", "Vela", 990, 1)
+    return c
+
+
+def test_carrinho_vazio():
+    c = Carrinho()
+    assert c.total == 0
+    assert c.quantidade_itens == 0
+    assert len(c) == 0
+    assert not c
+    assert c.itens_venda() == []
+    assert c.quantidade_de("A") == 0
+
+
+def test_adicionar_soma_total_e_quantidades(carrinho):
+    assert carrinho.total == 2 * 1250 + 990
+    assert carrinho.quantidade_itens == 3
+    assert len(carrinho) == 2
+    assert carrinho.quantidade_de("A") == 2
+    assert carrinho.quantidade_de("B") == 1
+    assert "A" in carrinho and "C" not in carrinho
+
+
+def test_adicionar_codigo_existente_soma_na_mesma_linha(carrinho):
+    item = carrinho.adicionar("A", "Caneca", 1250, 3)
+    assert item.quantidade == 5
+    assert carrinho.quantidade_de("A") == 5
+    assert len(carrinho) == 2
+    assert carrinho.total == 5 * 1250 + 990
+    assert carrinho.quantidade_itens == 6
+
+
+def test_adicionar_codigo_existente_mantem_o_preco_da_linha(carrinho):
+    carrinho.adicionar("A", "Caneca", 9999, 1)
+    assert carrinho.obter("A").preco == 1250
+    assert carrinho.total == 3 * 1250 + 990
+
+
+@pytest.mark.parametrize("quantidade", [0, -1, -5])
+def test_adicionar_quantidade_nao_positiva_e_recusada(carrinho, quantidade):
+    with pytest.raises(ValueError):
+        carrinho.adicionar("A", "Caneca", 1250, quantidade)
+    with pytest.raises(ValueError):
+        carrinho.adicionar("C", "Novo", 500, quantidade)
+    # Nada muda
+    assert carrinho.total == 2 * 1250 + 990
+    assert carrinho.quantidade_itens == 3
+    assert carrinho.quantidade_de("A") == 2
+    assert "C" not in carrinho
+
+
+def test_remover_devolve_o_item_e_desconta(carrinho):
+    item = carrinho.remover("A")
+    assert item.codigo == "A" and item.quantidade == 2
+    assert carrinho.total == 990
+    assert carrinho.quantidade_itens == 1
+    assert carrinho.quantidade_de("A") == 0
+    assert "A" not in carrinho
+
+
+def test_remover_codigo_ausente_nao_altera(carrinho):
+    assert carrinho.remover("X") is None
+    assert carrinho.total == 2 * 1250 + 990
+    assert carrinho.quantidade_itens == 3
+
+
+def test_readicionar_depois_de_remover(carrinho):
+    carrinho.remover("A")
+    carrinho.adicionar("A", "Caneca", 1300, 1)
+    assert carrinho.total == 990 + 1300
+    assert carrinho.quantidade_de("A") == 1
+    # Volta para o fim da ordem de inclusão
+    assert [i['codigo'] for i in carrinho.itens_venda()] == ["B", "A"]
+
+
+def test_limpar_zera_tudo(carrinho):
+    carrinho.limpar()
+    assert carrinho.total == 0
+    assert carrinho.quantidade_itens == 0
+    assert len(carrinho) == 0
+    assert carrinho.itens_venda() == []
+    carrinho.adicionar("B", "Vela", 990, 2)
+    assert carrinho.total == 1980
+    assert carrinho.quantidade_itens == 2
+
+
+def test_itens_venda_no_formato_de_registrar_venda(carrinho):
+    assert carrinho.itens_venda() == [
+        {'codigo': "A", 'nome': "Caneca", 'preco': 1250, 'quantidade': 2,
+         'subtotal': 2500},
+        {'codigo': "B", 'nome': "Vela", 'preco': 990, 'quantidade': 1,
+         'subtotal': 990},
+    ]
+    assert carrinho.total == sum(i['subtotal'] for i in carrinho.itens_venda())
+
+
+def test_total_incremental_igual_a_soma_recalculada():
+    c = Carrinho()
+    operacoes = [("+", "A", 3), ("+", "B", 1), ("-", "A", 0), ("+", "C", 2),
+                 ("+", "B", 4), ("-", "X", 0), ("+", "A", 1), ("-", "C", 0)]
+    for op, codigo, quantidade in operacoes:
+        if op == "+":
+            c.adicionar(codigo, codigo, 100 + ord(codigo), quantidade)
+        else:
+            c.remover(codigo)
+        itens = c.itens_venda()
+        assert c.total == sum(i['subtotal'] for i in itens)
+        assert c.quantidade_itens == sum(i['quantidade'] for i in itens)